@@ -1,21 +1,19 @@
 """
 Main application entry point for the Video Translator.
 """
-import os
-import tempfile
-import shutil
+import uuid
 from pathlib import Path
 
 import gradio as gr
-from tqdm import tqdm
 
 from src.utils.logger import get_logger
-from src.audio.extractor import extract_audio, get_video_duration
-from src.subtitles.transcriber import generate_subtitles
-from src.subtitles.translator import translate_subtitles
-from src.audio.generator import generate_translated_audio
-from src.video.processor import combine_video_audio_subtitles
-from config import LANGUAGES, OUTPUT_DIR, MAX_VIDEO_DURATION, MAX_UPLOAD_SIZE
+from src.utils.tracing import start_metrics_server
+from src.lifecycle import start_evictor
+from src.pipeline import iter_pipeline
+from src.admission import probe_upload
+from src.rerender import rerender_job
+from src.jobs import load_manifest
+from config import LANGUAGES, TASK_QUEUE
 
 logger = get_logger(__name__)
 
@@ -29,72 +27,60 @@ def process_video(video_file, source_lang, target_langs, progress=gr.Progress())
         target_langs (list): List of target language names
         progress (gr.Progress): Gradio progress tracker
         
-    Returns:
-        list: List of paths to translated videos
+    Yields:
+        tuple: Paths to the translated videos so far, the job ID and the translated
+            subtitle files, updated as soon as each language is ready
     """
+    if not video_file:
+        raise gr.Error("Upload a video first.")
+    if not target_langs:
+        raise gr.Error("Select at least one target language.")
+    
     try:
-        # Convert language names to codes
-        source_lang_code = LANGUAGES[source_lang]
-        target_lang_codes = [LANGUAGES[lang] for lang in target_langs]
-        
-        # Create temporary copy of uploaded file
-        temp_dir = Path(tempfile.mkdtemp(prefix="video_processing_", dir=OUTPUT_DIR / "temp"))
-        video_path = temp_dir / "input_video.mp4"
-        shutil.copy2(video_file, video_path)
-        
-        logger.info(f"Processing video: {video_path}")
-        logger.info(f"Source language: {source_lang} ({source_lang_code})")
-        logger.info(f"Target languages: {', '.join(target_langs)} ({', '.join(target_lang_codes)})")
-        
-        # Check video duration
-        progress(0.05, "Checking video duration...")
-        duration = get_video_duration(video_path)
-        if duration > MAX_VIDEO_DURATION:
-            raise ValueError(f"Video is too long ({duration:.1f} seconds). Maximum allowed duration is {MAX_VIDEO_DURATION} seconds.")
-        
-        # Extract audio
-        progress(0.1, "Extracting audio...")
-        audio_path = extract_audio(video_path)
-        
-        # Generate subtitles
-        progress(0.2, "Generating subtitles...")
-        srt_path = generate_subtitles(audio_path, source_lang_code)
-        
-        # Translate subtitles
-        progress(0.3, "Translating subtitles...")
-        translated_srt_paths = translate_subtitles(srt_path, target_lang_codes)
-        
-        # Generate translated audio
-        translated_audio_paths = {}
-        for i, (lang_code, srt_path) in enumerate(translated_srt_paths.items()):
-            progress_val = 0.3 + (0.4 * (i / len(translated_srt_paths)))
-            progress(progress_val, f"Generating {[k for k, v in LANGUAGES.items() if v == lang_code][0]} audio...")
-            audio_path = generate_translated_audio(srt_path, lang_code, duration)
-            translated_audio_paths[lang_code] = audio_path
-        
-        # Combine video, audio, and subtitles
-        output_videos = []
-        for i, (lang_code, audio_path) in enumerate(translated_audio_paths.items()):
-            progress_val = 0.7 + (0.25 * (i / len(translated_audio_paths)))
-            lang_name = [k for k, v in LANGUAGES.items() if v == lang_code][0]
-            progress(progress_val, f"Creating {lang_name} video...")
-            
-            srt_path = translated_srt_paths[lang_code]
-            output_path = combine_video_audio_subtitles(video_path, audio_path, srt_path)
-            output_videos.append(output_path)
-        
-        # Clean up
-        try:
-            shutil.rmtree(temp_dir)
-        except:
-            logger.warning(f"Failed to clean up temp directory: {temp_dir}")
-            
-        progress(1.0, "Translation complete!")
-        return output_videos
+        # Reject oversized or overlong uploads before a job is started
+        probe = probe_upload(video_file)
+        job_id = uuid.uuid4().hex[:12]
+        outputs = []
+        if TASK_QUEUE:
+            # Imported here so single-node deployments never load the distributed modules
+            from src.distributed.coordinator import iter_distributed as iter_job
+        else:
+            iter_job = iter_pipeline
+        for lang_code, output_path in iter_job(video_file, source_lang, target_langs, progress=progress,
+                                               on_warning=gr.Warning, job_id=job_id, probe=probe):
+            outputs.append(output_path)
+            subtitles = [entry["subtitles"] for entry in load_manifest(job_id)["languages"].values()]
+            yield list(outputs), job_id, subtitles
+    except Exception as e:
+        raise gr.Error(str(e))
+
+def rerender_video(job_id, subtitle_files, progress=gr.Progress()):
+    """
+    Re-render a previous job with edited subtitle files.
+    
+    Args:
+        job_id (str): Job ID shown after translation
+        subtitle_files (list): Edited SRT files named subtitles_<lang>.srt
+        progress (gr.Progress): Gradio progress tracker
         
+    Returns:
+        list: List of paths to re-rendered videos
+    """
+    if not job_id or not subtitle_files:
+        raise gr.Error("Provide a job ID and at least one edited subtitle file.")
+    
+    edited = {}
+    for subtitle_file in subtitle_files:
+        path = Path(getattr(subtitle_file, "name", subtitle_file))
+        lang_code = path.stem.split('_')[-1]
+        if lang_code not in LANGUAGES.values():
+            raise gr.Error(f"Cannot tell the language of {path.name}; keep the subtitles_<lang>.srt file name.")
+        edited[lang_code] = path
+    
+    try:
+        return rerender_job(job_id.strip(), edited, progress=progress)
     except Exception as e:
-        logger.error(f"Video processing failed: {str(e)}", exc_info=True)
-        raise gr.Error(f"Video processing failed: {str(e)}")
+        raise gr.Error(str(e))
 
 def create_app():
     """
@@ -129,10 +115,25 @@ def create_app():
                     object_fit="contain",
                     height="auto"
                 )
+                job_id_box = gr.Textbox(label="Job ID")
+                subtitle_downloads = gr.File(label="Translated Subtitles", file_count="multiple")
+                
+        with gr.Accordion("Fix subtitles and re-render", open=False):
+            edited_subtitles = gr.File(
+                label="Edited subtitles (keep the subtitles_<lang>.srt file names)",
+                file_count="multiple",
+                file_types=[".srt"]
+            )
+            rerender_btn = gr.Button("Re-render")
                 
         translate_btn.click(
             fn=process_video,
             inputs=[video_input, source_lang, target_langs],
+            outputs=[output_gallery, job_id_box, subtitle_downloads]
+        )
+        rerender_btn.click(
+            fn=rerender_video,
+            inputs=[job_id_box, edited_subtitles],
             outputs=output_gallery
         )
         
@@ -156,6 +157,8 @@ def create_app():
     return app
 
 if __name__ == "__main__":
+    start_metrics_server()
+    start_evictor()
     app = create_app()
     app.launch() #, enable_queue=True
     # logger.info("Starting Video Translator application...")
@@ -0,0 +1,179 @@
+"""
+Local deterministic stand-ins for AssemblyAI, Google Translate and gTTS.
+
+``install()`` registers fake ``assemblyai``, ``deep_translator`` and ``gtts``
+modules in ``sys.modules`` so the pipeline code under ``src/`` runs unchanged
+and offline. It must be called before any ``src`` module is imported.
+"""
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import types
+import wave
+from pathlib import Path
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while the camera pans across "
+    "a quiet city street at dawn and people begin their morning routine"
+).split()
+
+SETTINGS = {
+    "cue_count": 20,
+    "translate_latency": 0.0,
+    "tts_latency": 0.0,
+    "seed": 1234
+}
+
+
+def configure(**kwargs):
+    """
+    Update fake provider settings.
+
+    Args:
+        **kwargs: Any of cue_count, translate_latency, tts_latency, seed
+    """
+    unknown = set(kwargs) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown fake settings: {', '.join(sorted(unknown))}")
+    SETTINGS.update(kwargs)
+
+
+def _wav_duration(path):
+    with wave.open(str(path), "rb") as f:
+        return f.getnframes() / float(f.getframerate())
+
+
+def _format_srt_time(ms):
+    hours, ms = divmod(int(ms), 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+class _Word:
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.confidence = 1.0
+
+
+class _Transcript:
+    def __init__(self, duration):
+        rng = random.Random(SETTINGS["seed"])
+        cue_count = max(1, SETTINGS["cue_count"])
+        slot = duration * 1000 / cue_count
+        self.words = []
+        self._cues = []
+        for i in range(cue_count):
+            start = i * slot
+            end = start + slot * 0.85
+            count = rng.randint(4, 10)
+            step = (end - start) / count
+            cue_words = []
+            for j in range(count):
+                word = rng.choice(WORDS)
+                if j == count - 1:
+                    word += "."
+                cue_words.append(_Word(word, int(start + j * step), int(start + (j + 1) * step)))
+            self.words.extend(cue_words)
+            self._cues.append((start, end, " ".join(w.text for w in cue_words)))
+        self.text = " ".join(w.text for w in self.words)
+        self.status = "completed"
+
+    def export_subtitles_srt(self, chars_per_caption=None):
+        blocks = []
+        for i, (start, end, text) in enumerate(self._cues, 1):
+            blocks.append(f"{i}\n{_format_srt_time(start)} --> {_format_srt_time(end)}\n{text}\n")
+        return "\n".join(blocks)
+
+
+class _TranscriptionConfig:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Transcriber:
+    def transcribe(self, audio_path, config=None):
+        return _Transcript(_wav_duration(audio_path))
+
+
+class FakeGoogleTranslator:
+    """Deterministic translator that tags text with the target language."""
+
+    def __init__(self, source="auto", target="en"):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        if SETTINGS["translate_latency"]:
+            time.sleep(SETTINGS["translate_latency"])
+        return f"[{self.target}] {text}"
+
+
+_clip_cache = {}
+_clip_lock = threading.Lock()
+_clip_dir = None
+
+
+def _clip_for(word_count):
+    """Render (once) a tone clip whose length follows the spoken word count."""
+    bucket = max(1, min(word_count, 40))
+    with _clip_lock:
+        if bucket not in _clip_cache:
+            path = Path(_clip_dir) / f"tts_{bucket:02d}.mp3"
+            duration = 0.3 * bucket
+            cmd = [
+                'ffmpeg', '-f', 'lavfi',
+                '-i', f'sine=frequency={200 + bucket * 10}:sample_rate=24000',
+                '-t', f'{duration:.2f}', '-ac', '1', '-y', str(path)
+            ]
+            subprocess.run(cmd, capture_output=True, check=True)
+            _clip_cache[bucket] = path
+        return _clip_cache[bucket]
+
+
+class FakeGTTS:
+    """gTTS stand-in that writes a cached synthetic tone clip."""
+
+    def __init__(self, text, lang="en", slow=False, **kwargs):
+        self.text = text
+        self.lang = lang
+        self.slow = slow
+
+    def save(self, savefile):
+        if SETTINGS["tts_latency"]:
+            time.sleep(SETTINGS["tts_latency"])
+        shutil.copyfile(_clip_for(len(self.text.split())), savefile)
+
+    def write_to_fp(self, fp):
+        fp.write(_clip_for(len(self.text.split())).read_bytes())
+
+
+def install(clip_dir):
+    """
+    Register the fake provider modules.
+
+    Args:
+        clip_dir (str): Directory for cached synthetic TTS clips
+    """
+    global _clip_dir
+    _clip_dir = clip_dir
+    Path(clip_dir).mkdir(parents=True, exist_ok=True)
+
+    aai = types.ModuleType("assemblyai")
+    aai.settings = types.SimpleNamespace(api_key=None)
+    aai.TranscriptionConfig = _TranscriptionConfig
+    aai.Transcriber = _Transcriber
+    sys.modules["assemblyai"] = aai
+
+    deep_translator = types.ModuleType("deep_translator")
+    deep_translator.GoogleTranslator = FakeGoogleTranslator
+    sys.modules["deep_translator"] = deep_translator
+
+    gtts = types.ModuleType("gtts")
+    gtts.gTTS = FakeGTTS
+    sys.modules["gtts"] = gtts
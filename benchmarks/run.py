@@ -0,0 +1,255 @@
+"""
+Offline benchmark suite for the dubbing pipeline.
+
+Generates synthetic videos with ffmpeg, runs every stage in ``src/`` against
+local fake providers and reports per-stage time, throughput and peak RSS.
+
+Usage:
+    python -m benchmarks.run                       # run all scenarios
+    python -m benchmarks.run --scenarios short     # run a subset
+    python -m benchmarks.run --save-baseline main  # store results
+    python -m benchmarks.run --compare main        # fail on regressions
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+
+SCENARIOS = {
+    "short": {"duration": 30, "cues": 10, "langs": ["es"]},
+    "medium": {"duration": 120, "cues": 40, "langs": ["es", "fr"]},
+    "long": {"duration": 600, "cues": 150, "langs": ["es", "fr"]},
+    "dense": {"duration": 120, "cues": 120, "langs": ["es"]}
+}
+
+# Fake providers never throttle, so the production token bucket would only time itself
+BENCH_RATE_LIMIT = 1000.0
+
+STAGES = ["extract", "transcribe", "translate", "synthesize", "mix", "combine", "end_to_end"]
+
+
+def make_synthetic_video(path, duration):
+    """
+    Generate a test-pattern video with a tone soundtrack.
+
+    Args:
+        path (Path): Output MP4 path
+        duration (float): Length in seconds
+
+    Returns:
+        Path: Path to the generated video
+    """
+    cmd = [
+        'ffmpeg',
+        '-f', 'lavfi', '-i', 'testsrc=size=640x360:rate=25',
+        '-f', 'lavfi', '-i', 'sine=frequency=330:sample_rate=44100',
+        '-t', str(duration),
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest',
+        '-y', str(path)
+    ]
+    process = subprocess.run(cmd, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise Exception(f"Synthetic video generation failed: {process.stderr}")
+    return path
+
+
+def _peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return own / scale, children / scale
+
+
+def run_worker(name, work_dir):
+    """
+    Run one scenario in the current process and print its results as JSON.
+
+    Args:
+        name (str): Scenario name
+        work_dir (str): Scratch directory used as OUTPUT_DIR
+    """
+    from benchmarks import fakes
+
+    scenario = SCENARIOS[name]
+    fakes.configure(cue_count=scenario["cues"])
+    fakes.install(Path(work_dir) / "fake_clips")
+
+    sys.path.insert(0, str(REPO_DIR))
+    # Must run before src.utils.ratelimit imports these settings
+    import config
+    for provider in config.PROVIDER_RATE_LIMITS:
+        config.PROVIDER_RATE_LIMITS[provider] = BENCH_RATE_LIMIT
+    config.RETRY_BACKOFF_BASE = 0.0
+    config.RETRY_BACKOFF_MAX = 0.0
+
+    from src.audio.extractor import extract_audio
+    from src.subtitles.transcriber import transcribe_segments
+    from src.subtitles.translator import translate_cues
+    from src.audio.generator import generate_translated_audio
+    from src.video.processor import combine_video_audio_subtitles
+    from src.utils.tracing import stage_metrics
+    from src.utils.ratelimit import provider_stats
+
+    video_path = make_synthetic_video(Path(work_dir) / "bench_input.mp4", scenario["duration"])
+    timings = {}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+    e2e_start = time.perf_counter()
+    audio_path = timed("extract", extract_audio, video_path)
+    segmentation = timed("transcribe", transcribe_segments, audio_path, "en")
+    translated = timed("translate", translate_cues, segmentation.units, scenario["langs"])
+
+    audio_paths = {}
+    for lang, lang_units in translated.items():
+        audio_paths[lang] = timed("synthesize", generate_translated_audio, lang_units, lang, scenario["duration"])
+
+    for lang, lang_audio in audio_paths.items():
+        srt_path = segmentation.display_cues(translated[lang]).to_srt(Path(work_dir) / f"subtitles_{lang}.srt")
+        timed("combine", combine_video_audio_subtitles, video_path, lang_audio, srt_path)
+    timings["end_to_end"] = time.perf_counter() - e2e_start
+
+    # generate_translated_audio covers both TTS and the ffmpeg mix; split them using the mix span
+    mix = stage_metrics().get("ffmpeg.mix_audio", {}).get("wall_seconds", 0.0)
+    timings["mix"] = mix
+    timings["synthesize"] = max(0.0, timings["synthesize"] - mix)
+
+    rss_self, rss_children = _peak_rss_mb()
+    media_seconds = scenario["duration"] * len(scenario["langs"])
+    result = {
+        "scenario": name,
+        "duration": scenario["duration"],
+        "cues": scenario["cues"],
+        "languages": len(scenario["langs"]),
+        "stages": {stage: round(timings.get(stage, 0.0), 4) for stage in STAGES},
+        "throughput": {
+            "media_seconds_per_second": round(media_seconds / timings["end_to_end"], 3),
+            "cues_per_second": round(scenario["cues"] * len(scenario["langs"]) / timings["end_to_end"], 3)
+        },
+        # Time spent waiting on provider rate limits, included in the stage times above
+        "provider_wait_seconds": {
+            provider: round(stats["wait_seconds"], 4) for provider, stats in provider_stats().items()
+        },
+        "peak_rss_mb": {"python": round(rss_self, 1), "children": round(rss_children, 1)}
+    }
+    print(json.dumps(result))
+
+
+def run_scenario(name):
+    """
+    Run a scenario in an isolated subprocess so peak RSS is per scenario.
+
+    Args:
+        name (str): Scenario name
+
+    Returns:
+        dict: Scenario results
+    """
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as work_dir:
+        env = dict(os.environ)
+        env["OUTPUT_DIR"] = work_dir
+        env.setdefault("ASSEMBLYAI_API_KEY", "benchmark")
+        cmd = [sys.executable, "-m", "benchmarks.run", "--worker", name, "--work-dir", work_dir]
+        process = subprocess.run(cmd, capture_output=True, text=True, cwd=REPO_DIR, env=env)
+        if process.returncode != 0:
+            raise Exception(f"Scenario {name} failed: {process.stderr[-2000:]}")
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a stored baseline.
+
+    Args:
+        results (dict): Current results keyed by scenario
+        baseline (dict): Baseline results keyed by scenario
+        tolerance (float): Allowed relative slowdown (0.2 = 20%)
+
+    Returns:
+        list: Human-readable regression messages
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for stage in STAGES:
+            old = previous["stages"].get(stage, 0.0)
+            new = current["stages"].get(stage, 0.0)
+            # Ignore stages too short to time reliably
+            if old >= 0.05 and new > old * (1 + tolerance):
+                regressions.append(f"{name}/{stage}: {old:.3f}s -> {new:.3f}s (+{(new / old - 1) * 100:.0f}%)")
+        old_rss = previous["peak_rss_mb"]["python"]
+        new_rss = current["peak_rss_mb"]["python"]
+        if new_rss > old_rss * (1 + tolerance):
+            regressions.append(f"{name}/peak_rss: {old_rss:.1f}MB -> {new_rss:.1f}MB")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'scenario':<10}" + "".join(f"{stage:>12}" for stage in STAGES) + f"{'media x':>10}{'rss MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        row = f"{name:<10}" + "".join(f"{result['stages'][stage]:>12.3f}" for stage in STAGES)
+        row += f"{result['throughput']['media_seconds_per_second']:>10.2f}{result['peak_rss_mb']['python']:>10.1f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the dubbing pipeline")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store results as a named baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against a named baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.work_dir)
+        return 0
+
+    results = {name: run_scenario(name) for name in args.scenarios}
+    print_table(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved baseline: {path}")
+
+    if args.compare:
+        path = BASELINE_DIR / f"{args.compare}.json"
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against baseline '{args.compare}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
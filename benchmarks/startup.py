@@ -0,0 +1,97 @@
+"""
+Cold-start import-time breakdown for the app and worker entry points.
+
+Runs ``python -X importtime`` in fresh interpreters and reports total import
+time, the slowest top-level packages and which provider SDKs were loaded
+(directly or by another package).
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modules src.pipeline --budget-ms 300
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Packages that should only load when their backend or the UI is actually used
+HEAVY_PACKAGES = ["gradio", "assemblyai", "gtts", "deep_translator", "moviepy"]
+
+
+def measure(module, runs=3):
+    """
+    Measure import time for a module in fresh interpreters.
+
+    Args:
+        module (str): Module to import
+        runs (int): Number of runs; the fastest is reported
+
+    Returns:
+        dict: Wall time, per-package cumulative times and loaded heavy packages
+    """
+    best = None
+    for _ in range(runs):
+        env = dict(os.environ)
+        env.setdefault("OUTPUT_DIR", str(REPO_DIR / "outputs"))
+        cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+        start = time.perf_counter()
+        process = subprocess.run(cmd, capture_output=True, text=True, cwd=REPO_DIR, env=env)
+        wall = time.perf_counter() - start
+        if process.returncode != 0:
+            raise Exception(f"Importing {module} failed: {process.stderr[-2000:]}")
+
+        packages = {}
+        loaded = set()
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or line.count("|") < 2:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            if not self_us.strip().isdigit():
+                continue
+            # The name follows a single space; nested imports are indented further
+            name = name[1:] if name.startswith(" ") else name
+            top = name.strip().split(".")[0]
+            loaded.add(top)
+            # Only top-level entries carry a package's full cost; nested ones are already in it
+            if not name.startswith(" "):
+                packages[top] = packages.get(top, 0) + int(cumulative_us)
+
+        result = {
+            "module": module,
+            "wall_ms": wall * 1000,
+            "packages_ms": {name: us / 1000 for name, us in packages.items()},
+            "heavy_loaded": [name for name in HEAVY_PACKAGES if name in loaded]
+        }
+        if best is None or result["wall_ms"] < best["wall_ms"]:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown for cold starts")
+    parser.add_argument("--modules", nargs="+", default=["src.pipeline", "app"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, help="Fail if any module exceeds this wall time")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        result = measure(module, args.runs)
+        print(f"{module}: {result['wall_ms']:.1f} ms wall")
+        ranked = sorted(result["packages_ms"].items(), key=lambda item: item[1], reverse=True)
+        for name, ms in ranked[:args.top]:
+            print(f"  {name:<30}{ms:>10.1f} ms")
+        print(f"  heavy packages loaded: {', '.join(result['heavy_loaded']) or 'none'}")
+        if args.budget_ms and result["wall_ms"] > args.budget_ms:
+            print(f"  over budget ({args.budget_ms:.0f} ms)")
+            over_budget = True
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
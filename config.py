@@ -2,6 +2,7 @@
 Configuration settings for the video translator application.
 """
 import os
+import platform
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -11,22 +12,49 @@ load_dotenv()
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent
 
-# API Keys
+# API Keys (validated on first use, so importing config stays side-effect free)
 ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
-if not ASSEMBLYAI_API_KEY:
-    raise ValueError("ASSEMBLYAI_API_KEY is not set in environment variables or .env file")
+
+def get_assemblyai_api_key():
+    """
+    Get the AssemblyAI API key.
+    
+    Returns:
+        str: The API key
+        
+    Raises:
+        ValueError: If the key is not configured
+    """
+    if not ASSEMBLYAI_API_KEY:
+        raise ValueError("ASSEMBLYAI_API_KEY is not set in environment variables or .env file")
+    return ASSEMBLYAI_API_KEY
 
 # Output directory
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", BASE_DIR / "outputs"))
-OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Temp directory for processing
-TEMP_DIR = OUTPUT_DIR / "temp"
-TEMP_DIR.mkdir(exist_ok=True)
+# Temp directory for processing; SCRATCH_DIR can point it at tmpfs (e.g. /dev/shm)
+SCRATCH_DIR = os.getenv("SCRATCH_DIR")
+TEMP_DIR = Path(SCRATCH_DIR) / "linguastream" if SCRATCH_DIR else OUTPUT_DIR / "temp"
+
+def ensure_directories():
+    """
+    Create the output and temp directories if they do not exist.
+    """
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
 # Debug mode
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
+# Logging
+LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "True").lower() == "true"  # write logs from a background thread
+LOG_JSON = os.getenv("LOG_JSON", "False").lower() == "true"  # serialize log records as JSON
+LOG_SAMPLE_INTERVAL = 10  # in seconds, window for rate-limited repetitive warnings
+LOG_SAMPLE_BURST = 3  # repetitive warnings logged per window before suppression
+
+# Server mode disables console progress bars; progress goes through the pipeline callbacks
+SERVER_MODE = os.getenv("SERVER_MODE", "False").lower() == "true"
+
 # Supported languages
 LANGUAGES = {
     "English": "en",
@@ -43,6 +71,22 @@ LANGUAGES = {
     "Korean": "ko"
 }
 
+# ISO 639-2 codes for language tags in MP4 tracks
+ISO639_2_CODES = {
+    "en": "eng",
+    "es": "spa",
+    "fr": "fra",
+    "de": "deu",
+    "ja": "jpn",
+    "hi": "hin",
+    "zh-CN": "zho",
+    "ru": "rus",
+    "it": "ita",
+    "pt": "por",
+    "ar": "ara",
+    "ko": "kor"
+}
+
 # TTS voice mapping for different languages
 TTS_VOICES = {
     "en": "en-US",
@@ -67,8 +111,80 @@ FFMPEG_AUDIO_PARAMS = {
     "channels": 2
 }
 
+# Background separation: keep original music/effects under the dub
+SEPARATE_BACKGROUND = os.getenv("SEPARATE_BACKGROUND", "False").lower() == "true"
+SEPARATION_VOICE_GAIN = float(os.getenv("SEPARATION_VOICE_GAIN", "0.0"))  # 0 removes the original voice, 1 keeps it
+SEPARATION_VOICE_BAND = (120, 5000)  # in Hz, range the voice mask is applied to
+SEPARATION_FFT_SIZE = 2048
+SEPARATION_CHUNK_SECONDS = 10  # audio processed per task; bounds memory per worker
+SEPARATION_WORKERS = int(os.getenv("SEPARATION_WORKERS", "0")) or os.cpu_count() or 1
+
+# Loudness: speech is normalized to an EBU R128 target and the mix is true-peak limited
+LOUDNESS_TARGET = float(os.getenv("LOUDNESS_TARGET", "-16"))  # in LUFS; -16 for web, -23 for broadcast
+TRUE_PEAK = float(os.getenv("TRUE_PEAK", "-1.5"))  # in dBTP, ceiling of the final limiter
+MAX_CLIP_GAIN_DB = 20  # bound on the per-clip normalization gain
+DUCK_BACKGROUND = os.getenv("DUCK_BACKGROUND", "True").lower() == "true"  # lower the background under speech
+
+# Artifact lifecycle: job files are evicted after a TTL, or oldest first to stay within disk limits
+ARTIFACT_TTL_HOURS = float(os.getenv("ARTIFACT_TTL_HOURS", "24"))
+DISK_QUOTA_GB = float(os.getenv("DISK_QUOTA_GB", "0"))  # cap on OUTPUT_DIR usage, 0 disables it
+MIN_FREE_DISK_GB = float(os.getenv("MIN_FREE_DISK_GB", "1"))  # free space to keep on the output disk
+EVICTION_INTERVAL = 300  # in seconds, between background eviction passes
+
+# Distributed workers: stage tasks are shared through a queue and an artifact store
+TASK_QUEUE = os.getenv("TASK_QUEUE")  # shared directory or "memory://"; unset runs jobs in-process
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE")  # shared directory, "s3://bucket/prefix" or "memory://"
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # for S3-compatible stores such as MinIO
+NODE_NAME = os.getenv("NODE_NAME") or platform.node() or "local"
+LOCALITY_WAIT = 5  # in seconds a task waits for the node holding its inputs before any node may take it
+TASK_HEARTBEAT = 30  # in seconds between liveness updates of a running task
+TASK_TIMEOUT = 120  # in seconds without a heartbeat before a task is requeued
+TASK_CLAIM_TIMEOUT = 300  # in seconds a task may wait unclaimed (no worker running) before its job fails
+DISTRIBUTED_JOB_TIMEOUT = 3600  # in seconds before a distributed job is abandoned
+
+# Segmentation: sentence units for translation/TTS, display-sized cues for subtitles
+SENTENCE_SEGMENTATION = os.getenv("SENTENCE_SEGMENTATION", "True").lower() == "true"
+SEGMENT_PAUSE_MS = 600  # silence between words that ends a sentence unit
+SEGMENT_MAX_SECONDS = 15  # longest sentence unit sent to translation/TTS
+SUBTITLE_MAX_CHARS = 84  # two lines of 42 characters
+SUBTITLE_MAX_SECONDS = 7
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = 12  # speech is this much louder than the noise floor
+
 # Application settings
 MAX_VIDEO_DURATION = 600  # in seconds (10 minutes)
 MAX_UPLOAD_SIZE = 500 * 1024 * 1024  # 500 MB
 SUBTITLE_FONT_SIZE = 24
+SUBTITLE_MODE = os.getenv("SUBTITLE_MODE", "burn").lower()  # "burn" into the video or "soft" subtitle track
+# Output MP4 layout: "+faststart" moves the index to the front so playback starts while downloading;
+# "frag_keyframe+empty_moov+default_base_moof" writes a fragmented MP4 instead
+MP4_MOVFLAGS = os.getenv("MP4_MOVFLAGS", "+faststart")
 MAX_RETRY_ATTEMPTS = 3
+
+# Admission control: jobs are costed from measured stage throughput, then queued or rejected under load
+MAX_JOB_COST = float(os.getenv("MAX_JOB_COST", "0"))  # in estimated processing seconds per job, 0 disables it
+MAX_ACTIVE_COST = float(os.getenv("MAX_ACTIVE_COST", "3600"))  # estimated processing seconds of jobs running at once
+MAX_LOAD_PER_CPU = float(os.getenv("MAX_LOAD_PER_CPU", "1.5"))  # host load average per CPU that holds new jobs, 0 disables it
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "8"))  # jobs waiting for capacity before new ones are rejected
+ADMISSION_TIMEOUT = 600  # in seconds a queued job waits before it is rejected
+
+# Provider rate limiting (requests per second, adapted at runtime with AIMD)
+PROVIDER_RATE_LIMITS = {
+    "translate": float(os.getenv("TRANSLATE_RATE_LIMIT", "5")),
+    "tts": float(os.getenv("TTS_RATE_LIMIT", "3"))
+}
+PROVIDER_MIN_RATE = 0.2  # floor the adaptive rate never drops below
+PROVIDER_RATE_INCREASE = 0.1  # additive increase per successful request
+PROVIDER_RATE_DECREASE = 0.5  # multiplicative decrease on 429/5xx
+RETRY_BACKOFF_BASE = 1.0  # in seconds
+RETRY_BACKOFF_MAX = 30.0  # in seconds
+
+# Circuit breaker for external providers
+CIRCUIT_BREAKER_THRESHOLD = 5  # consecutive failures before opening
+CIRCUIT_BREAKER_COOLDOWN = 30  # in seconds before a half-open probe
+
+# Tracing and metrics
+TRACE_FILE = os.getenv("TRACE_FILE")  # JSON lines span log, defaults to logs/traces.jsonl
+METRICS_FILE = os.getenv("METRICS_FILE")  # Prometheus text file, defaults to logs/metrics.prom
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the HTTP endpoint
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "False").lower() == "true"
@@ -0,0 +1,236 @@
+"""
+Admission control for dubbing jobs.
+
+An upload is probed before it is copied (file size and container duration
+only), then the job is costed as processing seconds from the per-stage
+throughput recorded in the tracing metrics (falling back to defaults until
+each stage has been measured). Jobs run while the estimated cost of running
+jobs stays within MAX_ACTIVE_COST and the host is not overloaded; otherwise
+they wait in a bounded FIFO queue, and are rejected when the queue is full or
+they wait longer than ADMISSION_TIMEOUT.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from src.utils.tracing import span, stage_metrics, incr_counter
+from src.audio.extractor import get_video_duration
+from config import (
+    MAX_UPLOAD_SIZE, MAX_VIDEO_DURATION, SEPARATE_BACKGROUND, SUBTITLE_MODE,
+    MAX_JOB_COST, MAX_ACTIVE_COST, MAX_LOAD_PER_CPU, ADMISSION_QUEUE_SIZE, ADMISSION_TIMEOUT
+)
+
+logger = get_logger(__name__)
+
+_MB = 1024 ** 2
+# Seconds between re-checks of the host load while a job waits
+_RECHECK_INTERVAL = 2
+
+# Wall seconds per second of media, used until a stage has been measured.
+# Stages after transcription run once per target language.
+DEFAULT_STAGE_RATES = {
+    "stage.extract": 0.05,
+    "stage.separate": 0.5,
+    "stage.transcribe": 0.3,
+    "stage.translate": 0.02,
+    "stage.synthesize": 0.3,
+    "stage.combine": 1.0 if SUBTITLE_MODE == "burn" else 0.1
+}
+_JOB_STAGES = ("stage.extract", "stage.separate", "stage.transcribe")
+_LANGUAGE_STAGES = ("stage.translate", "stage.synthesize", "stage.combine")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job is refused by admission control."""
+
+
+def probe_upload(video_file):
+    """
+    Check an upload against the size and duration limits without copying or decoding it.
+
+    Args:
+        video_file (str): Path to the uploaded video file
+
+    Returns:
+        tuple: (size in bytes, duration in seconds)
+
+    Raises:
+        AdmissionRejected: If the upload is too large or too long
+    """
+    path = Path(video_file)
+    video_bytes = path.stat().st_size
+    if MAX_UPLOAD_SIZE and video_bytes > MAX_UPLOAD_SIZE:
+        raise AdmissionRejected(
+            f"Video is too large ({video_bytes / _MB:.0f} MB). Maximum allowed size is {MAX_UPLOAD_SIZE / _MB:.0f} MB."
+        )
+    with span("stage.probe", bytes_in=video_bytes) as s:
+        duration = get_video_duration(path)
+        s.set("duration_s", duration)
+    if duration > MAX_VIDEO_DURATION:
+        raise AdmissionRejected(
+            f"Video is too long ({duration:.1f} seconds). Maximum allowed duration is {MAX_VIDEO_DURATION} seconds."
+        )
+    return video_bytes, duration
+
+
+def stage_rates():
+    """
+    Get the processing rate of each stage, measured where possible.
+
+    Returns:
+        dict: Mapping of stage span name to wall seconds per second of media
+    """
+    rates = dict(DEFAULT_STAGE_RATES)
+    for name, values in stage_metrics().items():
+        if name in rates and values["media_seconds"] > 0:
+            rates[name] = values["wall_seconds"] / values["media_seconds"]
+    return rates
+
+
+def estimate_cost(duration, languages):
+    """
+    Estimate the processing time of a job.
+
+    Args:
+        duration (float): Video duration in seconds
+        languages (int): Number of target languages
+
+    Returns:
+        float: Estimated processing seconds
+    """
+    rates = stage_rates()
+    job_stages = [name for name in _JOB_STAGES if SEPARATE_BACKGROUND or name != "stage.separate"]
+    per_job = sum(rates[name] for name in job_stages)
+    per_language = sum(rates[name] for name in _LANGUAGE_STAGES)
+    return duration * (per_job + languages * per_language)
+
+
+def _host_load():
+    """Load average per CPU, or 0 where the platform does not report it."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class AdmissionController:
+    """
+    Admits jobs in arrival order while their estimated cost fits the capacity.
+
+    The oldest waiting job is always admitted once nothing else is running,
+    so a single job larger than the capacity still makes progress.
+    """
+
+    def __init__(self, max_active_cost=MAX_ACTIVE_COST, max_queued=ADMISSION_QUEUE_SIZE,
+                 max_load=MAX_LOAD_PER_CPU, timeout=ADMISSION_TIMEOUT):
+        self.max_active_cost = max_active_cost
+        self.max_queued = max_queued
+        self.max_load = max_load
+        self.timeout = timeout
+        self._active = {}  # ticket -> estimated cost
+        self._waiting = deque()
+        self._cond = threading.Condition()
+
+    def _fits(self, cost):
+        if not self._active:
+            return True
+        if self.max_active_cost and sum(self._active.values()) + cost > self.max_active_cost:
+            return False
+        return not (self.max_load and _host_load() > self.max_load)
+
+    def acquire(self, cost, on_wait=None):
+        """
+        Take capacity for a job, waiting in the queue if needed.
+
+        Args:
+            cost (float): Estimated processing seconds of the job
+            on_wait (callable, optional): Called with the number of jobs ahead
+                while the job waits
+
+        Returns:
+            object: Ticket to pass to release()
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait times out
+        """
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            if self._waiting or not self._fits(cost):
+                if len(self._waiting) >= self.max_queued:
+                    incr_counter("jobs_rejected")
+                    raise AdmissionRejected("The server is busy. Please try again in a few minutes.")
+                incr_counter("jobs_queued")
+                logger.info(f"Queued job costing {cost:.0f}s ({sum(self._active.values()):.0f}s running)")
+
+            self._waiting.append(ticket)
+            try:
+                while self._waiting[0] is not ticket or not self._fits(cost):
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        incr_counter("jobs_rejected")
+                        raise AdmissionRejected("The server is busy. Please try again in a few minutes.")
+                    if on_wait is not None:
+                        on_wait(self._waiting.index(ticket))
+                    # Woken when a job finishes; the timeout re-checks the host load
+                    self._cond.wait(min(remaining, _RECHECK_INTERVAL))
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            self._active[ticket] = cost
+        incr_counter("jobs_admitted")
+        return ticket
+
+    def release(self, ticket):
+        """Return a finished job's capacity and wake the queue."""
+        with self._cond:
+            self._active.pop(ticket, None)
+            self._cond.notify_all()
+
+
+_controller = AdmissionController()
+
+
+@contextmanager
+def admission(video_file, languages, progress=None, probe=None):
+    """
+    Probe, cost and admit a job, holding its capacity until the block exits.
+
+    Args:
+        video_file (str): Path to the uploaded video file
+        languages (int): Number of target languages
+        progress (callable, optional): Called as progress(fraction, description)
+            while the job waits
+        probe (tuple, optional): (size in bytes, duration in seconds) already
+            returned by probe_upload, so the upload is not probed again
+
+    Yields:
+        tuple: (video size in bytes, duration in seconds)
+
+    Raises:
+        AdmissionRejected: If the job exceeds a limit or the server is too busy
+    """
+    video_bytes, duration = probe or probe_upload(video_file)
+    cost = estimate_cost(duration, languages)
+    if MAX_JOB_COST and cost > MAX_JOB_COST:
+        incr_counter("jobs_rejected")
+        raise AdmissionRejected(
+            f"This job is too large (about {cost / 60:.0f} minutes of processing). "
+            f"Try a shorter video or fewer languages."
+        )
+
+    def on_wait(ahead):
+        if progress is not None:
+            progress(0.0, f"Waiting for capacity ({ahead} jobs ahead)...")
+
+    with span("stage.admission", cost_s=round(cost, 1)):
+        ticket = _controller.acquire(cost, on_wait)
+    logger.info(f"Admitted job: {duration:.1f}s video, {languages} languages, estimated {cost:.0f}s")
+    try:
+        yield video_bytes, duration
+    finally:
+        _controller.release(ticket)
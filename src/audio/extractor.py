@@ -2,20 +2,23 @@
 Audio extraction utilities for the video translator application.
 """
 import os
-import subprocess
 from pathlib import Path
 
 from src.utils.logger import get_logger
-from config import OUTPUT_DIR, FFMPEG_AUDIO_PARAMS
+from src.utils.tracing import run_traced
+from src.audio.wavio import create_wav
+from src.lifecycle import unique_output_path
+from config import FFMPEG_AUDIO_PARAMS
 
 logger = get_logger(__name__)
 
-def extract_audio(video_path):
+def extract_audio(video_path, output_path=None):
     """
     Extract audio from video file using ffmpeg.
     
     Args:
         video_path (str): Path to the input video file
+        output_path (str, optional): Path for the extracted audio file
         
     Returns:
         Path: Path to the extracted audio file
@@ -27,9 +30,12 @@ def extract_audio(video_path):
         video_path = Path(video_path)
         logger.info(f"Extracting audio from video: {video_path}")
         
-        # Create output filename based on input filename
-        video_name = video_path.stem
-        audio_path = OUTPUT_DIR / f"{video_name}_audio.{FFMPEG_AUDIO_PARAMS['format']}"
+        # Create a unique output filename based on input filename
+        if output_path is None:
+            video_name = video_path.stem
+            audio_path = unique_output_path(f"{video_name}_audio_", f".{FFMPEG_AUDIO_PARAMS['format']}")
+        else:
+            audio_path = Path(output_path)
         
         # Use ffmpeg to extract audio
         cmd = [
@@ -44,7 +50,7 @@ def extract_audio(video_path):
         ]
         
         logger.debug(f"Running command: {' '.join(cmd)}")
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        process = run_traced("ffmpeg.extract_audio", cmd, inputs=[video_path], outputs=[audio_path])
         
         if process.returncode != 0:
             error_message = f"Audio extraction failed: {process.stderr}"
@@ -82,7 +88,7 @@ def get_video_duration(video_path):
             str(video_path)
         ]
         
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        process = run_traced("ffprobe.duration", cmd)
         
         if process.returncode != 0 or not process.stdout.strip():
             error_message = f"Failed to get video duration: {process.stderr}"
@@ -112,12 +118,19 @@ def create_silent_audio(duration, output_path=None):
     """
     try:
         if output_path is None:
-            output_path = OUTPUT_DIR / f"silent_{int(duration)}s.wav"
+            output_path = unique_output_path(f"silent_{int(duration)}s_", ".wav")
         else:
             output_path = Path(output_path)
             
         logger.info(f"Creating silent audio track of {duration} seconds")
         
+        # WAV silence is just a header plus a sparse zero-filled data region
+        if output_path.suffix.lower() == ".wav":
+            sample_rate = FFMPEG_AUDIO_PARAMS["sample_rate"]
+            create_wav(output_path, int(round(duration * sample_rate)), sample_rate, FFMPEG_AUDIO_PARAMS["channels"])
+            logger.info(f"Silent audio created: {output_path}")
+            return output_path
+        
         cmd = [
             'ffmpeg',
             '-f', 'lavfi',
@@ -129,7 +142,7 @@ def create_silent_audio(duration, output_path=None):
         ]
         
         logger.debug(f"Running command: {' '.join(cmd)}")
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        process = run_traced("ffmpeg.silent_audio", cmd, outputs=[output_path], duration=duration)
         
         if process.returncode != 0:
             error_message = f"Silent audio creation failed: {process.stderr}"
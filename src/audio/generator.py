@@ -2,30 +2,170 @@
 Text-to-speech audio generation for translated subtitles.
 """
 import os
-import time
+import hashlib
 import shutil
 import tempfile
+import threading
 from pathlib import Path
 from tqdm import tqdm
-import subprocess
 
-from gtts import gTTS
-import pysrt
-
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, log_sampled
+from src.subtitles.cues import load_cues
+from src.utils.ratelimit import get_provider, ProviderUnavailable
+from src.utils.tracing import run_traced, record
 from src.audio.extractor import create_silent_audio
-from config import OUTPUT_DIR, TTS_VOICES, MAX_RETRY_ATTEMPTS
+from src.audio.loudness import clip_gain, duck_filter, limiter_filter
+from src.lifecycle import unique_output_path
+from config import TEMP_DIR, SERVER_MODE, FFMPEG_AUDIO_PARAMS, DUCK_BACKGROUND
 
 logger = get_logger(__name__)
 
-def generate_translated_audio(srt_path, target_lang, video_duration=180):
+# Texts longer than this are retried shortened when they cannot be synthesized
+_FALLBACK_CHARS = 100
+
+def _synthesize(text, lang, slow, audio_file):
+    """
+    Run a single gTTS request and verify the result.
+    
+    Args:
+        text (str): Text to speak
+        lang (str): gTTS language code
+        slow (bool): Whether to use the slower speaking rate
+        audio_file (Path): Destination MP3 path
+        
+    Raises:
+        Exception: If the generated audio file is empty
+    """
+    # Imported lazily so the SDK only loads when synthesis actually runs
+    from gtts import gTTS
+    
+    tts = gTTS(text=text, lang=lang, slow=slow)
+    tts.save(str(audio_file))
+    if not audio_file.exists() or audio_file.stat().st_size == 0:
+        raise Exception("Generated audio file is empty")
+
+def clip_path(clip_dir, text, target_lang):
+    """
+    Get the cache path of the TTS clip for a text.
+    
+    Clips are keyed by language and text, so unchanged cues are reused across
+    renders of the same job.
+    
+    Args:
+        clip_dir (Path): Clip cache directory
+        text (str): Cue text
+        target_lang (str): Target language code
+        
+    Returns:
+        Path: Path of the MP3 clip
+    """
+    digest = hashlib.sha1(f"{target_lang}\0{text.strip()}".encode("utf-8")).hexdigest()[:20]
+    return Path(clip_dir) / f"{target_lang}_{digest}.mp3"
+
+def _shortened(text):
+    """Shortened text tried when a long text cannot be synthesized, or None for short texts."""
+    text = text.strip()
+    return text[:_FALLBACK_CHARS] + "..." if len(text) > _FALLBACK_CHARS else None
+
+def find_clip(clip_dir, text, target_lang):
+    """
+    Find the cached clip of a text.
+    
+    Args:
+        clip_dir (Path): Clip cache directory
+        text (str): Cue text
+        target_lang (str): Target language code
+        
+    Returns:
+        Path: The full-text clip, else the shortened fallback clip, or None if neither exists
+    """
+    for candidate in (text, _shortened(text)):
+        if candidate is None:
+            continue
+        path = clip_path(clip_dir, candidate, target_lang)
+        if path.exists() and path.stat().st_size > 0:
+            return path
+    return None
+
+def _save_clip(guard, text, target_lang, slow, audio_file, **kwargs):
+    """
+    Synthesize a clip through the provider guard and move it into place once complete.
+    
+    Saving under a temporary name means an interrupted or failed save never
+    leaves a truncated clip in the cache.
+    
+    Raises:
+        Exception: If synthesis fails
+    """
+    tmp_file = audio_file.with_name(f".{audio_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp.mp3")
+    try:
+        guard.call(_synthesize, text, target_lang, slow, tmp_file, **kwargs)
+        os.replace(tmp_file, audio_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+def synthesize_cue(text, target_lang, audio_file):
+    """
+    Synthesize one cue through the shared TTS provider guard.
+    
+    If the full text keeps failing, a shortened version is voiced instead. That
+    clip is stored under the shortened text's own name next to ``audio_file``,
+    so the full text is tried again on the next render rather than replaced by
+    the truncated dub for good.
+    
+    Args:
+        text (str): Cue text
+        target_lang (str): Target language code
+        audio_file (Path): Destination MP3 path for the full text
+        
+    Returns:
+        Path: Path of the clip that was written, or None if the cue stays silent
+    """
+    guard = get_provider("tts")
+    audio_file = Path(audio_file)
+    
+    # For certain languages, use slower speed which might improve reliability
+    slow_option = target_lang in ["hi", "ja", "zh-CN", "ar"]
+    try:
+        _save_clip(guard, text, target_lang, slow_option, audio_file)
+        return audio_file
+    except ProviderUnavailable:
+        # Circuit is open: leave this cue silent without waiting
+        return None
+    except Exception as e:
+        log_sampled(logger, f"tts_failed_{target_lang}", f"TTS failed for {target_lang}: {str(e)}")
+    
+    # If still failing after retries, try with shorter text
+    shortened_text = _shortened(text)
+    if shortened_text is None:
+        return None
+    logger.debug(f"Trying with shortened text for {target_lang}")
+    fallback_file = clip_path(audio_file.parent, shortened_text, target_lang)
+    if fallback_file.exists() and fallback_file.stat().st_size > 0:
+        return fallback_file
+    try:
+        _save_clip(guard, shortened_text, target_lang, True, fallback_file, attempts=1)
+        return fallback_file
+    except Exception as e:
+        log_sampled(logger, f"tts_failed_{target_lang}", f"Shortened TTS failed for {target_lang}: {str(e)}")
+        return None
+
+def generate_translated_audio(subtitles, target_lang, video_duration=180, progress_callback=None,
+                              background_path=None, output_path=None, clip_dir=None):
     """
     Generate translated audio using text-to-speech for each subtitle.
     
     Args:
-        srt_path (str): Path to the SRT subtitle file
+        subtitles (str or CueTrack): Path to the SRT subtitle file, or in-memory cues
         target_lang (str): Target language code (e.g., 'en', 'es')
         video_duration (float): Duration of the original video in seconds
+        progress_callback (callable, optional): Called as progress_callback(done, total)
+            after each subtitle; replaces the console progress bar when given
+        background_path (str, optional): Background (music and effects) track to mix
+            the speech over instead of silence
+        output_path (str, optional): Path for the translated audio file
+        clip_dir (str, optional): Directory to keep TTS clips in; existing clips
+            for the same text are reused instead of synthesized again
         
     Returns:
         Path: Path to the translated audio file
@@ -33,110 +173,113 @@ def generate_translated_audio(srt_path, target_lang, video_duration=180):
     Raises:
         Exception: If audio generation fails
     """
+    temp_dir = None
     try:
-        srt_path = Path(srt_path)
-        logger.info(f"Generating translated audio for {target_lang} from {srt_path}")
+        logger.info(f"Generating translated audio for {target_lang}")
         
         # Load subtitles
-        subs = pysrt.open(srt_path, encoding="utf-8")
-        logger.info(f"Loaded {len(subs)} subtitles from SRT file")
+        cues = load_cues(subtitles, target_lang)
+        logger.info(f"Loaded {len(cues)} subtitles")
+        record("cues", len(cues))
         
         # Create temporary directory for audio chunks
-        temp_dir = Path(tempfile.mkdtemp(prefix=f"audio_{target_lang}_", dir=OUTPUT_DIR / "temp"))
+        temp_dir = Path(tempfile.mkdtemp(prefix=f"audio_{target_lang}_", dir=TEMP_DIR))
         logger.debug(f"Created temporary directory: {temp_dir}")
         
+        if output_path is None:
+            output_path = unique_output_path(f"translated_audio_{target_lang}_", ".wav")
+        output_path = Path(output_path)
+        if clip_dir is not None:
+            Path(clip_dir).mkdir(parents=True, exist_ok=True)
+        
         # Generate TTS for each subtitle
         audio_files = []
-        timings = []
+        kept = []  # indices of cues that produced audio
+        guard = get_provider("tts")
         
-        logger.info(f"Generating speech for {len(subs)} subtitles in {target_lang}")
-        for i, sub in enumerate(tqdm(subs, desc=f"Generating {target_lang} speech")):
-            text = sub.text.strip()
+        logger.info(f"Generating speech for {len(cues)} subtitles in {target_lang}")
+        show_bar = progress_callback is None and not SERVER_MODE
+        for i, text in enumerate(tqdm(cues.texts, desc=f"Generating {target_lang} speech", disable=not show_bar)):
+            if progress_callback is not None:
+                progress_callback(i + 1, len(cues))
+            text = text.strip()
             if not text:
                 continue
-                
-            # Get timing information
-            start_time = (sub.start.hours * 3600 + 
-                         sub.start.minutes * 60 + 
-                         sub.start.seconds + 
-                         sub.start.milliseconds / 1000)
-            
-            end_time = (sub.end.hours * 3600 + 
-                       sub.end.minutes * 60 + 
-                       sub.end.seconds + 
-                       sub.end.milliseconds / 1000)
-            
-            duration = end_time - start_time
             
             # Generate TTS audio
-            tts_lang = TTS_VOICES.get(target_lang, target_lang)
-            audio_file = temp_dir / f"chunk_{i:04d}.mp3"
-            
-            # Add a retry mechanism
-            retry_count = 0
-            while retry_count < MAX_RETRY_ATTEMPTS:
-                try:
-                    # For certain languages, use slower speed which might improve reliability
-                    slow_option = target_lang in ["hi", "ja", "zh-CN", "ar"] 
-                    tts = gTTS(text=text, lang=target_lang, slow=slow_option)
-                    tts.save(str(audio_file))
-                    
-                    if audio_file.exists() and audio_file.stat().st_size > 0:
-                        break
-                    else:
-                        raise Exception("Generated audio file is empty")
-                        
-                except Exception as e:
-                    retry_count += 1
-                    logger.warning(f"TTS attempt {retry_count} failed for {target_lang}: {str(e)}")
-                    time.sleep(1)  # Wait before retrying
-                    
-                    # If still failing after retries, try with shorter text
-                    if retry_count == MAX_RETRY_ATTEMPTS - 1 and len(text) > 100:
-                        logger.warning(f"Trying with shortened text for {target_lang}")
-                        shortened_text = text[:100] + "..."
-                        tts = gTTS(text=shortened_text, lang=target_lang, slow=True)
-                        tts.save(str(audio_file))
+            if clip_dir is not None:
+                audio_file = clip_path(clip_dir, text, target_lang)
+                if audio_file.exists() and audio_file.stat().st_size > 0:
+                    record("cache_hits")
+                    audio_files.append(audio_file)
+                    kept.append(i)
+                    continue
+            else:
+                audio_file = temp_dir / f"chunk_{i:04d}.mp3"
             
-            if audio_file.exists() and audio_file.stat().st_size > 0:
-                audio_files.append(audio_file)
-                timings.append((start_time, end_time, duration, audio_file))
+            saved_file = synthesize_cue(text, target_lang, audio_file)
+            if saved_file is not None:
+                audio_files.append(saved_file)
+                kept.append(i)
             else:
-                logger.warning(f"Failed to generate audio for subtitle {i}")
+                log_sampled(logger, f"tts_missing_{target_lang}", f"Failed to generate audio for subtitle {i} in {target_lang}")
+        
+        if guard.degraded:
+            logger.warning(f"TTS provider degraded; some {target_lang} cues were left silent")
+        
+        record("clips", len(audio_files))
         
         # Check if we generated any audio files
         if not audio_files:
             logger.warning(f"No audio files were generated for {target_lang}")
-            # Create a silent audio file as fallback
-            silent_audio = OUTPUT_DIR / f"translated_audio_{target_lang}.wav"
-            create_silent_audio(video_duration, silent_audio)
-            return silent_audio
+            # Fall back to the background track, or silence
+            fallback_audio = output_path
+            if background_path:
+                shutil.copyfile(background_path, fallback_audio)
+            else:
+                create_silent_audio(video_duration, fallback_audio)
+            return fallback_audio
         
-        # Create a silent audio track as base
-        silence_file = temp_dir / "silence.wav"
-        create_silent_audio(video_duration, silence_file)
+        # Use the background track as base, or a silent track
+        if background_path:
+            silence_file = Path(background_path)
+        else:
+            silence_file = temp_dir / "silence.wav"
+            create_silent_audio(video_duration, silence_file)
         
-        # Create filter complex for audio mixing
-        filter_complex = []
-        input_count = 1  # Starting with 1 because 0 is the silence track
+        # Create filter complex for audio mixing; delays come straight from the cue start array
+        delays_ms = cues.starts[kept].tolist()
+        # Per-clip normalization gains, measured once per clip and cached next to it
+        gains_db = [clip_gain(audio_file) for audio_file in audio_files]
+        filter_parts = []
+        speech_inputs = []
         
-        # Start with silent track
-        filter_parts = ["[0:a]"]
+        # Level and delay each audio segment to its cue start
+        for input_index, (delay_ms, gain_db) in enumerate(zip(delays_ms, gains_db), 1):
+            filter_parts.append(f"[{input_index}:a]volume={gain_db:.2f}dB,adelay={delay_ms}|{delay_ms}[d{input_index}]")
+            speech_inputs.append(f"[d{input_index}]")
+        filter_parts.append(f"{''.join(speech_inputs)}amix=inputs={len(speech_inputs)}:dropout_transition=0:normalize=0[speech]")
         
-        # Add each audio segment
-        for start_time, end_time, duration, audio_file in timings:
-            delay_ms = int(start_time * 1000)
-            filter_parts.append(f"[{input_count}:a]adelay={delay_ms}|{delay_ms}")
-            input_count += 1
+        # Duck the background (0 is the background or silence track) under the speech
+        if background_path and DUCK_BACKGROUND:
+            filter_parts.append("[speech]asplit=2[voice][key]")
+            # The padded key keeps the background running after the last clip
+            filter_parts.append(f"[key]apad[keyp];[0:a][keyp]{duck_filter()}[bed]")
+            mix_inputs = "[bed][voice]"
+        else:
+            mix_inputs = "[0:a][speech]"
         
-        # Mix all audio tracks
-        filter_parts.append(f"amix=inputs={input_count}:dropout_transition=0:normalize=0[aout]")
+        # Mix and limit in the same pass; the base track sets the length
+        filter_parts.append(
+            f"{mix_inputs}amix=inputs=2:duration=first:dropout_transition=0:normalize=0,"
+            f"{limiter_filter(FFMPEG_AUDIO_PARAMS['sample_rate'])}[aout]"
+        )
         filter_complex = ";".join(filter_parts)
         
         # Build the ffmpeg command
         cmd = ['ffmpeg', '-y']
         
-        # Add silent base track
+        # Add base track
         cmd.extend(['-i', str(silence_file)])
         
         # Add all audio chunks
@@ -144,34 +287,26 @@ def generate_translated_audio(srt_path, target_lang, video_duration=180):
             cmd.extend(['-i', str(audio_file)])
         
         # Add filter complex and output
-        output_audio = OUTPUT_DIR / f"translated_audio_{target_lang}.mp3"
-
-        output_audio = OUTPUT_DIR / f"translated_audio_{target_lang}.wav"
+        output_audio = output_path
         cmd.extend([
             '-filter_complex', filter_complex,
             '-map', '[aout]',
-            output_audio
+            str(output_audio)
         ])
         
         # Run the command
         logger.info(f"Combining {len(audio_files)} audio segments")
         logger.debug(f"Running command: {' '.join(cmd)}")
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        process = run_traced("ffmpeg.mix_audio", cmd, inputs=[silence_file, *audio_files],
+                             outputs=[output_audio], lang=target_lang, clips=len(audio_files))
         
         if process.returncode != 0:
             logger.error(f"Audio combination failed: {process.stderr}")
             # Create a fallback silent audio
-            silent_audio = OUTPUT_DIR / f"translated_audio_{target_lang}.wav"
+            silent_audio = output_path
             create_silent_audio(video_duration, silent_audio)
             output_audio = silent_audio
         
-        # Clean up temporary files
-        try:
-            shutil.rmtree(temp_dir)
-            logger.debug(f"Cleaned up temporary directory: {temp_dir}")
-        except Exception as e:
-            logger.warning(f"Failed to clean up temp directory: {str(e)}")
-        
         logger.info(f"Successfully created translated audio: {output_audio}")
         return output_audio
     except Exception as e:
@@ -179,8 +314,16 @@ def generate_translated_audio(srt_path, target_lang, video_duration=180):
         
         # Create an emergency fallback silent audio
         try:
-            silent_audio = OUTPUT_DIR / f"translated_audio_{target_lang}.wav"
+            silent_audio = Path(output_path) if output_path else unique_output_path(f"translated_audio_{target_lang}_", ".wav")
             create_silent_audio(video_duration, silent_audio)
             return silent_audio
         except:
             raise Exception(f"Audio translation failed: {str(e)}")
+    finally:
+        # Clean up temporary files, whether or not mixing succeeded
+        if temp_dir is not None:
+            try:
+                shutil.rmtree(temp_dir)
+                logger.debug(f"Cleaned up temporary directory: {temp_dir}")
+            except Exception as e:
+                logger.warning(f"Failed to clean up temp directory: {str(e)}")
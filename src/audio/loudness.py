@@ -0,0 +1,127 @@
+"""
+Loudness control for the dub mix.
+
+Every TTS clip is measured once (EBU R128 integrated loudness) and the result
+is cached in a sidecar file next to the clip, so each clip is brought to
+LOUDNESS_TARGET with a plain gain and all languages end up at the same
+dialogue level. The mix applies those gains, optionally ducks the background
+under speech with a sidechain compressor and ends in an oversampled (true
+peak) limiter, all inside the single ffmpeg mix pass.
+"""
+import json
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from src.utils.tracing import run_traced, record
+from config import LOUDNESS_TARGET, TRUE_PEAK, MAX_CLIP_GAIN_DB
+
+logger = get_logger(__name__)
+
+# Sidechain ducking: speech above the threshold compresses the background
+DUCK_THRESHOLD_DB = -30
+DUCK_RATIO = 4
+DUCK_ATTACK_MS = 20
+DUCK_RELEASE_MS = 300
+# The limiter runs at this multiple of the sample rate so it catches inter-sample (true) peaks
+LIMITER_OVERSAMPLING = 4
+# Integrated loudness needs at least one 400 ms gating block; shorter clips are looped to measure
+_SHORT_CLIP_LOOPS = 4
+
+def db_to_gain(db):
+    """Convert decibels to a linear gain factor."""
+    return 10 ** (db / 20)
+
+def _measure(audio_path, loops=0):
+    """Integrated loudness of a file in LUFS, or None if it cannot be measured."""
+    cmd = ['ffmpeg', '-hide_banner', '-nostats']
+    if loops:
+        cmd.extend(['-stream_loop', str(loops)])
+    cmd.extend(['-i', str(audio_path), '-af', 'loudnorm=print_format=json', '-f', 'null', '-'])
+    process = run_traced("ffmpeg.measure_loudness", cmd, inputs=[audio_path])
+    if process.returncode != 0:
+        logger.warning(f"Loudness measurement failed for {audio_path}: {process.stderr[-500:]}")
+        return None
+    stderr = process.stderr
+    try:
+        stats = json.loads(stderr[stderr.rindex("{"):stderr.rindex("}") + 1])
+        loudness = float(stats["input_i"])
+    except (ValueError, KeyError):
+        return None
+    # Silence (or a clip shorter than a gating block) measures as -inf
+    return loudness if loudness > -70 else None
+
+def clip_loudness(clip_path):
+    """
+    Get the integrated loudness of a clip, measuring it only once.
+
+    The measurement is cached next to the clip (``<clip>.loudness``), so
+    reused clips and re-renders never decode the clip again for it.
+
+    Args:
+        clip_path (Path): TTS clip
+
+    Returns:
+        float: Integrated loudness in LUFS, or None if the clip is silent
+    """
+    clip_path = Path(clip_path)
+    sidecar = clip_path.with_suffix(".loudness")
+    if sidecar.exists():
+        record("loudness_cache_hits")
+        value = sidecar.read_text(encoding="utf-8").strip()
+        return float(value) if value else None
+
+    loudness = _measure(clip_path)
+    if loudness is None:
+        loudness = _measure(clip_path, loops=_SHORT_CLIP_LOOPS)
+    sidecar.write_text("" if loudness is None else f"{loudness:.2f}", encoding="utf-8")
+    return loudness
+
+def clip_gain(clip_path):
+    """
+    Get the gain that brings a clip to LOUDNESS_TARGET.
+
+    Args:
+        clip_path (Path): TTS clip
+
+    Returns:
+        float: Gain in dB, limited to +/- MAX_CLIP_GAIN_DB
+    """
+    loudness = clip_loudness(clip_path)
+    if loudness is None:
+        return 0.0
+    return max(-MAX_CLIP_GAIN_DB, min(MAX_CLIP_GAIN_DB, LOUDNESS_TARGET - loudness))
+
+def duck_filter():
+    """Sidechain compressor that ducks the background (first input) under speech (second input)."""
+    return (f"sidechaincompress=threshold={db_to_gain(DUCK_THRESHOLD_DB):.4f}:ratio={DUCK_RATIO}"
+            f":attack={DUCK_ATTACK_MS}:release={DUCK_RELEASE_MS}")
+
+def duck_reduction_db():
+    """
+    Steady-state background reduction under speech at LOUDNESS_TARGET.
+
+    Used where the mix is patched outside ffmpeg, to approximate the sidechain
+    compressor with a fixed gain.
+
+    Returns:
+        float: Reduction in dB (positive)
+    """
+    return max(0.0, LOUDNESS_TARGET - DUCK_THRESHOLD_DB) * (1 - 1 / DUCK_RATIO)
+
+def peak_ceiling():
+    """Linear sample ceiling of the final limiter."""
+    return db_to_gain(TRUE_PEAK)
+
+def limiter_filter(sample_rate):
+    """
+    Oversampled lookahead limiter holding the mix below TRUE_PEAK.
+
+    Args:
+        sample_rate (int): Output sample rate
+
+    Returns:
+        str: Filter chain
+    """
+    return (f"aresample={sample_rate * LIMITER_OVERSAMPLING},"
+            f"alimiter=limit={max(0.0625, peak_ceiling()):.4f}:level=false:latency=true,"
+            f"aresample={sample_rate}")
@@ -0,0 +1,158 @@
+"""
+Voice/background separation so dubs keep the original music and effects.
+
+Uses spectral masking: dialogue is assumed to sit in the centre of the stereo
+image, so energy in the voice band of the mid channel that is not matched by
+the side channel is treated as voice and removed (or ducked). Mono sources
+have no side channel, so the whole voice band is attenuated instead.
+
+The track is processed in fixed-size chunks, each with a little STFT context
+on both sides, across a process pool. Only the chunks in flight are held in
+memory, so a long track never needs its full spectrogram in RAM.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.logger import get_logger
+from src.utils.tracing import span
+from src.audio.wavio import open_wav, WavWriter, to_int16
+from src.lifecycle import unique_output_path
+from config import (
+    SEPARATION_VOICE_GAIN, SEPARATION_VOICE_BAND, SEPARATION_FFT_SIZE,
+    SEPARATION_CHUNK_SECONDS, SEPARATION_WORKERS
+)
+
+logger = get_logger(__name__)
+
+def _window(n_fft):
+    # sqrt of a periodic Hann window: analysis * synthesis sums to one at 50% overlap
+    return np.sqrt(np.hanning(n_fft + 1)[:-1]).astype(np.float32)
+
+def _stft(signal, n_fft, hop, window):
+    n_frames = 1 + (len(signal) - n_fft) // hop
+    frames = np.lib.stride_tricks.as_strided(
+        signal,
+        shape=(n_frames, n_fft),
+        strides=(signal.strides[0] * hop, signal.strides[0])
+    )
+    return np.fft.rfft(frames * window, axis=1)
+
+def _istft(spec, n_fft, hop, window, length):
+    frames = np.fft.irfft(spec, n=n_fft, axis=1).astype(np.float32) * window
+    output = np.zeros(length, dtype=np.float32)
+    for i, frame in enumerate(frames):
+        output[i * hop:i * hop + n_fft] += frame
+    return output
+
+def remove_voice(samples, sample_rate, voice_gain=SEPARATION_VOICE_GAIN,
+                 voice_band=SEPARATION_VOICE_BAND, n_fft=SEPARATION_FFT_SIZE):
+    """
+    Suppress centre-panned voice in a block of audio.
+
+    Args:
+        samples (np.ndarray): Float samples shaped (frames, channels)
+        sample_rate (int): Sample rate in Hz
+        voice_gain (float): Level the estimated voice is left at (0 removes it)
+        voice_band (tuple): (low, high) frequency range in Hz to mask
+        n_fft (int): FFT size
+
+    Returns:
+        np.ndarray: Background samples with the same shape
+    """
+    hop = n_fft // 2
+    window = _window(n_fft)
+    length = samples.shape[0]
+    # Pad to a whole number of hops so every sample is covered by two frames
+    padded_length = max(n_fft, int(np.ceil(length / hop)) * hop + n_fft)
+    padded = np.zeros((padded_length, samples.shape[1]), dtype=np.float32)
+    padded[hop:hop + length] = samples
+
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    band = ((freqs >= voice_band[0]) & (freqs <= voice_band[1])).astype(np.float32)
+
+    if samples.shape[1] >= 2:
+        left = _stft(np.ascontiguousarray(padded[:, 0]), n_fft, hop, window)
+        right = _stft(np.ascontiguousarray(padded[:, 1]), n_fft, hop, window)
+        mid = (left + right) / 2
+        side_mag = np.abs((left - right) / 2)
+    else:
+        mid = _stft(np.ascontiguousarray(padded[:, 0]), n_fft, hop, window)
+        side_mag = 0.0
+
+    mid_mag = np.abs(mid)
+    mask = np.clip((mid_mag - side_mag) / (mid_mag + 1e-9), 0.0, 1.0) * band
+    voice = _istft(mid * mask * (1.0 - voice_gain), n_fft, hop, window, padded_length)[hop:hop + length]
+
+    return samples - voice[:, None]
+
+def _separate_chunk(args):
+    """Process one chunk (plus context) in a worker process and return int16 bytes."""
+    path, start, count, context, sample_rate, voice_gain = args
+    with open_wav(path) as source:
+        block = source.read(start - context, count + 2 * context)
+    background = remove_voice(block, sample_rate, voice_gain)[context:context + count]
+    return to_int16(background).tobytes()
+
+def separate_background(audio_path, output_path=None, voice_gain=SEPARATION_VOICE_GAIN,
+                        workers=SEPARATION_WORKERS):
+    """
+    Produce a background (music and effects) track from extracted audio.
+
+    Args:
+        audio_path (str): Path to a 16-bit PCM WAV from extract_audio
+        output_path (str, optional): Path for the background WAV
+        voice_gain (float): Level the original voice is left at (0 removes it)
+        workers (int): Number of worker processes
+
+    Returns:
+        Path: Path to the background audio file
+
+    Raises:
+        Exception: If separation fails
+    """
+    try:
+        audio_path = Path(audio_path)
+        if output_path is None:
+            output_path = unique_output_path(f"{audio_path.stem}_background_", ".wav")
+        else:
+            output_path = Path(output_path)
+
+        with open_wav(audio_path) as source:
+            channels = source.channels
+            sample_rate = source.sample_rate
+            total_frames = source.frames
+
+        chunk_frames = int(SEPARATION_CHUNK_SECONDS * sample_rate)
+        context = SEPARATION_FFT_SIZE * 2
+        tasks = [
+            (str(audio_path), start, min(chunk_frames, total_frames - start), context, sample_rate, voice_gain)
+            for start in range(0, total_frames, chunk_frames)
+        ]
+        workers = max(1, min(workers, len(tasks)))
+        logger.info(f"Separating background from {audio_path} in {len(tasks)} chunks on {workers} workers")
+
+        with span("audio.separate", chunks=len(tasks), workers=workers, bytes_in=audio_path.stat().st_size) as s:
+            with WavWriter(output_path, sample_rate, channels) as out:
+                if workers == 1:
+                    for task in tasks:
+                        out.write(_separate_chunk(task))
+                else:
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        # Keep a bounded window of chunks in flight and write them in order
+                        pending = deque()
+                        for task in tasks:
+                            pending.append(pool.submit(_separate_chunk, task))
+                            if len(pending) >= workers * 2:
+                                out.write(pending.popleft().result())
+                        while pending:
+                            out.write(pending.popleft().result())
+            s.set("bytes_out", output_path.stat().st_size)
+
+        logger.info(f"Background track created: {output_path}")
+        return output_path
+    except Exception as e:
+        logger.error(f"Background separation failed: {str(e)}", exc_info=True)
+        raise Exception(f"Background separation failed: {str(e)}")
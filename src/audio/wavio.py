@@ -0,0 +1,246 @@
+"""
+Memory-mapped streaming I/O for PCM WAV files.
+
+Reading maps the data chunk with ``np.memmap`` and hands out zero-copy views,
+so processing memory is O(chunk) rather than O(track). Writing is incremental:
+samples are appended as they are produced and the RIFF sizes are patched on close.
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+_FORMAT_PCM = 1
+_FORMAT_EXTENSIBLE = 0xFFFE
+_HEADER_SIZE = 44
+_UNSET_SIZE = 0xFFFFFFFF
+
+
+class MappedWav:
+    """
+    A 16-bit PCM WAV file mapped into memory.
+
+    Attributes:
+        path (Path): File path
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+        frames (int): Number of sample frames
+        data (np.memmap): Samples shaped (frames, channels), int16
+    """
+
+    def __init__(self, path, mode="r"):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                raise ValueError(f"Not a RIFF/WAVE file: {self.path}")
+            file_size = self.path.stat().st_size
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"No data chunk in WAV file: {self.path}")
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size)
+                    if chunk_size % 2:
+                        f.read(1)
+                elif chunk_id == b"data":
+                    offset = f.tell()
+                    # Streamed writers (e.g. ffmpeg to a pipe) leave the size unset as 0 or
+                    # 0xFFFFFFFF, so the data then runs to the end of the file
+                    if chunk_size in (0, _UNSET_SIZE):
+                        chunk_size = file_size - offset
+                    data_size = min(chunk_size, file_size - offset)
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, 1)
+
+        if fmt is None:
+            raise ValueError(f"No fmt chunk in WAV file: {self.path}")
+        format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if format_tag not in (_FORMAT_PCM, _FORMAT_EXTENSIBLE) or bits != 16:
+            raise ValueError(f"Only 16-bit PCM WAV is supported, got format {format_tag} with {bits} bits")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = data_size // (2 * channels)
+        self.data_offset = offset
+        if self.frames:
+            self.data = np.memmap(self.path, dtype="<i2", mode=mode, offset=offset,
+                                  shape=(self.frames, channels))
+        else:
+            self.data = np.zeros((0, channels), dtype="<i2")
+
+    @property
+    def duration(self):
+        """float: Duration in seconds."""
+        return self.frames / float(self.sample_rate)
+
+    def view(self, start, count):
+        """
+        Get a zero-copy view of a frame range, clipped to the file.
+
+        Args:
+            start (int): First frame
+            count (int): Number of frames
+
+        Returns:
+            np.ndarray: int16 view shaped (frames, channels)
+        """
+        start = max(0, start)
+        return self.data[start:min(self.frames, start + count)]
+
+    def read(self, start, count):
+        """
+        Read a frame range as float32, zero-padding anything outside the file.
+
+        Args:
+            start (int): First frame, may be negative
+            count (int): Number of frames
+
+        Returns:
+            np.ndarray: float32 samples in [-1, 1) shaped (count, channels)
+        """
+        block = np.zeros((count, self.channels), dtype=np.float32)
+        begin = max(0, start)
+        end = min(self.frames, start + count)
+        if end > begin:
+            block[begin - start:end - start] = self.data[begin:end] / 32768.0
+        return block
+
+    def chunks(self, chunk_frames):
+        """
+        Iterate over the file in zero-copy chunks.
+
+        Args:
+            chunk_frames (int): Frames per chunk
+
+        Yields:
+            tuple: (start_frame, int16 view)
+        """
+        for start in range(0, self.frames, chunk_frames):
+            yield start, self.data[start:start + chunk_frames]
+
+    def flush(self):
+        """Flush in-place modifications to disk."""
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+    def close(self):
+        """Flush and release the mapping."""
+        self.flush()
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_wav(path, mode="r"):
+    """
+    Memory-map a 16-bit PCM WAV file.
+
+    Args:
+        path (str): Path to the WAV file
+        mode (str): "r" for read-only, "r+" to modify samples in place
+
+    Returns:
+        MappedWav: The mapped file
+    """
+    return MappedWav(path, mode)
+
+
+def _header(sample_rate, channels, data_size):
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, _FORMAT_PCM, channels, sample_rate,
+        sample_rate * channels * 2, channels * 2, 16,
+        b"data", data_size
+    )
+
+
+def to_int16(samples):
+    """
+    Convert float samples in [-1, 1] to int16 with clipping.
+
+    Args:
+        samples (np.ndarray): Float samples
+
+    Returns:
+        np.ndarray: int16 samples
+    """
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+
+
+class WavWriter:
+    """
+    Incremental 16-bit PCM WAV writer.
+    """
+
+    def __init__(self, path, sample_rate, channels):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = 0
+        self._file = open(self.path, "wb")
+        self._file.write(_header(sample_rate, channels, 0))
+
+    def write(self, samples):
+        """
+        Append samples.
+
+        Args:
+            samples (np.ndarray or bytes): int16 or float samples shaped
+                (frames, channels), or raw little-endian int16 bytes
+        """
+        if isinstance(samples, (bytes, bytearray, memoryview)):
+            data = bytes(samples)
+        else:
+            samples = np.asarray(samples)
+            if samples.dtype != np.int16:
+                samples = to_int16(samples)
+            data = samples.astype("<i2", copy=False).tobytes()
+        self._file.write(data)
+        self.frames += len(data) // (2 * self.channels)
+
+    def close(self):
+        """Patch the RIFF sizes and close the file."""
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(_header(self.sample_rate, self.channels, self.frames * 2 * self.channels))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def create_wav(path, frames, sample_rate, channels):
+    """
+    Create a silent WAV of a given length without writing its samples.
+
+    The data region is allocated with truncate, which is sparse on most
+    filesystems, so creating a long silent track is constant time.
+
+    Args:
+        path (str): Destination path
+        frames (int): Number of sample frames
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+
+    Returns:
+        Path: Path to the created file
+    """
+    path = Path(path)
+    data_size = frames * 2 * channels
+    with open(path, "wb") as f:
+        f.write(_header(sample_rate, channels, data_size))
+        f.truncate(_HEADER_SIZE + data_size)
+    return path
@@ -0,0 +1,239 @@
+"""
+Coordinator for distributed jobs.
+
+Splits a job into stage tasks (extract, transcribe, translate, then synthesize
+and combine per language), submits them to the shared queue and collects the
+results. Workers report the artifacts they fetched as well as the ones they
+produced, and each task prefers the node already holding the most bytes of its
+inputs, so a combine task runs where the input video was cached by the
+extract stage unless its audio outweighs it.
+"""
+import shutil
+import time
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from src.utils.tracing import job_context, span, write_metrics
+from src.jobs import job_dir, save_manifest
+from src.lifecycle import job_lease, register_artifacts, evict_job
+from src.pipeline import iter_results
+from src.admission import probe_upload
+from src.distributed.store import get_store
+from src.distributed.taskqueue import get_queue, new_task
+from config import (
+    LANGUAGES, OUTPUT_DIR, SEPARATE_BACKGROUND, SUBTITLE_MODE, TASK_TIMEOUT,
+    TASK_CLAIM_TIMEOUT, DISTRIBUTED_JOB_TIMEOUT
+)
+
+logger = get_logger(__name__)
+
+_POLL_INTERVAL = 0.2
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class _Tasks:
+    """Submits a job's tasks with locality hints and waits for their results."""
+
+    def __init__(self, job_id, task_queue, timeout=DISTRIBUTED_JOB_TIMEOUT, claim_timeout=TASK_CLAIM_TIMEOUT):
+        self.job_id = job_id
+        self.task_queue = task_queue
+        self.locations = {}  # artifact key -> {node: size} for every node holding a copy
+        self.pending = {}  # task id -> task
+        self.submitted = []  # every task id, for cleanup
+        self.deadline = time.monotonic() + timeout
+        self.claim_timeout = claim_timeout
+        self._unclaimed_since = {}  # task id -> when it was last seen waiting for a worker
+
+    def submit(self, stage, args, requires):
+        requires = [f"{self.job_id}/{name}" for name in requires]
+        held = {}  # node -> bytes of the inputs it already holds
+        for key in requires:
+            for node, size in self.locations.get(key, {}).items():
+                held[node] = held.get(node, 0) + size
+        prefer = max(held, key=held.get) if held else None
+        task = new_task(self.job_id, stage, args, requires, prefer)
+        self.task_queue.submit(task)
+        self.pending[task["id"]] = task
+        self.submitted.append(task["id"])
+        self._unclaimed_since[task["id"]] = time.monotonic()
+        return task["id"]
+
+    def _check_liveness(self):
+        """Fail the job if it ran out of time or a task finds no worker."""
+        now = time.monotonic()
+        if now > self.deadline:
+            raise Exception(f"Timed out waiting for tasks: {', '.join(self.pending)}")
+        unclaimed = []
+        for task_id in self.pending:
+            if not self.task_queue.is_pending(task_id):
+                self._unclaimed_since[task_id] = now
+            elif now - self._unclaimed_since[task_id] > self.claim_timeout:
+                unclaimed.append(task_id)
+        if unclaimed:
+            raise Exception(f"No worker claimed tasks within {self.claim_timeout} seconds: {', '.join(unclaimed)}")
+
+    def wait_any(self):
+        """
+        Wait for any pending task, returning (task, result).
+
+        Raises:
+            Exception: If a task failed, no worker picked a task up in time,
+                or the job ran past its deadline
+        """
+        while True:
+            for task_id, task in list(self.pending.items()):
+                result = self.task_queue.result(task_id)
+                if result is None:
+                    continue
+                del self.pending[task_id]
+                self.task_queue.discard([task_id])
+                if result["status"] != "done":
+                    raise Exception(f"{task['stage']} task failed: {result.get('error')}")
+                for key, size in {**result.get("inputs", {}), **result.get("outputs", {})}.items():
+                    self.locations.setdefault(key, {})[result["node"]] = size
+                return task, result
+            self.task_queue.requeue_stale(TASK_TIMEOUT)
+            self._check_liveness()
+            time.sleep(_POLL_INTERVAL)
+
+    def discard(self):
+        """Remove the job's remaining tasks and results from the queue."""
+        self.task_queue.discard(self.submitted)
+
+    def run(self, stage, args, requires):
+        self.submit(stage, args, requires)
+        return self.wait_any()[1]
+
+
+def _download(store, key, dest):
+    """Copy an artifact out of the store to a local path."""
+    if store.is_local:
+        shutil.copyfile(store.get(key, None), dest)
+        return Path(dest)
+    return store.get(key, dest)
+
+
+def run_distributed(video_file, source_lang, target_langs, progress=None, on_warning=None, job_id=None,
+                    on_result=None, task_queue=None, store=None, probe=None):
+    """
+    Process a video on distributed workers.
+
+    Args:
+        video_file (str): Path to the input video file
+        source_lang (str): Source language name
+        target_langs (list): List of target language names
+        progress (callable, optional): Called as progress(fraction, description)
+        on_warning (callable, optional): Unused; accepted for parity with run_pipeline
+        job_id (str, optional): Job identifier, generated if omitted
+        on_result (callable, optional): Called as on_result(lang_code, output_path)
+            as soon as each language's video is ready
+        task_queue (optional): Task queue, defaults to TASK_QUEUE
+        store (optional): Artifact store, defaults to ARTIFACT_STORE
+        probe (tuple, optional): (size in bytes, duration in seconds) from
+            src.admission.probe_upload, so the upload is not probed again
+
+    Returns:
+        list: List of paths to translated videos
+
+    Raises:
+        ValueError: If no target language is selected
+        Exception: If processing fails
+    """
+    if not target_langs:
+        raise ValueError("Select at least one target language.")
+    progress = progress or _noop
+    on_result = on_result or _noop
+    task_queue = task_queue or get_queue()
+    store = store or get_store()
+    source_lang_code = LANGUAGES[source_lang]
+    target_lang_codes = [LANGUAGES[lang] for lang in target_langs]
+    output_videos = []
+
+    with job_context(job_id) as job_id, job_lease(job_id):
+        tasks = _Tasks(job_id, task_queue)
+        try:
+            with span("stage.distributed", langs=",".join(target_lang_codes)):
+                # Load is spread over the workers, so only the upload limits apply here
+                progress(0.05, "Checking video...")
+                _, duration = probe or probe_upload(video_file)
+
+                store.put(f"{job_id}/input_video.mp4", video_file)
+
+                progress(0.1, "Extracting audio...")
+                tasks.run("extract", {"separate": SEPARATE_BACKGROUND}, ["input_video.mp4"])
+                progress(0.2, "Generating subtitles...")
+                tasks.run("transcribe", {"source_lang": source_lang_code}, ["input_audio.wav"])
+                progress(0.3, "Translating subtitles...")
+                tasks.run("translate", {"source_lang": source_lang_code, "langs": target_lang_codes},
+                          ["units.srt", "cues.srt", "unit_index.json"])
+
+                # Languages render in parallel across nodes; each combine starts as soon as its audio is ready
+                progress(0.4, "Generating audio...")
+                for lang_code in target_lang_codes:
+                    requires = [f"units_{lang_code}.srt"] + (["background.wav"] if SEPARATE_BACKGROUND else [])
+                    tasks.submit("synthesize", {"lang": lang_code, "duration": duration, "separate": SEPARATE_BACKGROUND},
+                                 requires)
+
+                manifest = {"job_id": job_id, "distributed": True, "subtitle_mode": SUBTITLE_MODE, "languages": {}}
+                while tasks.pending:
+                    task, result = tasks.wait_any()
+                    lang_code = task["args"]["lang"]
+                    if task["stage"] == "synthesize":
+                        tasks.submit("combine", {"lang": lang_code, "subtitle_mode": SUBTITLE_MODE},
+                                     ["input_video.mp4", f"audio_{lang_code}.wav", f"subtitles_{lang_code}.srt"])
+                        continue
+
+                    output_path = _download(store, f"{job_id}/output_{lang_code}.mp4",
+                                            OUTPUT_DIR / f"{job_id}_translated_{lang_code}.mp4")
+                    srt_path = _download(store, f"{job_id}/subtitles_{lang_code}.srt",
+                                         job_dir(job_id) / f"subtitles_{lang_code}.srt")
+                    register_artifacts(job_id, output_path)
+                    output_videos.append(output_path)
+                    manifest["languages"][lang_code] = {
+                        "subtitles": str(srt_path), "output": str(output_path), "revision": 0, "node": result["node"]
+                    }
+                    save_manifest(job_id, manifest)
+                    progress(0.4 + 0.55 * len(output_videos) / len(target_lang_codes), "Rendering videos...")
+                    on_result(lang_code, output_path)
+
+            progress(1.0, "Translation complete!")
+            return output_videos
+        except Exception as e:
+            logger.error(f"Distributed processing failed: {str(e)}", exc_info=True)
+            if not output_videos:
+                evict_job(job_id)
+            raise Exception(f"Video processing failed: {str(e)}")
+        finally:
+            # Tasks, results and intermediates only live while the job runs; workers
+            # drop their caches once the job's artifacts are gone from the store
+            tasks.discard()
+            store.delete_prefix(job_id)
+            try:
+                write_metrics()
+            except Exception as e:
+                logger.warning(f"Failed to write metrics: {str(e)}")
+
+
+def iter_distributed(video_file, source_lang, target_langs, progress=None, on_warning=None, job_id=None,
+                     probe=None):
+    """
+    Process a video on distributed workers, yielding each language's video as soon as it is ready.
+
+    Args:
+        video_file (str): Path to the input video file
+        source_lang (str): Source language name
+        target_langs (list): List of target language names
+        progress (callable, optional): Called as progress(fraction, description)
+        on_warning (callable, optional): Unused; accepted for parity with iter_pipeline
+        job_id (str, optional): Job identifier, generated if omitted
+        probe (tuple, optional): (size in bytes, duration in seconds) from
+            src.admission.probe_upload, so the upload is not probed again
+
+    Yields:
+        tuple: (language code, path to the translated video)
+    """
+    yield from iter_results(run_distributed, video_file, source_lang, target_langs, progress, on_warning, job_id,
+                            probe=probe)
@@ -0,0 +1,235 @@
+"""
+Shared artifact stores for distributed workers.
+
+Artifacts are immutable files addressed by key (``<job_id>/<name>``). Three
+backends share the same small interface:
+
+- ``LocalStore``: a directory, local or on a shared mount such as NFS
+- ``S3Store``: any S3-compatible service (AWS, MinIO), needs boto3
+- ``MemoryStore``: an in-process MinIO-style stand-in for tests
+"""
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from config import OUTPUT_DIR, ARTIFACT_STORE, S3_ENDPOINT_URL
+
+logger = get_logger(__name__)
+
+
+class LocalStore:
+    """
+    Artifact store in a (possibly shared) directory.
+
+    Files are read in place, so fetching never copies.
+    """
+
+    is_local = True
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key):
+        """Path of an artifact in the store."""
+        return self.root / key
+
+    def put(self, key, path):
+        """
+        Store a file under a key, atomically.
+
+        Args:
+            key (str): Artifact key
+            path (str): File to store
+
+        Returns:
+            int: Size in bytes
+        """
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+        return target.stat().st_size
+
+    def get(self, key, dest):
+        """
+        Get an artifact as a local file.
+
+        Args:
+            key (str): Artifact key
+            dest (Path): Ignored; the stored file is returned in place
+
+        Returns:
+            Path: Path to the artifact
+        """
+        path = self.path(key)
+        if not path.exists():
+            raise FileNotFoundError(f"Artifact not found: {key}")
+        return path
+
+    def exists(self, key):
+        return self.path(key).exists()
+
+    def delete_prefix(self, prefix):
+        """Delete every artifact under a key prefix (e.g. a job ID)."""
+        shutil.rmtree(self.root / prefix, ignore_errors=True)
+
+
+class MemoryStore:
+    """
+    In-process object store with S3-like semantics, for tests and single-node runs.
+    """
+
+    is_local = False
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, path):
+        data = Path(path).read_bytes()
+        with self._lock:
+            self._objects[key] = data
+        return len(data)
+
+    def get(self, key, dest):
+        with self._lock:
+            if key not in self._objects:
+                raise FileNotFoundError(f"Artifact not found: {key}")
+            data = self._objects[key]
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_bytes(data)
+        return dest
+
+    def exists(self, key):
+        with self._lock:
+            return key in self._objects
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._objects if k.startswith(f"{prefix}/")]:
+                del self._objects[key]
+
+
+class S3Store:
+    """
+    Artifact store in an S3-compatible bucket.
+    """
+
+    is_local = False
+
+    def __init__(self, bucket, prefix="", endpoint_url=S3_ENDPOINT_URL):
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("S3 artifact stores need boto3: pip install boto3")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key, path):
+        self.client.upload_file(str(path), self.bucket, self._key(key))
+        return Path(path).stat().st_size
+
+    def get(self, key, dest):
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp")
+        self.client.download_file(self.bucket, self._key(key), str(tmp_path))
+        os.replace(tmp_path, dest)
+        return dest
+
+    def exists(self, key):
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self._key(key), MaxKeys=1)
+        return any(item["Key"] == self._key(key) for item in response.get("Contents", []))
+
+    def delete_prefix(self, prefix):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self._key(prefix)}/"):
+            objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects})
+
+
+class NodeCache:
+    """
+    Per-node view of a store that keeps fetched and produced artifacts on local disk.
+
+    Tasks scheduled on the node that already holds their inputs skip the
+    download entirely; with a LocalStore files are used in place.
+    """
+
+    def __init__(self, store, cache_dir):
+        self.store = store
+        self.cache_dir = Path(cache_dir)
+
+    def fetch(self, key):
+        """
+        Get an artifact as a local file, downloading it once per node.
+
+        Args:
+            key (str): Artifact key
+
+        Returns:
+            Path: Local path to the artifact
+        """
+        if self.store.is_local:
+            return self.store.get(key, None)
+        path = self.cache_dir / key
+        if not path.exists():
+            self.store.get(key, path)
+        return path
+
+    def put(self, key, path):
+        """
+        Publish a file and keep it in the node cache.
+
+        Args:
+            key (str): Artifact key
+            path (str): File to publish
+
+        Returns:
+            int: Size in bytes
+        """
+        size = self.store.put(key, path)
+        if not self.store.is_local:
+            cached = self.cache_dir / key
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(path), cached)
+        return size
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(url=ARTIFACT_STORE):
+    """
+    Get the artifact store for a URL; instances are shared per process.
+
+    Args:
+        url (str): Directory path, "s3://bucket/prefix" or "memory://";
+            defaults to OUTPUT_DIR/store
+
+    Returns:
+        LocalStore, S3Store or MemoryStore: The store
+    """
+    url = url or str(OUTPUT_DIR / "store")
+    with _stores_lock:
+        if url not in _stores:
+            if url.startswith("memory://"):
+                _stores[url] = MemoryStore()
+            elif url.startswith("s3://"):
+                bucket, _, prefix = url[len("s3://"):].partition("/")
+                _stores[url] = S3Store(bucket, prefix)
+            else:
+                _stores[url] = LocalStore(url[len("file://"):] if url.startswith("file://") else url)
+            logger.info(f"Using artifact store: {url}")
+        return _stores[url]
@@ -0,0 +1,278 @@
+"""
+Task queues for distributed stage execution.
+
+A task is a JSON-serializable dict::
+
+    {"id", "job_id", "stage", "args", "requires", "prefer", "created"}
+
+``prefer`` names the node that already holds the task's largest input. Claims
+use delay scheduling: a node takes tasks preferring it first, then tasks with
+no preference, and only takes tasks preferring another node once they have
+waited LOCALITY_WAIT seconds, so render tasks run where the video lives
+without stalling when that node is busy.
+
+Two backends share the same interface:
+
+- ``DirectoryQueue``: files in a shared directory (e.g. NFS), claimed by
+  atomic rename, so any number of nodes can coordinate without a broker
+- ``MemoryQueue``: in-process, for tests and single-node runs
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from config import TASK_QUEUE, LOCALITY_WAIT
+
+logger = get_logger(__name__)
+
+
+def new_task(job_id, stage, args=None, requires=(), prefer=None):
+    """
+    Build a task.
+
+    Args:
+        job_id (str): Job the task belongs to
+        stage (str): Stage name, see src.distributed.worker.STAGES
+        args (dict, optional): JSON-serializable stage arguments
+        requires (list): Artifact keys the stage reads
+        prefer (str, optional): Node that should preferably run the task
+
+    Returns:
+        dict: The task
+    """
+    return {
+        "id": uuid.uuid4().hex,
+        "job_id": job_id,
+        "stage": stage,
+        "args": args or {},
+        "requires": list(requires),
+        "prefer": prefer,
+        "created": time.time()
+    }
+
+
+def _claim_order(tasks, node, stages=None, now=None):
+    """Order claimable tasks for a node: its own, then unplaced, then stolen after the wait."""
+    now = now or time.time()
+    tasks = sorted((t for t in tasks if stages is None or t["stage"] in stages), key=lambda t: t["created"])
+    own = [t for t in tasks if t.get("prefer") == node]
+    free = [t for t in tasks if not t.get("prefer")]
+    stolen = [t for t in tasks if t.get("prefer") not in (None, node) and now - t["created"] >= LOCALITY_WAIT]
+    return own + free + stolen
+
+
+class MemoryQueue:
+    """
+    In-process task queue.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._running = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def submit(self, task):
+        with self._lock:
+            self._pending[task["id"]] = task
+        return task["id"]
+
+    def claim(self, node, stages=None):
+        """
+        Claim the best task for a node.
+
+        Args:
+            node (str): Claiming node
+            stages (list, optional): Stages the node runs; all if omitted
+
+        Returns:
+            dict: The claimed task, or None if nothing is claimable
+        """
+        with self._lock:
+            order = _claim_order(self._pending.values(), node, stages)
+            if not order:
+                return None
+            task = self._pending.pop(order[0]["id"])
+            self._running[task["id"]] = {"task": task, "node": node, "beat": time.time()}
+            return dict(task)
+
+    def heartbeat(self, task_id):
+        with self._lock:
+            if task_id in self._running:
+                self._running[task_id]["beat"] = time.time()
+
+    def complete(self, task_id, result):
+        with self._lock:
+            # Tasks that were requeued or discarded since the claim report nothing
+            if self._running.pop(task_id, None) is not None:
+                self._results[task_id] = dict(result, status="done")
+
+    def fail(self, task_id, error):
+        with self._lock:
+            if self._running.pop(task_id, None) is not None:
+                self._results[task_id] = {"status": "failed", "error": error}
+
+    def result(self, task_id):
+        with self._lock:
+            return self._results.get(task_id)
+
+    def is_pending(self, task_id):
+        """Whether a task is still waiting to be claimed."""
+        with self._lock:
+            return task_id in self._pending
+
+    def discard(self, task_ids):
+        """
+        Remove tasks and their results, whatever their state.
+
+        Args:
+            task_ids (iterable): Task IDs
+        """
+        with self._lock:
+            for task_id in task_ids:
+                self._pending.pop(task_id, None)
+                self._running.pop(task_id, None)
+                self._results.pop(task_id, None)
+
+    def requeue_stale(self, timeout):
+        """
+        Return tasks whose worker stopped sending heartbeats to the queue.
+
+        Args:
+            timeout (float): Seconds without a heartbeat
+
+        Returns:
+            int: Number of requeued tasks
+        """
+        now = time.time()
+        with self._lock:
+            stale = [task_id for task_id, entry in self._running.items() if now - entry["beat"] > timeout]
+            for task_id in stale:
+                self._pending[task_id] = self._running.pop(task_id)["task"]
+        return len(stale)
+
+
+class DirectoryQueue:
+    """
+    Task queue in a shared directory.
+
+    Tasks move from ``pending/`` to ``running/`` by atomic rename, so exactly
+    one node wins each claim. Heartbeats touch the running file.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        for name in ("pending", "running", "results"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def _write(self, path, data):
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def submit(self, task):
+        self._write(self.root / "pending" / f"{task['id']}.json", task)
+        return task["id"]
+
+    def claim(self, node, stages=None):
+        tasks = []
+        for path in (self.root / "pending").glob("*.json"):
+            try:
+                tasks.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                # Claimed by another node (or still being written) since the listing
+                continue
+        for task in _claim_order(tasks, node, stages):
+            pending = self.root / "pending" / f"{task['id']}.json"
+            running = self.root / "running" / f"{task['id']}.json"
+            try:
+                # Stamped before the rename, so the task is never seen running with its enqueue time
+                os.utime(pending)
+                os.rename(pending, running)
+            except FileNotFoundError:
+                continue
+            self._write(running, dict(task, node=node))
+            return task
+        return None
+
+    def heartbeat(self, task_id):
+        try:
+            os.utime(self.root / "running" / f"{task_id}.json")
+        except FileNotFoundError:
+            pass
+
+    def _finish(self, task_id, result):
+        running = self.root / "running" / f"{task_id}.json"
+        # Tasks that were requeued or discarded since the claim report nothing
+        if not running.exists():
+            return
+        self._write(self.root / "results" / f"{task_id}.json", result)
+        running.unlink(missing_ok=True)
+
+    def complete(self, task_id, result):
+        self._finish(task_id, dict(result, status="done"))
+
+    def fail(self, task_id, error):
+        self._finish(task_id, {"status": "failed", "error": error})
+
+    def result(self, task_id):
+        path = self.root / "results" / f"{task_id}.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def is_pending(self, task_id):
+        return (self.root / "pending" / f"{task_id}.json").exists()
+
+    def discard(self, task_ids):
+        for task_id in task_ids:
+            for name in ("pending", "running", "results"):
+                (self.root / name / f"{task_id}.json").unlink(missing_ok=True)
+
+    def requeue_stale(self, timeout):
+        now = time.time()
+        requeued = 0
+        for path in (self.root / "running").glob("*.json"):
+            try:
+                if now - path.stat().st_mtime <= timeout:
+                    continue
+                os.rename(path, self.root / "pending" / path.name)
+                requeued += 1
+            except FileNotFoundError:
+                continue
+        if requeued:
+            logger.warning(f"Requeued {requeued} tasks from unresponsive workers")
+        return requeued
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(url=TASK_QUEUE):
+    """
+    Get the task queue for a URL; instances are shared per process.
+
+    Args:
+        url (str): Shared directory path or "memory://"
+
+    Returns:
+        DirectoryQueue or MemoryQueue: The queue
+
+    Raises:
+        ValueError: If no queue is configured
+    """
+    if not url:
+        raise ValueError("TASK_QUEUE is not set")
+    with _queues_lock:
+        if url not in _queues:
+            if url.startswith("memory://"):
+                _queues[url] = MemoryQueue()
+            else:
+                _queues[url] = DirectoryQueue(url[len("file://"):] if url.startswith("file://") else url)
+            logger.info(f"Using task queue: {url}")
+        return _queues[url]
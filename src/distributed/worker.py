@@ -0,0 +1,261 @@
+"""
+Stage worker for distributed rendering.
+
+Each node runs one worker process that claims stage tasks from the shared
+queue, reads its inputs from the artifact store (through a node-local cache)
+and publishes its outputs back to the store.
+
+Usage:
+    python -m src.distributed.worker                            # all stages
+    python -m src.distributed.worker --stages synthesize combine
+    python -m src.distributed.worker --concurrency 2 --node render-1
+"""
+import argparse
+import json
+import shutil
+import threading
+import time
+
+from src.utils.logger import get_logger
+from src.utils.tracing import job_context, span, start_metrics_server
+from src.lifecycle import start_evictor
+from src.audio.extractor import extract_audio
+from src.audio.separator import separate_background
+from src.audio.generator import generate_translated_audio
+from src.subtitles.cues import CueTrack
+from src.subtitles.segmenter import Segmentation
+from src.subtitles.transcriber import transcribe_segments
+from src.subtitles.translator import translate_cues
+from src.video.processor import combine_video_audio_subtitles
+from src.distributed.store import NodeCache, get_store
+from src.distributed.taskqueue import get_queue
+from config import TEMP_DIR, NODE_NAME, TASK_HEARTBEAT
+
+logger = get_logger(__name__)
+
+# Seconds between sweeps for caches of finished jobs
+_SWEEP_INTERVAL = 30
+
+
+class TaskIO:
+    """
+    Artifact access for one task: inputs come from the node cache, outputs go to the store.
+
+    Attributes:
+        job_id (str): Job the task belongs to
+        inputs (dict): Fetched artifact keys and their sizes, now cached on this node
+        outputs (dict): Published artifact keys and their sizes
+    """
+
+    def __init__(self, job_id, task_id, store):
+        self.job_id = job_id
+        self.cache = NodeCache(store, TEMP_DIR / f"cache_{job_id}")
+        self.scratch_dir = TEMP_DIR / f"task_{task_id}"
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
+        self.inputs = {}
+        self.outputs = {}
+
+    def key(self, name):
+        return f"{self.job_id}/{name}"
+
+    def fetch(self, name):
+        """Local path of a job artifact."""
+        path = self.cache.fetch(self.key(name))
+        self.inputs[self.key(name)] = path.stat().st_size
+        return path
+
+    def scratch(self, name):
+        """Path for a file the task produces."""
+        return self.scratch_dir / name
+
+    def put(self, name, path):
+        """Publish a produced file as a job artifact."""
+        self.outputs[self.key(name)] = self.cache.put(self.key(name), path)
+
+    def close(self):
+        shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+
+def stage_extract(io, args):
+    audio_path = extract_audio(io.fetch("input_video.mp4"), io.scratch("input_audio.wav"))
+    if args.get("separate"):
+        io.put("background.wav", separate_background(audio_path, io.scratch("background.wav")))
+    io.put("input_audio.wav", audio_path)
+    return {}
+
+
+def stage_transcribe(io, args):
+    segmentation = transcribe_segments(io.fetch("input_audio.wav"), args["source_lang"])
+    io.put("units.srt", segmentation.units.to_srt(io.scratch("units.srt")))
+    io.put("cues.srt", segmentation.cues.to_srt(io.scratch("cues.srt")))
+    index_path = io.scratch("unit_index.json")
+    index_path.write_text(json.dumps(segmentation.unit_index.tolist()), encoding="utf-8")
+    io.put("unit_index.json", index_path)
+    return {"units": len(segmentation.units), "cues": len(segmentation.cues)}
+
+
+def stage_translate(io, args):
+    source_lang = args["source_lang"]
+    segmentation = Segmentation(
+        CueTrack.from_srt(io.fetch("units.srt"), source_lang),
+        CueTrack.from_srt(io.fetch("cues.srt"), source_lang),
+        json.loads(io.fetch("unit_index.json").read_text(encoding="utf-8"))
+    )
+    for lang_code, lang_units in translate_cues(segmentation.units, args["langs"]).items():
+        io.put(f"units_{lang_code}.srt", lang_units.to_srt(io.scratch(f"units_{lang_code}.srt")))
+        lang_cues = segmentation.display_cues(lang_units)
+        io.put(f"subtitles_{lang_code}.srt", lang_cues.to_srt(io.scratch(f"subtitles_{lang_code}.srt")))
+    return {}
+
+
+def stage_synthesize(io, args):
+    lang_code = args["lang"]
+    audio_path = generate_translated_audio(
+        CueTrack.from_srt(io.fetch(f"units_{lang_code}.srt"), lang_code), lang_code, args["duration"],
+        background_path=io.fetch("background.wav") if args.get("separate") else None,
+        output_path=io.scratch(f"audio_{lang_code}.wav"),
+        clip_dir=io.cache.cache_dir / "clips"
+    )
+    io.put(f"audio_{lang_code}.wav", audio_path)
+    return {}
+
+
+def stage_combine(io, args):
+    lang_code = args["lang"]
+    output_path = combine_video_audio_subtitles(
+        io.fetch("input_video.mp4"), io.fetch(f"audio_{lang_code}.wav"),
+        io.fetch(f"subtitles_{lang_code}.srt"), io.scratch(f"output_{lang_code}.mp4"),
+        subtitle_mode=args.get("subtitle_mode")
+    )
+    io.put(f"output_{lang_code}.mp4", output_path)
+    return {}
+
+
+STAGES = {
+    "extract": stage_extract,
+    "transcribe": stage_transcribe,
+    "translate": stage_translate,
+    "synthesize": stage_synthesize,
+    "combine": stage_combine
+}
+
+
+class Worker:
+    """
+    Claims and runs stage tasks on one node.
+    """
+
+    def __init__(self, task_queue, store, node=NODE_NAME, stages=None, poll_interval=0.5):
+        self.task_queue = task_queue
+        self.store = store
+        self.node = node
+        self.stages = list(stages) if stages else list(STAGES)
+        self.poll_interval = poll_interval
+        self._last_sweep = 0.0
+
+    def run_once(self):
+        """
+        Claim and run one task.
+
+        Returns:
+            bool: True if a task was run
+        """
+        task = self.task_queue.claim(self.node, self.stages)
+        if task is not None:
+            self.run_task(task)
+        if time.monotonic() - self._last_sweep > _SWEEP_INTERVAL:
+            self.sweep_caches()
+        return task is not None
+
+    def sweep_caches(self):
+        """
+        Drop node caches of jobs whose tasks are done.
+
+        The coordinator deletes a job's artifacts from the store when the job
+        ends, so a cache whose job input is gone from the store is no longer needed.
+
+        Returns:
+            int: Number of caches removed
+        """
+        self._last_sweep = time.monotonic()
+        removed = 0
+        for cache_dir in TEMP_DIR.glob("cache_*"):
+            job_id = cache_dir.name[len("cache_"):]
+            try:
+                if self.store.exists(f"{job_id}/input_video.mp4"):
+                    continue
+            except Exception as e:
+                logger.warning(f"Cache sweep could not reach the store: {str(e)}")
+                return removed
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} caches of finished jobs on {self.node}")
+        return removed
+
+    def run_forever(self, stop=None):
+        """
+        Run tasks until the stop event is set.
+
+        Args:
+            stop (threading.Event, optional): Set to stop after the current task
+        """
+        logger.info(f"Worker on {self.node} running stages: {', '.join(self.stages)}")
+        while stop is None or not stop.is_set():
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+    def run_task(self, task):
+        """
+        Run a claimed task and report its result to the queue.
+
+        Args:
+            task (dict): The claimed task
+        """
+        task_id = task["id"]
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(TASK_HEARTBEAT):
+                self.task_queue.heartbeat(task_id)
+
+        threading.Thread(target=heartbeat, name=f"heartbeat-{task_id[:8]}", daemon=True).start()
+        io = TaskIO(task["job_id"], task_id, self.store)
+        try:
+            with job_context(task["job_id"]), span(f"task.{task['stage']}", node=self.node,
+                                                   local=task.get("prefer") in (None, self.node)):
+                data = STAGES[task["stage"]](io, task["args"])
+            self.task_queue.complete(task_id, {"node": self.node, "inputs": io.inputs, "outputs": io.outputs,
+                                               "data": data})
+            logger.info(f"Task {task['stage']} of job {task['job_id']} done on {self.node}")
+        except Exception as e:
+            logger.error(f"Task {task['stage']} of job {task['job_id']} failed: {str(e)}", exc_info=True)
+            self.task_queue.fail(task_id, str(e))
+        finally:
+            done.set()
+            io.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed stage worker")
+    parser.add_argument("--node", default=NODE_NAME, help="Node name used for locality-aware scheduling")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), help="Stages to run (default: all)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Tasks run in parallel on this node")
+    args = parser.parse_args()
+
+    start_metrics_server()
+    start_evictor()
+    task_queue = get_queue()
+    store = get_store()
+    threads = [
+        threading.Thread(target=Worker(task_queue, store, args.node, args.stages).run_forever, name=f"worker-{i}")
+        for i in range(max(1, args.concurrency))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
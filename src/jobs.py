@@ -0,0 +1,168 @@
+"""
+Per-job working directories and manifests.
+
+Each pipeline run keeps its input video, intermediate audio, subtitles and TTS
+clips under ``OUTPUT_DIR/jobs/<job_id>`` with a ``manifest.json`` describing
+them, so later operations (such as re-rendering after subtitle edits) can pick
+the job up again. Writers that may run at the same time (the pipeline saving
+each finished language, re-renders) go through update_manifest, which
+re-reads the manifest under a per-job file lock.
+"""
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+from src.utils.logger import get_logger
+from config import OUTPUT_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: job locks only hold within this process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+JOBS_DIR = OUTPUT_DIR / "jobs"
+
+# Job IDs are hex strings (uuid4().hex[:12]) and are used as path components
+_JOB_ID_PATTERN = re.compile(r"[0-9a-f]{1,32}")
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+def validate_job_id(job_id):
+    """
+    Check that a job ID is safe to use as a path component.
+
+    Args:
+        job_id (str): Job identifier
+
+    Returns:
+        str: The job identifier
+
+    Raises:
+        ValueError: If the job ID is not a hex string
+    """
+    if not isinstance(job_id, str) or not _JOB_ID_PATTERN.fullmatch(job_id):
+        raise ValueError(f"Invalid job ID: {job_id!r}")
+    return job_id
+
+def job_dir(job_id):
+    """
+    Get (and create) the working directory of a job.
+
+    Args:
+        job_id (str): Job identifier
+
+    Returns:
+        Path: The job directory
+
+    Raises:
+        ValueError: If the job ID is invalid
+    """
+    path = JOBS_DIR / validate_job_id(job_id)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def save_manifest(job_id, manifest):
+    """
+    Write a job manifest atomically.
+
+    Args:
+        job_id (str): Job identifier
+        manifest (dict): JSON-serializable job description
+
+    Returns:
+        Path: Path to the manifest file
+    """
+    path = job_dir(job_id) / "manifest.json"
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+def job_exists(job_id):
+    """
+    Check whether a job has a manifest, without creating its directory.
+
+    Args:
+        job_id (str): Job identifier
+
+    Returns:
+        bool: True if the job exists
+
+    Raises:
+        ValueError: If the job ID is invalid
+    """
+    return (JOBS_DIR / validate_job_id(job_id) / "manifest.json").exists()
+
+def load_manifest(job_id):
+    """
+    Load a job manifest.
+
+    Args:
+        job_id (str): Job identifier
+
+    Returns:
+        dict: The job manifest
+
+    Raises:
+        ValueError: If the job ID is invalid
+        Exception: If the job does not exist
+    """
+    if not job_exists(job_id):
+        raise Exception(f"Unknown job: {job_id}")
+    return json.loads((JOBS_DIR / job_id / "manifest.json").read_text(encoding="utf-8"))
+
+@contextmanager
+def job_lock(job_id, name="manifest"):
+    """
+    Hold a named lock on a job.
+
+    The lock is a file lock in the job directory, so it holds across threads
+    and processes sharing OUTPUT_DIR.
+
+    Args:
+        job_id (str): Job identifier
+        name (str): Lock name, e.g. "manifest" or "rerender"
+
+    Raises:
+        ValueError: If the job ID is invalid
+    """
+    path = job_dir(job_id) / f".{name}.lock"
+    if fcntl is None:
+        with _local_locks_guard:
+            lock = _local_locks.setdefault(str(path), threading.Lock())
+        with lock:
+            yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def update_manifest(job_id, update):
+    """
+    Change a job manifest without losing concurrent changes.
+
+    The manifest is re-read under the job's manifest lock, changed and saved,
+    so writers never overwrite each other's updates.
+
+    Args:
+        job_id (str): Job identifier
+        update (callable): Called with the current manifest (an empty dict for
+            a new job) and changes it in place
+
+    Returns:
+        dict: The saved manifest
+    """
+    with job_lock(job_id):
+        path = job_dir(job_id) / "manifest.json"
+        manifest = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        update(manifest)
+        save_manifest(job_id, manifest)
+    return manifest
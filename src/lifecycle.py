@@ -0,0 +1,364 @@
+"""
+Disk lifecycle of job artifacts.
+
+Every file a job produces lives in its job directory, in its scratch directory
+(``TEMP_DIR/<job_id>``, which may be on tmpfs), or is registered with the job
+(final videos in ``OUTPUT_DIR``). Jobs are evicted with all their files once
+they have not been used for ARTIFACT_TTL_HOURS, or least recently used first
+when OUTPUT_DIR exceeds DISK_QUOTA_GB or free space drops below
+MIN_FREE_DISK_GB. Jobs that are running hold a lease and are never evicted.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from src.utils.tracing import incr_counter
+from src.jobs import JOBS_DIR, job_dir, validate_job_id
+from config import (
+    OUTPUT_DIR, TEMP_DIR, FFMPEG_AUDIO_PARAMS, SEPARATE_BACKGROUND,
+    ARTIFACT_TTL_HOURS, DISK_QUOTA_GB, MIN_FREE_DISK_GB, EVICTION_INTERVAL
+)
+
+logger = get_logger(__name__)
+
+_GB = 1024 ** 3
+_MB = 1024 ** 2
+# One lease file per holder: .lease-<holder id>
+_LEASE_PREFIX = ".lease-"
+_ARTIFACTS_FILE = "artifacts.txt"
+# Loose files left in OUTPUT_DIR by the standalone helpers; removed after the TTL
+_LOOSE_SUFFIXES = {".wav", ".mp3", ".srt", ".vtt", ".mp4"}
+
+_evict_lock = threading.Lock()
+_lease_lock = threading.Lock()
+
+
+class InsufficientDiskSpace(Exception):
+    """Raised when a render would not fit on disk even after eviction."""
+
+
+def unique_output_path(prefix, suffix, directory=OUTPUT_DIR):
+    """
+    Reserve a unique file path, so concurrent jobs never write the same default path.
+
+    Args:
+        prefix (str): File name prefix
+        suffix (str): File name suffix, including the extension
+        directory (Path): Directory to create the file in
+
+    Returns:
+        Path: Path of a new empty file
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=directory)
+    os.close(fd)
+    return Path(path)
+
+
+def scratch_dir(job_id):
+    """
+    Get (and create) the scratch directory of a job.
+
+    Scratch files are only needed while the job runs and are removed when its
+    lease is released. Set SCRATCH_DIR to keep them on tmpfs.
+
+    Args:
+        job_id (str): Job identifier
+
+    Returns:
+        Path: The scratch directory
+
+    Raises:
+        ValueError: If the job ID is invalid
+    """
+    path = TEMP_DIR / validate_job_id(job_id)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _leases(path):
+    """Lease files of a job directory that have not outlived the TTL."""
+    now = time.time()
+    ttl = ARTIFACT_TTL_HOURS * 3600
+    leases = []
+    for lease in path.glob(f"{_LEASE_PREFIX}*"):
+        try:
+            # A lease left behind by a crashed process expires with the TTL
+            if now - lease.stat().st_mtime < ttl:
+                leases.append(lease)
+        except OSError:
+            pass
+    return leases
+
+
+@contextmanager
+def job_lease(job_id):
+    """
+    Mark a job as in use so it is not evicted, and remove its scratch files afterwards.
+
+    Every holder (the render, each concurrent re-render) takes its own lease;
+    scratch files are only removed when the last holder releases the job.
+
+    Args:
+        job_id (str): Job identifier
+
+    Yields:
+        str: The job identifier
+    """
+    path = job_dir(job_id)
+    lease = path / f"{_LEASE_PREFIX}{uuid.uuid4().hex}"
+    with _lease_lock:
+        lease.write_text(f"{os.getpid()} {time.time()}", encoding="utf-8")
+    try:
+        yield job_id
+    finally:
+        with _lease_lock:
+            lease.unlink(missing_ok=True)
+            if not _leases(path):
+                shutil.rmtree(TEMP_DIR / job_id, ignore_errors=True)
+
+
+def register_artifacts(job_id, *paths):
+    """
+    Record files outside the job directory that belong to a job.
+
+    Args:
+        job_id (str): Job identifier
+        *paths (str): Artifact paths
+    """
+    with open(job_dir(job_id) / _ARTIFACTS_FILE, "a", encoding="utf-8") as f:
+        for path in paths:
+            f.write(f"{Path(path).resolve()}\n")
+
+
+def _artifacts(path):
+    listing = path / _ARTIFACTS_FILE
+    if not listing.exists():
+        return []
+    output_dir = OUTPUT_DIR.resolve()
+    artifacts = []
+    for line in listing.read_text(encoding="utf-8").splitlines():
+        artifact = Path(line.strip())
+        # Never follow a listing outside OUTPUT_DIR
+        if line.strip() and output_dir in artifact.parents:
+            artifacts.append(artifact)
+    return artifacts
+
+
+def _disk_bytes(path):
+    """Allocated size of a file or directory tree (sparse files count as allocated)."""
+    try:
+        if path.is_file():
+            return path.stat().st_blocks * 512
+    except OSError:
+        return 0
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_blocks * 512
+            except OSError:
+                pass
+    return total
+
+
+def _jobs():
+    """Describe every job on disk: id, last use, size and whether it is leased."""
+    if not JOBS_DIR.exists():
+        return []
+    jobs = []
+    for path in JOBS_DIR.iterdir():
+        if not path.is_dir():
+            continue
+        stamps = [path.stat().st_mtime]
+        leases = _leases(path)
+        for file in [path / "manifest.json", *leases]:
+            try:
+                stamps.append(file.stat().st_mtime)
+            except OSError:
+                pass
+        artifacts = _artifacts(path)
+        jobs.append({
+            "job_id": path.name,
+            "last_used": max(stamps),
+            "bytes": _disk_bytes(path) + sum(_disk_bytes(a) for a in artifacts if a.exists()),
+            "leased": bool(leases)
+        })
+    return jobs
+
+
+def evict_job(job_id):
+    """
+    Delete a job's directory, scratch files and registered artifacts.
+
+    Args:
+        job_id (str): Job identifier
+
+    Returns:
+        int: Bytes freed
+    """
+    path = JOBS_DIR / job_id
+    freed = 0
+    for artifact in _artifacts(path):
+        if artifact.exists():
+            freed += _disk_bytes(artifact)
+            artifact.unlink(missing_ok=True)
+    freed += _disk_bytes(path)
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.rmtree(TEMP_DIR / job_id, ignore_errors=True)
+    incr_counter("jobs_evicted")
+    logger.info(f"Evicted job {job_id} ({freed / _MB:.1f} MB)")
+    return freed
+
+
+def _evict_expired_files(cutoff):
+    """Remove leaked temp entries and loose OUTPUT_DIR files older than the cutoff."""
+    freed = 0
+    leased = {job["job_id"] for job in _jobs() if job["leased"]}
+    # Registered artifacts go with their job, which may have been used more recently
+    registered = set()
+    if JOBS_DIR.exists():
+        for path in JOBS_DIR.iterdir():
+            if path.is_dir():
+                registered.update(_artifacts(path))
+    candidates = []
+    if TEMP_DIR.exists():
+        candidates += [p for p in TEMP_DIR.iterdir() if p.name not in leased]
+    if OUTPUT_DIR.exists():
+        candidates += [
+            p for p in OUTPUT_DIR.iterdir()
+            if p.is_file() and p.suffix.lower() in _LOOSE_SUFFIXES and p.resolve() not in registered
+        ]
+    for path in candidates:
+        try:
+            if path.stat().st_mtime >= cutoff:
+                continue
+            freed += _disk_bytes(path)
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+        except OSError:
+            pass
+    return freed
+
+
+def enforce_limits(required_bytes=0):
+    """
+    Evict expired jobs, then least recently used jobs until the disk limits hold.
+
+    Args:
+        required_bytes (int): Space about to be written to OUTPUT_DIR
+
+    Returns:
+        int: Bytes freed
+    """
+    with _evict_lock:
+        now = time.time()
+        cutoff = now - ARTIFACT_TTL_HOURS * 3600
+        freed = _evict_expired_files(cutoff)
+
+        jobs = sorted((job for job in _jobs() if not job["leased"]), key=lambda job: job["last_used"])
+        remaining = []
+        for job in jobs:
+            if job["last_used"] < cutoff:
+                freed += evict_job(job["job_id"])
+            else:
+                remaining.append(job)
+
+        usage = sum(job["bytes"] for job in _jobs())
+        quota = DISK_QUOTA_GB * _GB
+        min_free = MIN_FREE_DISK_GB * _GB
+        for job in remaining:
+            over_quota = quota and usage + required_bytes > quota
+            low_space = shutil.disk_usage(OUTPUT_DIR).free - required_bytes < min_free
+            if not (over_quota or low_space):
+                break
+            freed += evict_job(job["job_id"])
+            usage -= job["bytes"]
+
+        if freed:
+            logger.info(f"Eviction freed {freed / _MB:.1f} MB")
+        return freed
+
+
+def estimate_job_bytes(video_bytes, duration, languages):
+    """
+    Estimate the disk space a render needs.
+
+    Args:
+        video_bytes (int): Size of the input video
+        duration (float): Video duration in seconds
+        languages (int): Number of target languages
+
+    Returns:
+        tuple: (bytes in OUTPUT_DIR, bytes in TEMP_DIR)
+    """
+    wav_bytes = int(duration * FFMPEG_AUDIO_PARAMS["sample_rate"] * FFMPEG_AUDIO_PARAMS["channels"] * 2)
+    # Per language: the mixed WAV plus an output video up to 1.5x the input
+    output_bytes = languages * (wav_bytes + int(video_bytes * 1.5))
+    if SEPARATE_BACKGROUND:
+        output_bytes += wav_bytes
+    # Extracted audio plus TTS clips and mixing temp files
+    scratch_bytes = int(wav_bytes * 1.2)
+    return output_bytes, scratch_bytes
+
+
+def preflight(required_bytes, scratch_bytes=0):
+    """
+    Make room for a render, evicting old jobs if needed.
+
+    Args:
+        required_bytes (int): Bytes about to be written to OUTPUT_DIR
+        scratch_bytes (int): Bytes about to be written to TEMP_DIR
+
+    Raises:
+        InsufficientDiskSpace: If the render will not fit even after eviction
+    """
+    enforce_limits(required_bytes)
+    min_free = MIN_FREE_DISK_GB * _GB
+    free = shutil.disk_usage(OUTPUT_DIR).free
+    same_disk = os.stat(OUTPUT_DIR).st_dev == os.stat(TEMP_DIR).st_dev
+    needed = required_bytes + (scratch_bytes if same_disk else 0)
+    if free - needed < min_free:
+        raise InsufficientDiskSpace(
+            f"Not enough disk space: need {needed / _MB:.0f} MB plus {min_free / _MB:.0f} MB reserve, "
+            f"{free / _MB:.0f} MB free"
+        )
+    if not same_disk and shutil.disk_usage(TEMP_DIR).free < scratch_bytes:
+        raise InsufficientDiskSpace(
+            f"Not enough scratch space in {TEMP_DIR}: need {scratch_bytes / _MB:.0f} MB"
+        )
+
+
+def start_evictor(interval=EVICTION_INTERVAL):
+    """
+    Run eviction periodically in a background thread.
+
+    Args:
+        interval (float): Seconds between passes; 0 disables background eviction
+
+    Returns:
+        threading.Thread: The running thread, or None if disabled
+    """
+    if not interval:
+        return None
+
+    def loop():
+        while True:
+            try:
+                enforce_limits()
+            except Exception as e:
+                logger.warning(f"Eviction pass failed: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="artifact-evictor", daemon=True)
+    thread.start()
+    logger.info(f"Artifact eviction running every {interval} seconds")
+    return thread
@@ -0,0 +1,298 @@
+"""
+End-to-end dubbing pipeline, independent of the Gradio UI.
+
+Worker processes import this module instead of app.py so they never pay the
+Gradio import cost.
+"""
+import contextvars
+import queue
+import shutil
+import threading
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from src.audio.extractor import extract_audio
+from src.subtitles.transcriber import transcribe_segments
+from src.subtitles.translator import translate_cues
+from src.audio.generator import generate_translated_audio
+from src.audio.separator import separate_background
+from src.video.processor import combine_video_audio_subtitles
+from src.utils.ratelimit import degraded_providers, provider_stats
+from src.utils.tracing import job_context, span, write_metrics
+from src.jobs import job_dir, update_manifest
+from src.lifecycle import job_lease, scratch_dir, register_artifacts, evict_job, estimate_job_bytes, preflight
+from src.admission import admission
+from config import LANGUAGES, OUTPUT_DIR, SEPARATE_BACKGROUND, SUBTITLE_MODE
+
+logger = get_logger(__name__)
+
+def _noop(*args, **kwargs):
+    pass
+
+def run_pipeline(video_file, source_lang, target_langs, progress=None, on_warning=None, job_id=None,
+                 on_result=None, probe=None):
+    """
+    Process video file and generate translated versions.
+    
+    Args:
+        video_file (str): Path to the input video file
+        source_lang (str): Source language name
+        target_langs (list): List of target language names
+        progress (callable, optional): Called as progress(fraction, description)
+        on_warning (callable, optional): Called with a message when output is degraded
+        job_id (str, optional): Job identifier, generated if omitted; pass it to
+            src.rerender.rerender_job to re-render after subtitle edits
+        on_result (callable, optional): Called as on_result(lang_code, output_path)
+            as soon as each language's video is ready
+        probe (tuple, optional): (size in bytes, duration in seconds) from
+            src.admission.probe_upload, so the upload is not probed again
+        
+    Returns:
+        list: List of paths to translated videos
+        
+    Raises:
+        ValueError: If no target language is selected
+        AdmissionRejected: If the video exceeds the limits or the server is too busy
+        Exception: If processing fails
+    """
+    # Checked before admission, so no paid transcription runs for a job with nothing to render
+    if not target_langs:
+        raise ValueError("Select at least one target language.")
+    progress = progress or _noop
+    on_warning = on_warning or logger.warning
+    delivered = []
+    
+    def deliver(lang_code, output_path):
+        delivered.append(lang_code)
+        if on_result is not None:
+            on_result(lang_code, output_path)
+    
+    with job_context(job_id) as job_id:
+        try:
+            # Probed and costed before anything is copied; waits here while the server is busy
+            progress(0.02, "Checking video...")
+            with admission(video_file, len(target_langs), progress, probe) as (video_bytes, duration):
+                try:
+                    with job_lease(job_id):
+                        return _run_pipeline(job_id, video_file, video_bytes, duration, source_lang, target_langs,
+                                             progress, on_warning, deliver)
+                except Exception:
+                    # A job that delivered nothing cannot be re-rendered, so its files are released right away
+                    if not delivered:
+                        evict_job(job_id)
+                    raise
+        finally:
+            try:
+                write_metrics()
+            except Exception as e:
+                logger.warning(f"Failed to write metrics: {str(e)}")
+
+def iter_results(run, *args, **kwargs):
+    """
+    Run a job function in a background thread and yield the results it reports.
+    
+    The job runs in a copy of the caller's context, so rendering continues
+    while the caller handles each result.
+    
+    Args:
+        run (callable): Job function accepting an on_result(lang_code, output_path) keyword
+        *args: Positional arguments for run
+        **kwargs: Keyword arguments for run
+        
+    Yields:
+        tuple: (language code, path to the translated video)
+        
+    Raises:
+        Exception: If the job fails
+    """
+    results = queue.Queue()
+    finished = object()
+    errors = []
+    
+    def worker():
+        try:
+            run(*args, on_result=lambda lang_code, output_path: results.put((lang_code, output_path)), **kwargs)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            results.put(finished)
+    
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(worker,), name="pipeline", daemon=True)
+    thread.start()
+    while True:
+        item = results.get()
+        if item is finished:
+            break
+        yield item
+    thread.join()
+    if errors:
+        raise errors[0]
+
+def iter_pipeline(video_file, source_lang, target_langs, progress=None, on_warning=None, job_id=None, probe=None):
+    """
+    Run the pipeline and yield each language's video as soon as it is ready.
+    
+    Args:
+        video_file (str): Path to the input video file
+        source_lang (str): Source language name
+        target_langs (list): List of target language names
+        progress (callable, optional): Called as progress(fraction, description)
+        on_warning (callable, optional): Called with a message when output is degraded
+        job_id (str, optional): Job identifier, generated if omitted
+        probe (tuple, optional): (size in bytes, duration in seconds) from
+            src.admission.probe_upload, so the upload is not probed again
+        
+    Yields:
+        tuple: (language code, path to the translated video)
+        
+    Raises:
+        Exception: If processing fails
+    """
+    yield from iter_results(run_pipeline, video_file, source_lang, target_langs, progress, on_warning, job_id,
+                            probe=probe)
+
+def _run_pipeline(job_id, video_file, video_bytes, duration, source_lang, target_langs, progress, on_warning, on_result):
+    """
+    Run the translation pipeline for a single job, tracing every stage.
+    
+    Args:
+        job_id (str): Job identifier attached to all spans
+        video_file (str): Path to the uploaded video file
+        video_bytes (int): Size of the uploaded video, from admission
+        duration (float): Video duration in seconds, from admission
+        source_lang (str): Source language name
+        target_langs (list): List of target language names
+        progress (callable): Called as progress(fraction, description)
+        on_warning (callable): Called with a message when output is degraded
+        on_result (callable): Called as on_result(lang_code, output_path) per finished language
+        
+    Returns:
+        list: List of paths to translated videos
+    """
+    try:
+        # Convert language names to codes
+        source_lang_code = LANGUAGES[source_lang]
+        target_lang_codes = [LANGUAGES[lang] for lang in target_langs]
+        
+        # Copy the upload into the job directory, where it is kept for re-renders
+        preflight(video_bytes)
+        work_dir = job_dir(job_id)
+        clip_dir = work_dir / "clips"
+        video_path = work_dir / "input_video.mp4"
+        shutil.copy2(video_file, video_path)
+        
+        logger.info(f"Processing video: {video_path} (job {job_id}, {duration:.1f} seconds)")
+        logger.info(f"Source language: {source_lang} ({source_lang_code})")
+        logger.info(f"Target languages: {', '.join(target_langs)} ({', '.join(target_lang_codes)})")
+        
+        # Make room for the render before writing anything large
+        preflight(*estimate_job_bytes(video_bytes, duration, len(target_lang_codes)))
+        
+        # Extract audio
+        progress(0.1, "Extracting audio...")
+        with span("stage.extract", media_seconds=duration):
+            audio_path = extract_audio(video_path, scratch_dir(job_id) / "input_audio.wav")
+        
+        # Separate the original music and effects from the voice
+        background_path = None
+        if SEPARATE_BACKGROUND:
+            progress(0.15, "Separating background audio...")
+            with span("stage.separate", media_seconds=duration):
+                background_path = separate_background(audio_path, work_dir / "background.wav")
+        
+        # Generate subtitles
+        progress(0.2, "Generating subtitles...")
+        with span("stage.transcribe", lang=source_lang_code, media_seconds=duration) as s:
+            segmentation = transcribe_segments(audio_path, source_lang_code)
+            s.set("cues", len(segmentation.cues))
+            s.set("units", len(segmentation.units))
+        
+        # Translate whole sentence units, then split them back into display cues
+        progress(0.3, "Translating subtitles...")
+        with span("stage.translate", langs=",".join(target_lang_codes),
+                  media_seconds=duration * len(target_lang_codes)):
+            translated_units = translate_cues(
+                segmentation.units, target_lang_codes,
+                progress_callback=lambda done, total: progress(0.3 + 0.1 * done / total, "Translating subtitles...")
+            )
+        translated_cues = {
+            lang_code: segmentation.display_cues(lang_units)
+            for lang_code, lang_units in translated_units.items()
+        }
+        
+        # SRT files are only written once per language, for ffmpeg's subtitles filter
+        translated_srt_paths = {
+            lang_code: lang_cues.to_srt(work_dir / f"subtitles_{lang_code}.srt")
+            for lang_code, lang_cues in translated_cues.items()
+        }
+        unit_paths = {
+            lang_code: lang_units.to_srt(work_dir / f"units_{lang_code}.srt")
+            for lang_code, lang_units in translated_units.items()
+        }
+        
+        job_info = {
+            "job_id": job_id,
+            "video_path": str(video_path),
+            "duration": duration,
+            "background_path": str(background_path) if background_path else None,
+            "subtitle_mode": SUBTITLE_MODE,
+            "clip_dir": str(clip_dir)
+        }
+        
+        # Finish each language (speech, then video) before starting the next,
+        # so the first dub is delivered without waiting for the others
+        output_videos = []
+        step = 0.55 / len(translated_units)
+        for i, (lang_code, lang_units) in enumerate(translated_units.items()):
+            progress_val = 0.4 + step * i
+            lang_name = [k for k, v in LANGUAGES.items() if v == lang_code][0]
+            message = f"Generating {lang_name} audio..."
+            progress(progress_val, message)
+            with span("stage.synthesize", lang=lang_code, media_seconds=duration):
+                audio_path = generate_translated_audio(
+                    lang_units, lang_code, duration,
+                    background_path=background_path,
+                    output_path=work_dir / f"audio_{lang_code}.wav",
+                    clip_dir=clip_dir,
+                    progress_callback=lambda done, total, base=progress_val, msg=message: progress(base + step * 0.8 * done / total, msg)
+                )
+            
+            # Combine video, audio, and subtitles
+            progress(progress_val + step * 0.8, f"Creating {lang_name} video...")
+            with span("stage.combine", lang=lang_code, media_seconds=duration) as s:
+                output_path = combine_video_audio_subtitles(
+                    video_path, audio_path, translated_srt_paths[lang_code],
+                    OUTPUT_DIR / f"{job_id}_translated_{lang_code}.mp4"
+                )
+                s.set("bytes_out", Path(output_path).stat().st_size)
+            register_artifacts(job_id, output_path)
+            output_videos.append(output_path)
+            
+            # Saved after every language, so finished languages can be re-rendered right away;
+            # merged into the saved manifest so revisions from those re-renders are kept
+            entry = {
+                "subtitles": str(translated_srt_paths[lang_code]),
+                "units": str(unit_paths[lang_code]),
+                "audio": str(audio_path),
+                "output": str(output_path),
+                "revision": 0
+            }
+            
+            def add_language(manifest, lang_code=lang_code, entry=entry):
+                manifest.update(job_info)
+                manifest.setdefault("languages", {})[lang_code] = entry
+            
+            update_manifest(job_id, add_language)
+            on_result(lang_code, output_path)
+        
+        logger.info(f"Provider stats: {provider_stats()}")
+        degraded = degraded_providers()
+        if degraded:
+            on_warning(f"Some providers were degraded ({', '.join(degraded)}); parts of the output may be untranslated or silent.")
+            
+        progress(1.0, "Translation complete!")
+        return output_videos
+        
+    except Exception as e:
+        logger.error(f"Video processing failed: {str(e)}", exc_info=True)
+        raise Exception(f"Video processing failed: {str(e)}")
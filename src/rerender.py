@@ -0,0 +1,255 @@
+"""
+Incremental re-dub after subtitle edits.
+
+Given edited subtitles for a finished job, only cues whose timing or text
+changed are re-synthesized, the mixed audio track is patched in place (via a
+memory map) over the affected time ranges only, and the result is re-muxed.
+With soft subtitles the video stream is copied, so a small fix takes seconds.
+"""
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.logger import get_logger
+from src.utils.tracing import job_context, span, run_traced, record
+from src.subtitles.cues import CueTrack, load_cues
+from src.subtitles.segmenter import regroup
+from src.audio.generator import clip_path, find_clip, synthesize_cue
+from src.audio.loudness import clip_gain, db_to_gain, duck_reduction_db, peak_ceiling
+from src.audio.wavio import open_wav, to_int16
+from src.video.processor import combine_video_audio_subtitles
+from src.jobs import job_exists, job_lock, load_manifest, update_manifest
+from src.lifecycle import job_lease, register_artifacts, preflight
+from config import OUTPUT_DIR, DUCK_BACKGROUND
+
+logger = get_logger(__name__)
+
+# Clips starting this long before a patched range are checked for overlap
+MAX_CLIP_SECONDS = 30
+
+def diff_cues(old, new):
+    """
+    Find cues that were removed from or added to a track.
+
+    A cue is identified by its start, end and text, so a retimed cue counts as
+    one removal and one addition.
+
+    Args:
+        old (CueTrack): Previous cues
+        new (CueTrack): Edited cues
+
+    Returns:
+        tuple: (indices of removed cues in old, indices of added cues in new)
+    """
+    def keys(track):
+        return [(start, end, text.strip()) for start, end, text in track]
+
+    old_keys = keys(old)
+    new_keys = keys(new)
+    unmatched = Counter(new_keys)
+    unmatched.subtract(Counter(old_keys))
+
+    removed, added = [], []
+    surplus_old = Counter({k: -v for k, v in unmatched.items() if v < 0})
+    for i, key in enumerate(old_keys):
+        if surplus_old[key] > 0:
+            surplus_old[key] -= 1
+            removed.append(i)
+    surplus_new = Counter({k: v for k, v in unmatched.items() if v > 0})
+    for i, key in enumerate(new_keys):
+        if surplus_new[key] > 0:
+            surplus_new[key] -= 1
+            added.append(i)
+    return removed, added
+
+def _clip_pcm(mp3_path, sample_rate, channels):
+    """Decode a TTS clip to PCM next to it (once) and memory-map it."""
+    wav_path = mp3_path.with_suffix(".wav")
+    if not wav_path.exists():
+        cmd = [
+            'ffmpeg', '-i', str(mp3_path),
+            '-ar', str(sample_rate), '-ac', str(channels),
+            '-acodec', 'pcm_s16le', '-y', str(wav_path)
+        ]
+        process = run_traced("ffmpeg.decode_clip", cmd, inputs=[mp3_path], outputs=[wav_path])
+        if process.returncode != 0:
+            raise Exception(f"Clip decoding failed: {process.stderr}")
+    else:
+        record("cache_hits")
+    return open_wav(wav_path)
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def _cue_ranges(track, indices, clip_dir, lang, sample_rate, channels):
+    """Frame ranges covered by the given cues' clips (or the cues, if no clip exists)."""
+    ranges = []
+    for i in indices:
+        start = int(track.starts[i]) * sample_rate // 1000
+        end = int(track.ends[i]) * sample_rate // 1000
+        path = find_clip(clip_dir, track.texts[i], lang) if track.texts[i].strip() else None
+        if path is not None:
+            end = max(end, start + _clip_pcm(path, sample_rate, channels).frames)
+        ranges.append((start, end))
+    return ranges
+
+def patch_audio(audio_path, base_path, cues, clip_dir, lang, ranges):
+    """
+    Re-mix the audio track in place over the given frame ranges.
+
+    Clips get the same cached normalization gain as in the full mix. Ducking
+    is approximated by a fixed background reduction under speech, and the
+    limiter by clipping at the true-peak ceiling.
+
+    Args:
+        audio_path (str): Mixed 16-bit PCM WAV to patch
+        base_path (str): Background track, or None for silence
+        cues (CueTrack): The current cues
+        clip_dir (Path): TTS clip cache directory
+        lang (str): Language code of the cues
+        ranges (list): (start_frame, end_frame) ranges to re-mix
+
+    Returns:
+        int: Number of frames rewritten
+    """
+    rewritten = 0
+    track = open_wav(audio_path, "r+")
+    base = open_wav(base_path) if base_path else None
+    duck = db_to_gain(-duck_reduction_db()) if DUCK_BACKGROUND else 1.0
+    ceiling = peak_ceiling()
+    try:
+        sample_rate, channels = track.sample_rate, track.channels
+        starts = cues.starts * sample_rate // 1000
+        max_clip_frames = MAX_CLIP_SECONDS * sample_rate
+
+        for start, end in _merge_ranges(ranges):
+            start, end = max(0, start), min(track.frames, end)
+            if end <= start:
+                continue
+            speech = np.zeros((end - start, channels), dtype=np.float32)
+            voiced = np.zeros(end - start, dtype=bool)
+
+            candidates = np.nonzero((starts < end) & (starts > start - max_clip_frames))[0]
+            for i in candidates:
+                text = cues.texts[i].strip()
+                path = find_clip(clip_dir, text, lang) if text else None
+                if path is None:
+                    continue
+                clip = _clip_pcm(path, sample_rate, channels)
+                clip_start = int(starts[i])
+                low = max(start, clip_start)
+                high = min(end, clip_start + clip.frames)
+                if high > low:
+                    gain = db_to_gain(clip_gain(path)) / 32768.0
+                    speech[low - start:high - start] += clip.data[low - clip_start:high - clip_start] * gain
+                    voiced[low - start:high - start] = True
+
+            mix = speech
+            if base:
+                bed = base.read(start, end - start)
+                bed[voiced] *= duck
+                mix = bed + speech
+            np.clip(mix, -ceiling, ceiling, out=mix)
+            track.data[start:end] = to_int16(mix)
+            rewritten += end - start
+        track.flush()
+    finally:
+        track.close()
+        if base:
+            base.close()
+    return rewritten
+
+def rerender_job(job_id, edited_subtitles, progress=None):
+    """
+    Re-render a finished job after subtitle edits.
+
+    Args:
+        job_id (str): Job identifier returned by the pipeline
+        edited_subtitles (dict): Mapping of language code to an edited SRT path or CueTrack
+        progress (callable, optional): Called as progress(fraction, description)
+
+    Returns:
+        list: Paths to the re-rendered videos
+
+    Raises:
+        Exception: If re-rendering fails
+    """
+    progress = progress or (lambda *args: None)
+    try:
+        if not job_exists(job_id):
+            raise Exception(f"Unknown job: {job_id}")
+        outputs = []
+
+        # Leased before the manifest is read, so the job cannot be evicted in between;
+        # re-renders of a job run one at a time, so each gets its own revision
+        with job_context(job_id), job_lease(job_id), job_lock(job_id, "rerender"):
+            manifest = load_manifest(job_id)
+            if manifest.get("distributed"):
+                raise Exception(f"Job {job_id} was rendered on distributed workers and cannot be re-rendered")
+            clip_dir = Path(manifest["clip_dir"])
+            # Each re-rendered language writes one new video
+            preflight(int(Path(manifest["video_path"]).stat().st_size * 1.5) * len(edited_subtitles))
+            for n, (lang, subtitles) in enumerate(edited_subtitles.items()):
+                entry = manifest["languages"].get(lang)
+                if entry is None:
+                    raise Exception(f"Job {job_id} has no {lang} render")
+                progress(n / len(edited_subtitles), f"Re-rendering {lang}...")
+
+                with span("stage.rerender", lang=lang) as s:
+                    old_cues = CueTrack.from_srt(entry["subtitles"], lang)
+                    new_cues = load_cues(subtitles, lang)
+                    # Audio is voiced per sentence unit; map the edited display cues back onto units
+                    if entry.get("units"):
+                        old = CueTrack.from_srt(entry["units"], lang)
+                        new = regroup(old, old_cues, new_cues)
+                    else:
+                        old, new = old_cues, new_cues
+                    removed, added = diff_cues(old, new)
+                    s.set("cues_removed", len(removed))
+                    s.set("cues_added", len(added))
+                    logger.info(f"Job {job_id} ({lang}): {len(removed)} cues removed, {len(added)} added")
+
+                    if not removed and not added and old_cues.to_srt_string() == new_cues.to_srt_string():
+                        outputs.append(Path(entry["output"]))
+                        continue
+
+                    # Re-synthesize only the new cue texts; cached clips are reused
+                    for i in added:
+                        text = new.texts[i].strip()
+                        if text and find_clip(clip_dir, text, lang) is None:
+                            synthesize_cue(text, lang, clip_path(clip_dir, text, lang))
+
+                    with open_wav(entry["audio"]) as track:
+                        sample_rate, channels = track.sample_rate, track.channels
+                    ranges = (_cue_ranges(old, removed, clip_dir, lang, sample_rate, channels)
+                              + _cue_ranges(new, added, clip_dir, lang, sample_rate, channels))
+                    frames = patch_audio(entry["audio"], manifest.get("background_path"), new, clip_dir, lang, ranges)
+                    s.set("patched_seconds", frames / sample_rate)
+
+                    new_cues.to_srt(entry["subtitles"])
+                    if entry.get("units"):
+                        new.to_srt(entry["units"])
+                    entry["revision"] = entry.get("revision", 0) + 1
+                    output_path = OUTPUT_DIR / f"{job_id}_translated_{lang}_r{entry['revision']}.mp4"
+                    entry["output"] = str(combine_video_audio_subtitles(
+                        manifest["video_path"], entry["audio"], entry["subtitles"], output_path,
+                        subtitle_mode=manifest.get("subtitle_mode")
+                    ))
+                    register_artifacts(job_id, entry["output"])
+                    outputs.append(Path(entry["output"]))
+
+                # Merged into the current manifest, which the pipeline may have extended meanwhile
+                update_manifest(job_id, lambda current: current["languages"].update({lang: entry}))
+
+        progress(1.0, "Re-render complete!")
+        return outputs
+    except Exception as e:
+        logger.error(f"Re-render failed: {str(e)}", exc_info=True)
+        raise Exception(f"Re-render failed: {str(e)}")
@@ -0,0 +1,186 @@
+"""
+Compact in-memory subtitle cue model.
+
+Cues are held as NumPy arrays of start/end times in milliseconds plus a list of
+texts, and passed between stages in memory. SRT/VTT are only read or written
+at the edges (transcription output, ffmpeg input, user uploads).
+"""
+import re
+from pathlib import Path
+
+import numpy as np
+
+_TIMING_PATTERN = re.compile(
+    r"(?:(\d+):)?(\d{2}):(\d{2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{2}):(\d{2})[,.](\d{1,3})"
+)
+
+
+def _to_ms(hours, minutes, seconds, millis):
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, "0"))
+
+
+def _format_time(ms, separator):
+    hours, ms = divmod(int(ms), 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+class CueTrack:
+    """
+    Subtitle cues for one language.
+
+    Attributes:
+        starts (np.ndarray): Cue start times in milliseconds (int64)
+        ends (np.ndarray): Cue end times in milliseconds (int64)
+        texts (list): Cue texts
+        lang (str): Language code, if known
+    """
+
+    __slots__ = ("starts", "ends", "texts", "lang")
+
+    def __init__(self, starts, ends, texts, lang=None):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.texts = list(texts)
+        self.lang = lang
+        if not (len(self.starts) == len(self.ends) == len(self.texts)):
+            raise ValueError("Cue starts, ends and texts must have the same length")
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+
+    @property
+    def durations(self):
+        """np.ndarray: Cue durations in milliseconds."""
+        return self.ends - self.starts
+
+    def with_texts(self, texts, lang=None):
+        """
+        Create a track with new texts that shares this track's timing arrays.
+
+        Args:
+            texts (list): Replacement texts, one per cue
+            lang (str, optional): Language code of the new texts
+
+        Returns:
+            CueTrack: New track
+        """
+        track = CueTrack.__new__(CueTrack)
+        track.starts = self.starts
+        track.ends = self.ends
+        track.texts = list(texts)
+        track.lang = lang if lang is not None else self.lang
+        if len(track.texts) != len(self.starts):
+            raise ValueError("Replacement texts must have one entry per cue")
+        return track
+
+    @classmethod
+    def from_srt_string(cls, content, lang=None):
+        """
+        Parse SRT (or WebVTT) text.
+
+        Args:
+            content (str): Subtitle file contents
+            lang (str, optional): Language code
+
+        Returns:
+            CueTrack: Parsed cues
+        """
+        starts, ends, texts = [], [], []
+        for block in re.split(r"\r?\n\s*\r?\n", content.lstrip("\ufeff").strip()):
+            lines = block.strip().splitlines()
+            for i, line in enumerate(lines):
+                match = _TIMING_PATTERN.search(line)
+                if match:
+                    groups = match.groups()
+                    starts.append(_to_ms(*groups[:4]))
+                    ends.append(_to_ms(*groups[4:]))
+                    texts.append("\n".join(lines[i + 1:]).strip())
+                    break
+        return cls(starts, ends, texts, lang)
+
+    @classmethod
+    def from_srt(cls, path, lang=None):
+        """
+        Load cues from an SRT or VTT file.
+
+        Args:
+            path (str): Path to the subtitle file
+            lang (str, optional): Language code
+
+        Returns:
+            CueTrack: Parsed cues
+        """
+        return cls.from_srt_string(Path(path).read_text(encoding="utf-8-sig"), lang)
+
+    def to_srt_string(self):
+        """
+        Serialize the cues as SRT.
+
+        Returns:
+            str: SRT file contents
+        """
+        blocks = []
+        for i, (start, end, text) in enumerate(self, 1):
+            blocks.append(f"{i}\n{_format_time(start, ',')} --> {_format_time(end, ',')}\n{text}\n")
+        return "\n".join(blocks)
+
+    def to_vtt_string(self):
+        """
+        Serialize the cues as WebVTT.
+
+        Returns:
+            str: VTT file contents
+        """
+        blocks = ["WEBVTT\n"]
+        for start, end, text in self:
+            blocks.append(f"{_format_time(start, '.')} --> {_format_time(end, '.')}\n{text}\n")
+        return "\n".join(blocks)
+
+    def to_srt(self, path):
+        """
+        Write the cues to an SRT file.
+
+        Args:
+            path (str): Destination path
+
+        Returns:
+            Path: Path to the written file
+        """
+        path = Path(path)
+        path.write_text(self.to_srt_string(), encoding="utf-8")
+        return path
+
+    def to_vtt(self, path):
+        """
+        Write the cues to a WebVTT file.
+
+        Args:
+            path (str): Destination path
+
+        Returns:
+            Path: Path to the written file
+        """
+        path = Path(path)
+        path.write_text(self.to_vtt_string(), encoding="utf-8")
+        return path
+
+
+def load_cues(subtitles, lang=None):
+    """
+    Accept either an in-memory track or a subtitle file path.
+
+    Args:
+        subtitles (CueTrack or str): Cues or path to an SRT/VTT file
+        lang (str, optional): Language code used when loading from a file
+
+    Returns:
+        CueTrack: The cues
+    """
+    if isinstance(subtitles, CueTrack):
+        return subtitles
+    return CueTrack.from_srt(subtitles, lang)
@@ -0,0 +1,302 @@
+"""
+Sentence-level segmentation of transcribed words.
+
+AssemblyAI's SRT export breaks captions by character count, often mid-sentence,
+so translating and voicing its cues means many tiny requests, half-sentence
+translations and choppy prosody. Here the transcript's words are regrouped into
+sentence units using punctuation, word timestamps and an energy-based voice
+activity pass over the audio. Units are what get translated and voiced; the
+subtitles keep display-sized cues, filled by splitting each translated unit in
+proportion to the source text each cue held.
+"""
+import re
+
+import numpy as np
+
+from src.utils.logger import get_logger
+from src.subtitles.cues import CueTrack
+from src.audio.wavio import open_wav
+from config import (
+    SEGMENT_PAUSE_MS, SEGMENT_MAX_SECONDS, SUBTITLE_MAX_CHARS, SUBTITLE_MAX_SECONDS,
+    VAD_FRAME_MS, VAD_THRESHOLD_DB
+)
+
+logger = get_logger(__name__)
+
+_SENTENCE_END = re.compile(r"[.!?。！？।][\"')\]”]*$")
+_CLAUSE_END = re.compile(r"[,;:、，；：][\"')\]”]*$")
+
+# Texts without spaces longer than this are split by character (e.g. Chinese, Japanese)
+_MIN_CHAR_SPLIT = 10
+
+
+class Segmentation:
+    """
+    Sentence units and the display cues they are shown as.
+
+    Attributes:
+        units (CueTrack): Sentence units, translated and voiced as a whole
+        cues (CueTrack): Display-sized subtitle cues
+        unit_index (np.ndarray): Index of the unit each display cue belongs to
+    """
+
+    __slots__ = ("units", "cues", "unit_index")
+
+    def __init__(self, units, cues, unit_index):
+        self.units = units
+        self.cues = cues
+        self.unit_index = np.asarray(unit_index, dtype=np.int64)
+
+    @classmethod
+    def from_cues(cls, cues):
+        """
+        Use existing cues as both units and display cues.
+
+        Args:
+            cues (CueTrack): Subtitle cues
+
+        Returns:
+            Segmentation: One unit per cue
+        """
+        return cls(cues, cues, np.arange(len(cues)))
+
+    def display_cues(self, units):
+        """
+        Split translated units into display cues.
+
+        Each unit's text is divided between its display cues in proportion to
+        the source text length of each cue, breaking at word boundaries. Cues
+        left without text are dropped.
+
+        Args:
+            units (CueTrack): Translated units, with the same timing as self.units
+
+        Returns:
+            CueTrack: Display cues in the units' language
+        """
+        if self.cues is self.units:
+            return self.cues.with_texts(units.texts, units.lang)
+
+        lengths = np.array([max(1, len(text)) for text in self.cues.texts], dtype=np.float64)
+        starts, ends, texts = [], [], []
+        for unit in range(len(units)):
+            members = np.flatnonzero(self.unit_index == unit)
+            if len(members) == 0:
+                continue
+            pieces = _split_text(units.texts[unit], lengths[members] / lengths[members].sum())
+            for cue, piece in zip(members, pieces):
+                if piece:
+                    starts.append(self.cues.starts[cue])
+                    ends.append(self.cues.ends[cue])
+                    texts.append(piece)
+        return CueTrack(starts, ends, texts, units.lang)
+
+
+def _split_text(text, shares):
+    """Split text into len(shares) pieces at word boundaries, sized by share."""
+    text = text.strip()
+    if len(shares) == 1:
+        return [text]
+    if " " not in text and len(text) > _MIN_CHAR_SPLIT:
+        tokens, joiner = list(text), ""
+    else:
+        tokens, joiner = text.split(), " "
+    if not tokens:
+        return [""] * len(shares)
+
+    cumulative = np.cumsum([len(token) + len(joiner) for token in tokens])
+    targets = np.cumsum(shares)[:-1] * cumulative[-1]
+    # Cut after the token whose cumulative length is closest to each target
+    cuts = [0]
+    for target in targets:
+        cut = int(np.abs(cumulative - target).argmin()) + 1
+        cuts.append(min(len(tokens), max(cut, cuts[-1])))
+    cuts.append(len(tokens))
+    return [joiner.join(tokens[a:b]) for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+def speech_mask(audio_path, frame_ms=VAD_FRAME_MS, threshold_db=VAD_THRESHOLD_DB):
+    """
+    Flag frames that contain speech using short-time energy.
+
+    Frames louder than the noise floor (10th percentile level) by threshold_db
+    count as speech. The file is read through a memory map in chunks.
+
+    Args:
+        audio_path (str): Path to a 16-bit PCM WAV
+        frame_ms (int): Frame length in milliseconds
+        threshold_db (float): Margin above the noise floor
+
+    Returns:
+        np.ndarray: Boolean speech flag per frame
+    """
+    levels = []
+    with open_wav(audio_path) as audio:
+        frame = max(1, audio.sample_rate * frame_ms // 1000)
+        for _, block in audio.chunks(frame * 1000):
+            count = len(block) // frame
+            if count == 0:
+                continue
+            samples = block[:count * frame].astype(np.float32).mean(axis=1) / 32768.0
+            power = (samples.reshape(count, frame) ** 2).mean(axis=1)
+            levels.append(10 * np.log10(power + 1e-10))
+
+    if not levels:
+        return np.zeros(0, dtype=bool)
+    levels = np.concatenate(levels)
+    threshold = max(np.percentile(levels, 10) + threshold_db, -60.0)
+    return levels > threshold
+
+
+def _longest_silence(mask, frame_ms, start_ms, end_ms):
+    """Longest run of non-speech in milliseconds between two times."""
+    if end_ms <= start_ms:
+        return 0
+    if mask is None:
+        return end_ms - start_ms
+    frames = mask[start_ms // frame_ms:-(-end_ms // frame_ms)]
+    if len(frames) == 0:
+        return end_ms - start_ms
+    silent = np.concatenate(([0], (~frames).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(silent))
+    if len(edges) == 0:
+        return 0
+    return int((edges[1::2] - edges[::2]).max()) * frame_ms
+
+
+def segment_words(words, mask=None, frame_ms=VAD_FRAME_MS, lang=None):
+    """
+    Group timed words into sentence units and display-sized cues.
+
+    A unit ends at sentence-final punctuation, at a pause of at least
+    SEGMENT_PAUSE_MS (measured on the speech mask when given, otherwise from the
+    word timestamps), or when it would exceed SEGMENT_MAX_SECONDS. Each unit is
+    then split into cues of at most SUBTITLE_MAX_CHARS and SUBTITLE_MAX_SECONDS,
+    preferring clause breaks.
+
+    Args:
+        words (list): Objects with text, start and end (milliseconds)
+        mask (np.ndarray, optional): Speech flags from speech_mask
+        frame_ms (int): Frame length of the mask
+        lang (str, optional): Language code
+
+    Returns:
+        Segmentation: Sentence units and display cues
+    """
+    texts = [word.text.strip() for word in words]
+    starts = np.array([word.start for word in words], dtype=np.int64)
+    ends = np.array([word.end for word in words], dtype=np.int64)
+    max_unit_ms = SEGMENT_MAX_SECONDS * 1000
+    max_cue_ms = SUBTITLE_MAX_SECONDS * 1000
+
+    unit_spans = []
+    first = 0
+    for i in range(len(texts)):
+        if i == len(texts) - 1:
+            boundary = True
+        else:
+            boundary = (
+                _SENTENCE_END.search(texts[i]) is not None
+                or _longest_silence(mask, frame_ms, int(ends[i]), int(starts[i + 1])) >= SEGMENT_PAUSE_MS
+                or ends[i + 1] - starts[first] > max_unit_ms
+            )
+        if boundary:
+            unit_spans.append((first, i + 1))
+            first = i + 1
+
+    unit_starts, unit_ends, unit_texts = [], [], []
+    cue_starts, cue_ends, cue_texts, unit_index = [], [], [], []
+    for unit, (first, last) in enumerate(unit_spans):
+        unit_starts.append(starts[first])
+        unit_ends.append(ends[last - 1])
+        unit_texts.append(" ".join(texts[first:last]))
+
+        cue_first = first
+        chars = 0
+        for j in range(first, last):
+            added = len(texts[j]) + (1 if j > cue_first else 0)
+            if j > cue_first and (chars + added > SUBTITLE_MAX_CHARS or ends[j] - starts[cue_first] > max_cue_ms):
+                cue_starts.append(starts[cue_first])
+                cue_ends.append(ends[j - 1])
+                cue_texts.append(" ".join(texts[cue_first:j]))
+                unit_index.append(unit)
+                cue_first = j
+                chars = len(texts[j])
+            else:
+                chars += added
+            if j < last - 1 and chars >= SUBTITLE_MAX_CHARS // 2 and _CLAUSE_END.search(texts[j]):
+                cue_starts.append(starts[cue_first])
+                cue_ends.append(ends[j])
+                cue_texts.append(" ".join(texts[cue_first:j + 1]))
+                unit_index.append(unit)
+                cue_first = j + 1
+                chars = 0
+        if cue_first < last:
+            cue_starts.append(starts[cue_first])
+            cue_ends.append(ends[last - 1])
+            cue_texts.append(" ".join(texts[cue_first:last]))
+            unit_index.append(unit)
+
+    logger.info(f"Segmented {len(texts)} words into {len(unit_spans)} units and {len(cue_texts)} cues")
+    return Segmentation(
+        CueTrack(unit_starts, unit_ends, unit_texts, lang),
+        CueTrack(cue_starts, cue_ends, cue_texts, lang),
+        unit_index
+    )
+
+
+def regroup(units, old_cues, new_cues):
+    """
+    Rebuild sentence units after display cues were edited.
+
+    Cues are assigned to the unit their start falls in. Units whose cue texts
+    are unchanged keep their text (and so their cached TTS clip); changed units
+    take the joined text of their edited cues, and cues outside every unit
+    become units of their own. A unit with a retimed cue spans its edited cues.
+
+    Args:
+        units (CueTrack): Units the old cues were split from
+        old_cues (CueTrack): Display cues before the edit
+        new_cues (CueTrack): Edited display cues
+
+    Returns:
+        CueTrack: Units matching the edited cues
+    """
+    def assign(cues):
+        owner = np.searchsorted(units.starts, cues.starts, side="right") - 1
+        groups, orphans = {}, []
+        for i, unit in enumerate(owner.tolist()):
+            if unit >= 0 and cues.starts[i] < units.ends[unit]:
+                groups.setdefault(unit, []).append(i)
+            else:
+                orphans.append(i)
+        return groups, orphans
+
+    old_groups, _ = assign(old_cues)
+    new_groups, orphans = assign(new_cues)
+
+    rows = []
+    for unit, members in new_groups.items():
+        new_texts = [" ".join(new_cues.texts[i].split()) for i in members]
+        old_texts = [" ".join(old_cues.texts[i].split()) for i in old_groups.get(unit, [])]
+        if new_texts == old_texts:
+            text = units.texts[unit]
+        else:
+            joiner = " " if " " in units.texts[unit].strip() else ""
+            text = joiner.join(t for t in new_texts if t)
+        old_members = old_groups.get(unit, [])
+        new_times = [(int(new_cues.starts[i]), int(new_cues.ends[i])) for i in members]
+        old_times = [(int(old_cues.starts[i]), int(old_cues.ends[i])) for i in old_members]
+        if new_times != old_times:
+            # A retimed cue moves its unit, so the dub follows the edited timing
+            start = min(t[0] for t in new_times)
+            end = max(t[1] for t in new_times)
+        else:
+            start = int(units.starts[unit])
+            end = max(int(units.ends[unit]), int(new_cues.ends[members].max()))
+        rows.append((start, end, text))
+    for i in orphans:
+        rows.append((int(new_cues.starts[i]), int(new_cues.ends[i]), " ".join(new_cues.texts[i].split())))
+
+    rows.sort(key=lambda row: row[0])
+    return CueTrack([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], units.lang)
@@ -3,61 +3,149 @@ Speech-to-text transcription for subtitle generation.
 """
 import os
 from pathlib import Path
-import assemblyai as aai
 
 from src.utils.logger import get_logger
-from config import ASSEMBLYAI_API_KEY, OUTPUT_DIR
+from src.subtitles.cues import CueTrack
+from src.subtitles.segmenter import Segmentation, segment_words, speech_mask
+from config import get_assemblyai_api_key, OUTPUT_DIR, SENTENCE_SEGMENTATION
 
 logger = get_logger(__name__)
 
-# Configure AssemblyAI
-aai.settings.api_key = ASSEMBLYAI_API_KEY
+_aai = None
 
-def generate_subtitles(audio_path, language_code="en"):
+def _get_assemblyai():
     """
-    Generate subtitles using AssemblyAI's speech recognition.
+    Import and configure the AssemblyAI SDK on first use.
+    
+    Returns:
+        module: The configured assemblyai module
+        
+    Raises:
+        ValueError: If the API key is not configured
+    """
+    global _aai
+    if _aai is None:
+        import assemblyai as aai
+        aai.settings.api_key = get_assemblyai_api_key()
+        _aai = aai
+    return _aai
+
+def _transcribe(audio_path, language_code):
+    """
+    Run AssemblyAI transcription on an audio file.
+    
+    Args:
+        audio_path (Path): Path to the audio file
+        language_code (str): Language code for transcription
+        
+    Returns:
+        Transcript: AssemblyAI transcript object
+        
+    Raises:
+        Exception: If the transcription result is invalid
+    """
+    aai = _get_assemblyai()
+    
+    # Configure transcription options
+    config = aai.TranscriptionConfig(
+        language_code=language_code,
+        punctuate=True,
+        format_text=True
+    )
+    
+    # Transcribe audio
+    transcriber = aai.Transcriber()
+    transcript = transcriber.transcribe(str(audio_path), config=config)
+    
+    if not transcript or not hasattr(transcript, 'export_subtitles_srt'):
+        error_message = "Transcription failed or returned invalid result"
+        logger.error(error_message)
+        raise Exception(error_message)
+    return transcript
+
+def transcribe_cues(audio_path, language_code="en"):
+    """
+    Transcribe audio into an in-memory cue track.
     
     Args:
         audio_path (str): Path to the audio file
         language_code (str): Language code for transcription
         
     Returns:
-        Path: Path to the generated SRT subtitle file
+        CueTrack: Transcribed cues
         
     Raises:
-        Exception: If subtitle generation fails
+        Exception: If transcription fails
+    """
+    try:
+        audio_path = Path(audio_path)
+        logger.info(f"Transcribing audio with AssemblyAI: {audio_path}")
+        
+        transcript = _transcribe(audio_path, language_code)
+        cues = CueTrack.from_srt_string(transcript.export_subtitles_srt(), language_code)
+        
+        logger.info(f"Transcription successful: {len(cues)} cues")
+        return cues
+    except Exception as e:
+        logger.error(f"Subtitle generation failed: {str(e)}", exc_info=True)
+        raise Exception(f"Subtitle generation failed: {str(e)}")
+
+def transcribe_segments(audio_path, language_code="en"):
+    """
+    Transcribe audio into sentence units for translation/TTS and display cues for subtitles.
+    
+    Uses the transcript's word timestamps and a voice activity pass over the
+    audio; falls back to AssemblyAI's caption cues when word timings are not
+    available or SENTENCE_SEGMENTATION is disabled.
+    
+    Args:
+        audio_path (str): Path to the extracted WAV audio
+        language_code (str): Language code for transcription
+        
+    Returns:
+        Segmentation: Sentence units and display cues
+        
+    Raises:
+        Exception: If transcription fails
     """
     try:
         audio_path = Path(audio_path)
         logger.info(f"Transcribing audio with AssemblyAI: {audio_path}")
         
-        # Create output filename
-        audio_name = audio_path.stem
-        srt_path = OUTPUT_DIR / f"{audio_name}_subtitles.srt"
-        
-        # Configure transcription options
-        config = aai.TranscriptionConfig(
-            language_code=language_code,
-            punctuate=True,
-            format_text=True
-        )
-        
-        # Transcribe audio
-        transcriber = aai.Transcriber()
-        transcript = transcriber.transcribe(str(audio_path), config=config)
-        
-        if not transcript or not hasattr(transcript, 'export_subtitles_srt'):
-            error_message = "Transcription failed or returned invalid result"
-            logger.error(error_message)
-            raise Exception(error_message)
-        
-        # Export as SRT
-        logger.info(f"Saving subtitles to: {srt_path}")
-        with open(srt_path, "w", encoding="utf-8") as f:
-            f.write(transcript.export_subtitles_srt())
-            
-        logger.info(f"Subtitle generation successful: {srt_path}")
-        return srt_path
+        transcript = _transcribe(audio_path, language_code)
+        words = getattr(transcript, 'words', None) or []
+        if SENTENCE_SEGMENTATION and words:
+            try:
+                mask = speech_mask(audio_path)
+            except Exception as e:
+                logger.warning(f"Voice activity detection failed, using word gaps only: {str(e)}")
+                mask = None
+            return segment_words(words, mask, lang=language_code)
+        
+        cues = CueTrack.from_srt_string(transcript.export_subtitles_srt(), language_code)
+        logger.info(f"Transcription successful: {len(cues)} cues")
+        return Segmentation.from_cues(cues)
     except Exception as e:
         logger.error(f"Subtitle generation failed: {str(e)}", exc_info=True)
         raise Exception(f"Subtitle generation failed: {str(e)}")
+
+def generate_subtitles(audio_path, language_code="en"):
+    """
+    Generate subtitles using AssemblyAI's speech recognition.
+    
+    Args:
+        audio_path (str): Path to the audio file
+        language_code (str): Language code for transcription
+        
+    Returns:
+        Path: Path to the generated SRT subtitle file
+        
+    Raises:
+        Exception: If subtitle generation fails
+    """
+    audio_path = Path(audio_path)
+    srt_path = OUTPUT_DIR / f"{audio_path.stem}_subtitles.srt"
+    cues = transcribe_cues(audio_path, language_code)
+    
+    logger.info(f"Saving subtitles to: {srt_path}")
+    return cues.to_srt(srt_path)
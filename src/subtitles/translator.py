@@ -1,78 +1,103 @@
 """
 Translation of subtitles into target languages.
 """
-import os
-from pathlib import Path
-import time
 from tqdm import tqdm
-import pysrt
-from deep_translator import GoogleTranslator
 
-from src.utils.logger import get_logger
-from config import OUTPUT_DIR, MAX_RETRY_ATTEMPTS
+from src.utils.logger import get_logger, log_sampled
+from src.subtitles.cues import CueTrack, load_cues
+from src.utils.ratelimit import get_provider, ProviderUnavailable
+from src.utils.tracing import record
+from config import OUTPUT_DIR, SERVER_MODE
 
 logger = get_logger(__name__)
 
-def translate_subtitles(srt_path, target_langs):
+def translate_cues(cues, target_langs, progress_callback=None):
     """
-    Translate subtitles to target languages.
+    Translate an in-memory cue track to target languages.
+    
+    Every language is translated from the source texts; the translated tracks
+    share the source track's timing arrays.
     
     Args:
-        srt_path (str): Path to the SRT subtitle file
+        cues (CueTrack): Source cues
         target_langs (list): List of target language codes
+        progress_callback (callable, optional): Called as progress_callback(done, total)
+            after each subtitle; replaces the console progress bar when given
         
     Returns:
-        dict: Dictionary mapping language codes to translated SRT file paths
+        dict: Dictionary mapping language codes to translated CueTracks
         
     Raises:
         Exception: If translation fails
     """
     try:
-        srt_path = Path(srt_path)
-        logger.info(f"Loading subtitles from: {srt_path}")
+        record("cues", len(cues))
         
-        # Load subtitles
-        subs = pysrt.open(srt_path, encoding="utf-8")
-        logger.info(f"Loaded {len(subs)} subtitles from SRT file")
+        # Imported lazily so the SDK only loads when translation actually runs
+        from deep_translator import GoogleTranslator
         
         results = {}
+        guard = get_provider("translate")
+        total = len(cues) * len(target_langs)
+        done = 0
+        show_bar = progress_callback is None and not SERVER_MODE
         
         for lang_code in target_langs:
             logger.info(f"Translating to language code: {lang_code}")
-            translated_subs = subs[:]  # Create a copy
             translator = GoogleTranslator(source="auto", target=lang_code)
+            texts = []
             
             # Translate each subtitle with progress bar
-            for i, sub in enumerate(tqdm(translated_subs, desc=f"Translating to {lang_code}")):
-                retry_count = 0
-                original_text = sub.text
-                
-                while retry_count < MAX_RETRY_ATTEMPTS:
-                    try:
-                        sub.text = translator.translate(original_text)
-                        break
-                    except Exception as e:
-                        retry_count += 1
-                        logger.warning(f"Translation attempt {retry_count} failed: {str(e)}")
-                        time.sleep(1)  # Delay between retries
-                        
-                        # If final retry, preserve original text
-                        if retry_count == MAX_RETRY_ATTEMPTS:
-                            logger.warning(f"Failed to translate subtitle after {MAX_RETRY_ATTEMPTS} attempts")
-                            sub.text = original_text
+            for i, original_text in enumerate(tqdm(cues.texts, desc=f"Translating to {lang_code}", disable=not show_bar)):
+                try:
+                    texts.append(guard.call(translator.translate, original_text))
+                except ProviderUnavailable:
+                    # Circuit is open: keep the original text without waiting
+                    texts.append(original_text)
+                except Exception as e:
+                    log_sampled(logger, f"translate_failed_{lang_code}", f"Failed to translate subtitle {i} to {lang_code}: {str(e)}")
+                    texts.append(original_text)
                 
-                # Log progress periodically
-                if (i + 1) % 20 == 0 or i == len(translated_subs) - 1:
-                    logger.info(f"Translated {i+1}/{len(translated_subs)} subtitles to {lang_code}")
+                done += 1
+                if progress_callback is not None:
+                    progress_callback(done, total)
             
-            # Save translated subtitles
-            output_path = OUTPUT_DIR / f"subtitles_{lang_code}.srt"
-            logger.info(f"Saving translated subtitles to: {output_path}")
-            translated_subs.save(str(output_path), encoding='utf-8')
-            results[lang_code] = output_path
+            logger.info(f"Translated {len(texts)} subtitles to {lang_code}")
+            if guard.degraded:
+                logger.warning(f"Translation provider degraded; some {lang_code} subtitles kept original text")
+            
+            results[lang_code] = cues.with_texts(texts, lang_code)
             
         logger.info(f"Successfully translated subtitles to {len(results)} languages")
         return results
     except Exception as e:
         logger.error(f"Translation failed: {str(e)}", exc_info=True)
         raise Exception(f"Translation failed: {str(e)}")
+
+def translate_subtitles(subtitles, target_langs, progress_callback=None):
+    """
+    Translate subtitles to target languages and save them as SRT files.
+    
+    Args:
+        subtitles (str or CueTrack): Path to the SRT subtitle file, or in-memory cues
+        target_langs (list): List of target language codes
+        progress_callback (callable, optional): Called as progress_callback(done, total)
+            after each subtitle; replaces the console progress bar when given
+        
+    Returns:
+        dict: Dictionary mapping language codes to translated SRT file paths
+        
+    Raises:
+        Exception: If translation fails
+    """
+    if not isinstance(subtitles, CueTrack):
+        logger.info(f"Loading subtitles from: {subtitles}")
+    cues = load_cues(subtitles)
+    logger.info(f"Loaded {len(cues)} subtitles")
+    
+    results = {}
+    for lang_code, translated in translate_cues(cues, target_langs, progress_callback).items():
+        output_path = OUTPUT_DIR / f"subtitles_{lang_code}.srt"
+        logger.info(f"Saving translated subtitles to: {output_path}")
+        results[lang_code] = translated.to_srt(output_path)
+    return results
@@ -3,42 +3,55 @@ Centralized logging configuration for the application.
 """
 import sys
 import os
+import time
+import threading
 from loguru import logger
 from pathlib import Path
 
-from config import DEBUG, OUTPUT_DIR
+from config import DEBUG, OUTPUT_DIR, ensure_directories, LOG_ENQUEUE, LOG_JSON, LOG_SAMPLE_INTERVAL, LOG_SAMPLE_BURST
 
-# Create logs directory
+# Create output, temp and logs directories
+ensure_directories()
 LOGS_DIR = OUTPUT_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
 # Configure logger
 logger.remove()  # Remove default handler
 
-# Add console handler
+# With enqueue=True records are handed to a background thread, so sink I/O
+# never blocks the pipeline threads that emit them
 log_level = "DEBUG" if DEBUG else "INFO"
+file_format = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+# Add console handler
 logger.add(
     sys.stderr,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level=log_level
+    level=log_level,
+    enqueue=LOG_ENQUEUE,
+    serialize=LOG_JSON
 )
 
 # Add file handler for errors
 logger.add(
     LOGS_DIR / "error_{time:YYYY-MM-DD}.log",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+    format=file_format,
     level="ERROR",
     rotation="1 day",
-    retention="7 days"
+    retention="7 days",
+    enqueue=LOG_ENQUEUE,
+    serialize=LOG_JSON
 )
 
 # Add file handler for all logs
 logger.add(
     LOGS_DIR / "app_{time:YYYY-MM-DD}.log",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+    format=file_format,
     level=log_level,
     rotation="1 day",
-    retention="3 days"
+    retention="3 days",
+    enqueue=LOG_ENQUEUE,
+    serialize=LOG_JSON
 )
 
 # Export the configured logger
@@ -53,3 +66,37 @@ def get_logger(name):
         logger: Configured logger instance
     """
     return logger.bind(name=name)
+
+_sample_lock = threading.Lock()
+_sample_state = {}
+
+def log_sampled(log, key, message, level="WARNING"):
+    """
+    Log a repetitive message at most LOG_SAMPLE_BURST times per LOG_SAMPLE_INTERVAL.
+    
+    Suppressed occurrences are counted and reported with the next logged message
+    for the same key.
+    
+    Args:
+        log (logger): Logger instance from get_logger
+        key (str): Identifies the kind of message being rate limited
+        message (str): Message to log
+        level (str): Log level name
+    
+    Returns:
+        bool: True if the message was logged
+    """
+    now = time.monotonic()
+    with _sample_lock:
+        window_start, count, suppressed = _sample_state.get(key, (now, 0, 0))
+        if now - window_start >= LOG_SAMPLE_INTERVAL:
+            window_start, count = now, 0
+        if count >= LOG_SAMPLE_BURST:
+            _sample_state[key] = (window_start, count, suppressed + 1)
+            return False
+        _sample_state[key] = (window_start, count + 1, 0)
+    
+    if suppressed:
+        message = f"{message} ({suppressed} similar messages suppressed)"
+    log.opt(depth=1).log(level, message)
+    return True
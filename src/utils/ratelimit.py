@@ -0,0 +1,371 @@
+"""
+Process-wide rate limiting and circuit breaking for external providers.
+
+Every call to Google Translate or gTTS goes through a shared ``ProviderGuard``
+so concurrent jobs draw from the same token bucket instead of retrying in lockstep.
+"""
+import re
+import json
+import random
+import threading
+import time
+
+from src.utils.logger import get_logger
+from src.utils.tracing import record
+from config import (
+    PROVIDER_RATE_LIMITS, PROVIDER_MIN_RATE, PROVIDER_RATE_INCREASE,
+    PROVIDER_RATE_DECREASE, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+    CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN, MAX_RETRY_ATTEMPTS
+)
+
+logger = get_logger(__name__)
+
+_STATUS_PATTERN = re.compile(r"\b(429|5\d\d)\b")
+# Exception class names raised by socket, requests and urllib3 when the provider cannot be reached
+_NETWORK_PATTERN = re.compile(r"Connection|Timeout|Timed?Out|ProtocolError|SSLError")
+# Provider errors that retrying cannot fix (bad input, unsupported language, bad credentials),
+# matched by name so the SDKs stay lazily imported
+_CLIENT_ERROR_NAMES = {
+    "NotValidPayload", "NotValidLength", "LanguageNotSupportedException",
+    "InvalidSourceOrTargetLanguage", "AuthorizationException"
+}
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider's circuit is open and calls fail fast."""
+
+
+def classify_error(error):
+    """
+    Classify a provider exception.
+
+    Args:
+        error (Exception): Exception raised by the provider client
+
+    Returns:
+        str: "throttled" for 429 responses, "network" for connection failures
+            and timeouts, "client" for other 4xx responses and known invalid
+            requests, "server" otherwise (5xx and unrecognized failures, such as
+            deep_translator's bare RequestError or an empty gTTS clip)
+    """
+    status = None
+    for attr in ("rsp", "response"):
+        response = getattr(error, attr, None)
+        if response is not None and hasattr(response, "status_code"):
+            status = response.status_code
+            break
+
+    if status is None:
+        if "TooManyRequests" in type(error).__name__:
+            status = 429
+        else:
+            match = _STATUS_PATTERN.search(str(error))
+            if match:
+                status = int(match.group(1))
+
+    if status == 429:
+        return "throttled"
+    if status is not None and 500 <= status < 600:
+        return "server"
+    if status is not None and 400 <= status < 500:
+        return "client"
+    if _is_network_error(error):
+        return "network"
+    if _is_client_error(error):
+        return "client"
+    return "server"
+
+
+def _is_client_error(error):
+    """Check whether an exception is a known non-retryable request error."""
+    if any(cls.__name__ in _CLIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    # gTTS raises ValueError for unsupported languages; a garbled JSON response is still the provider's fault
+    return isinstance(error, (ValueError, TypeError)) and not isinstance(error, json.JSONDecodeError)
+
+
+def _is_network_error(error):
+    """Check an exception and the errors it was raised from for connection failures."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        if any(_NETWORK_PATTERN.search(cls.__name__) for cls in type(error).__mro__):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate adapts with AIMD.
+
+    The rate grows additively after each success and is cut multiplicatively
+    on throttling or server errors, so it settles at the provider's real ceiling.
+    """
+
+    def __init__(self, rate, min_rate=PROVIDER_MIN_RATE, max_rate=None,
+                 increase=PROVIDER_RATE_INCREASE, decrease=PROVIDER_RATE_DECREASE):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Block until a token is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        """Additively increase the rate after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        """Multiplicatively decrease the rate and drain the bucket."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with a single half-open probe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=CIRCUIT_BREAKER_THRESHOLD, cooldown=CIRCUIT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Check whether a call may proceed.
+
+        Returns:
+            bool: False while the circuit is open
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self.state = self.CLOSED
+
+    def release_probe(self):
+        """Let another half-open probe through without changing the state."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        """
+        Record a failed call.
+
+        Returns:
+            bool: True if this failure opened the circuit
+        """
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                return opened
+            return False
+
+
+class ProviderGuard:
+    """
+    Rate limiter, retry policy and circuit breaker for one provider.
+    """
+
+    def __init__(self, name, rate):
+        self.name = name
+        self.bucket = AdaptiveTokenBucket(rate)
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "network_errors": 0,
+            "client_errors": 0,
+            "retries": 0,
+            "rejected": 0,
+            "wait_seconds": 0.0
+        }
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.counters[key] += value
+
+    @property
+    def degraded(self):
+        return self.breaker.state != CircuitBreaker.CLOSED
+
+    def call(self, fn, *args, attempts=MAX_RETRY_ATTEMPTS, **kwargs):
+        """
+        Call a provider function under rate limiting and retries.
+
+        Throttling, server and network errors back off, retry and count toward
+        the circuit breaker; errors that cannot be classified are treated as
+        server errors. Client errors (bad input, unsupported language) say
+        nothing about the provider's health and are raised at once.
+
+        Args:
+            fn (callable): Provider call to execute
+            attempts (int): Maximum number of attempts
+
+        Returns:
+            Any: Return value of ``fn``
+
+        Raises:
+            ProviderUnavailable: If the circuit is open
+            Exception: A client error, or the last provider error once attempts are exhausted
+        """
+        last_error = None
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise ProviderUnavailable(f"{self.name} provider is unavailable (circuit open)")
+
+            self._count("wait_seconds", self.bucket.acquire())
+            self._count("requests")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                last_error = e
+                self._count("failures")
+                kind = classify_error(e)
+                if kind == "client":
+                    self._count("client_errors")
+                    # The provider answered, so a half-open probe has done its job
+                    self.breaker.release_probe()
+                    raise
+                if kind == "network":
+                    self._count("network_errors")
+                else:
+                    self._count("throttled" if kind == "throttled" else "server_errors")
+                    self.bucket.on_throttle()
+                if self.breaker.record_failure():
+                    logger.warning(f"Circuit opened for {self.name} provider after repeated failures")
+
+                if attempt + 1 < attempts:
+                    self._count("retries")
+                    record("retries")
+                    # Full jitter keeps concurrent jobs from retrying in lockstep
+                    backoff = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt))
+                    time.sleep(random.uniform(0, backoff))
+                continue
+
+            self._count("successes")
+            self.bucket.on_success()
+            self.breaker.record_success()
+            return result
+
+        raise last_error
+
+    def stats(self):
+        """
+        Get a snapshot of this provider's counters.
+
+        Returns:
+            dict: Counter values plus current rate and circuit state
+        """
+        with self._lock:
+            stats = dict(self.counters)
+        stats["rate"] = self.bucket.rate
+        stats["state"] = self.breaker.state
+        return stats
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_provider(name):
+    """
+    Get the process-wide guard for a provider.
+
+    Args:
+        name (str): Provider name (e.g., 'translate', 'tts')
+
+    Returns:
+        ProviderGuard: Shared guard instance
+    """
+    with _guards_lock:
+        if name not in _guards:
+            rate = PROVIDER_RATE_LIMITS.get(name, 1.0)
+            _guards[name] = ProviderGuard(name, rate)
+        return _guards[name]
+
+
+def provider_stats():
+    """
+    Get counters for every provider used in this process.
+
+    Returns:
+        dict: Mapping of provider name to its stats
+    """
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.stats() for guard in guards}
+
+
+def degraded_providers():
+    """
+    Get the providers whose circuit is currently not closed.
+
+    Returns:
+        list: Names of degraded providers
+    """
+    with _guards_lock:
+        guards = list(_guards.values())
+    return [guard.name for guard in guards if guard.degraded]
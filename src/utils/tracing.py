@@ -0,0 +1,385 @@
+"""
+Structured tracing and per-stage timing metrics for the pipeline.
+
+Spans are written as JSON lines and aggregated into Prometheus-style metrics.
+If OpenTelemetry is installed and enabled, spans are mirrored to it as well.
+"""
+import io
+import json
+import os
+import time
+import uuid
+import tempfile
+import threading
+import subprocess
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.utils.logger import get_logger, LOGS_DIR
+from config import TRACE_FILE, METRICS_FILE, METRICS_PORT, OTEL_ENABLED
+
+logger = get_logger(__name__)
+
+TRACE_PATH = Path(TRACE_FILE) if TRACE_FILE else LOGS_DIR / "traces.jsonl"
+METRICS_PATH = Path(METRICS_FILE) if METRICS_FILE else LOGS_DIR / "metrics.prom"
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_child_cpu_lock = threading.Lock()
+_stage_metrics = {}
+_counters = {}
+
+_otel_tracer = None
+if OTEL_ENABLED:
+    try:
+        from opentelemetry import trace as otel_trace
+        _otel_tracer = otel_trace.get_tracer("linguastream")
+    except ImportError:
+        logger.warning("OTEL_ENABLED is set but opentelemetry is not installed")
+
+
+class Span:
+    """
+    A timed unit of work with structured attributes.
+    """
+
+    def __init__(self, name, parent=None, **attrs):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.parent_id = parent.span_id if parent else None
+        self.job_id = _current_job.get()
+        self.attrs = attrs
+        self.status = "ok"
+        self.error = None
+        self.child_cpu = 0.0
+
+    def set(self, key, value):
+        """Set an attribute on the span."""
+        self.attrs[key] = value
+
+    def incr(self, key, amount=1):
+        """Increment a numeric attribute on the span."""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def add_child_cpu(self, seconds):
+        """Attribute a child process's CPU time to this span and its ancestors."""
+        with _child_cpu_lock:
+            span_obj = self
+            while span_obj is not None:
+                span_obj.child_cpu += seconds
+                span_obj = span_obj.parent
+
+
+@contextmanager
+def job_context(job_id=None):
+    """
+    Bind a job ID to all spans created inside the block.
+
+    Args:
+        job_id (str, optional): Job identifier, generated if omitted
+
+    Yields:
+        str: The job ID
+    """
+    job_id = job_id or uuid.uuid4().hex[:12]
+    token = _current_job.set(job_id)
+    try:
+        yield job_id
+    finally:
+        _current_job.reset(token)
+
+
+def current_job_id():
+    """Get the job ID bound to the current context, if any."""
+    return _current_job.get()
+
+
+def record(key, amount=1):
+    """
+    Increment an attribute on the active span, if there is one.
+
+    Args:
+        key (str): Attribute name (e.g., 'retries', 'cache_hits')
+        amount (int): Increment
+    """
+    span_obj = _current_span.get()
+    if span_obj is not None:
+        span_obj.incr(key, amount)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block of work and emit it as a span.
+
+    CPU time covers the calling thread plus the processes started through
+    run_traced inside the block, each measured on its own, so ffmpeg work is
+    attributed to the stage that ran it even while other jobs run. Work handed
+    to other threads is only counted through the spans they open.
+
+    Args:
+        name (str): Span name, used as the stage label in metrics
+        **attrs: Initial span attributes
+
+    Yields:
+        Span: The active span
+    """
+    span_obj = Span(name, parent=_current_span.get(), **attrs)
+    token = _current_span.set(span_obj)
+    otel_cm = _otel_tracer.start_as_current_span(name) if _otel_tracer else None
+    otel_span = otel_cm.__enter__() if otel_cm else None
+
+    wall_start = time.time()
+    perf_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield span_obj
+    except BaseException as e:
+        span_obj.status = "error"
+        span_obj.error = str(e)
+        raise
+    finally:
+        wall = time.perf_counter() - perf_start
+        cpu = (time.thread_time() - cpu_start) + span_obj.child_cpu
+        _current_span.reset(token)
+        _finish(span_obj, wall_start, wall, cpu)
+        if otel_cm:
+            for key, value in span_obj.attrs.items():
+                if isinstance(value, (str, bool, int, float)):
+                    otel_span.set_attribute(key, value)
+            otel_span.set_attribute("job_id", span_obj.job_id or "")
+            otel_cm.__exit__(None, None, None)
+
+
+def _finish(span_obj, started, wall, cpu):
+    entry = {
+        "name": span_obj.name,
+        "span_id": span_obj.span_id,
+        "parent_id": span_obj.parent_id,
+        "job_id": span_obj.job_id,
+        "start": started,
+        "wall_s": round(wall, 6),
+        "cpu_s": round(cpu, 6),
+        "status": span_obj.status,
+        "attrs": span_obj.attrs
+    }
+    if span_obj.error:
+        entry["error"] = span_obj.error
+
+    try:
+        line = json.dumps(entry, default=str)
+        with _write_lock:
+            with open(TRACE_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except Exception as e:
+        logger.warning(f"Failed to write trace span: {str(e)}")
+
+    with _metrics_lock:
+        stage = _stage_metrics.setdefault(span_obj.name, {
+            "count": 0, "errors": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+            "bytes_in": 0, "bytes_out": 0, "retries": 0, "cache_hits": 0, "media_seconds": 0.0
+        })
+        stage["count"] += 1
+        stage["errors"] += span_obj.status == "error"
+        stage["wall_seconds"] += wall
+        stage["cpu_seconds"] += cpu
+        for key in ("bytes_in", "bytes_out", "retries", "cache_hits", "media_seconds"):
+            value = span_obj.attrs.get(key)
+            if isinstance(value, (int, float)):
+                stage[key] += value
+
+    logger.debug(f"Span {span_obj.name} finished in {wall:.3f}s (cpu {cpu:.3f}s)")
+
+
+def incr_counter(name, amount=1):
+    """
+    Increment a process-wide counter exported with the metrics.
+
+    Args:
+        name (str): Counter name
+        amount (int): Increment
+    """
+    with _metrics_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def stage_metrics():
+    """
+    Get a snapshot of the aggregated per-stage metrics.
+
+    Returns:
+        dict: Mapping of span name to aggregated values
+    """
+    with _metrics_lock:
+        return {name: dict(values) for name, values in _stage_metrics.items()}
+
+
+def _file_size(path):
+    try:
+        return Path(path).stat().st_size
+    except (OSError, TypeError):
+        return 0
+
+
+def _run_measured(cmd):
+    """
+    Run a command to completion and measure the CPU time of that process alone.
+
+    Output is captured in temporary files instead of pipes, so the process can
+    be reaped with os.wait4, which reports its own resource usage.
+
+    Args:
+        cmd (list): Command to execute
+
+    Returns:
+        tuple: (subprocess.CompletedProcess with text stdout/stderr, CPU seconds)
+    """
+    if not hasattr(os, "wait4"):
+        return subprocess.run(cmd, capture_output=True, text=True), 0.0
+
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        process = subprocess.Popen(cmd, stdout=out, stderr=err)
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        process.returncode = os.waitstatus_to_exitcode(status)
+        outputs = []
+        for f in (out, err):
+            f.seek(0)
+            outputs.append(io.TextIOWrapper(f, errors="replace").read())
+    return subprocess.CompletedProcess(cmd, process.returncode, *outputs), usage.ru_utime + usage.ru_stime
+
+
+def run_traced(name, cmd, inputs=(), outputs=(), **attrs):
+    """
+    Run a subprocess inside a span, recording bytes in and out and its CPU time.
+
+    Args:
+        name (str): Span name
+        cmd (list): Command to execute
+        inputs (iterable): Input file paths counted as bytes in
+        outputs (iterable): Output file paths counted as bytes out
+        **attrs: Extra span attributes
+
+    Returns:
+        subprocess.CompletedProcess: Result with text stdout/stderr captured
+    """
+    with span(name, command=cmd[0], **attrs) as s:
+        s.set("bytes_in", sum(_file_size(p) for p in inputs))
+        process, cpu = _run_measured(cmd)
+        s.add_child_cpu(cpu)
+        s.set("returncode", process.returncode)
+        s.set("bytes_out", sum(_file_size(p) for p in outputs))
+        if process.returncode != 0:
+            s.status = "error"
+        return process
+
+
+def prometheus_text():
+    """
+    Render current metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics text
+    """
+    from src.utils.ratelimit import provider_stats
+
+    lines = []
+    stages = stage_metrics()
+    for metric, help_text in (
+        ("count", "Number of completed spans"),
+        ("errors", "Number of failed spans"),
+        ("wall_seconds", "Total wall-clock seconds"),
+        ("cpu_seconds", "Total CPU seconds including child processes"),
+        ("bytes_in", "Total input bytes"),
+        ("bytes_out", "Total output bytes"),
+        ("retries", "Total provider retries"),
+        ("cache_hits", "Total cache hits"),
+        ("media_seconds", "Total seconds of media processed")
+    ):
+        full_name = f"linguastream_stage_{metric}_total"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} counter")
+        for stage, values in sorted(stages.items()):
+            lines.append(f'{full_name}{{stage="{stage}"}} {values[metric]}')
+
+    with _metrics_lock:
+        counters = dict(_counters)
+    for name, value in sorted(counters.items()):
+        lines.append(f"# TYPE linguastream_{name}_total counter")
+        lines.append(f"linguastream_{name}_total {value}")
+
+    for provider, stats in sorted(provider_stats().items()):
+        for key, value in stats.items():
+            if key == "state":
+                for state in ("closed", "open", "half_open"):
+                    lines.append(f'linguastream_provider_circuit_state{{provider="{provider}",state="{state}"}} {int(value == state)}')
+            elif key == "rate":
+                lines.append(f'linguastream_provider_rate{{provider="{provider}"}} {value}')
+            else:
+                lines.append(f'linguastream_provider_{key}_total{{provider="{provider}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=None):
+    """
+    Write the current metrics to a Prometheus text file.
+
+    The file is replaced atomically so a node exporter never reads a partial file.
+
+    Args:
+        path (str, optional): Destination path, defaults to METRICS_PATH
+
+    Returns:
+        Path: Path to the metrics file
+    """
+    path = Path(path) if path else METRICS_PATH
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(prometheus_text(), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """
+    Serve Prometheus metrics over HTTP in a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 disables the server
+
+    Returns:
+        ThreadingHTTPServer: The running server, or None if disabled
+    """
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Metrics endpoint listening on port {port}")
+    return server
@@ -3,16 +3,17 @@ Video processing utilities for combining video, audio, and subtitles.
 """
 import os
 import shutil
-import subprocess
 from pathlib import Path
 import tempfile
 
 from src.utils.logger import get_logger
-from config import OUTPUT_DIR, SUBTITLE_FONT_SIZE
+from src.utils.tracing import run_traced
+from src.lifecycle import unique_output_path
+from config import TEMP_DIR, SUBTITLE_FONT_SIZE, SUBTITLE_MODE, MP4_MOVFLAGS, ISO639_2_CODES
 
 logger = get_logger(__name__)
 
-def combine_video_audio_subtitles(video_path, audio_path, srt_path, output_path=None):
+def combine_video_audio_subtitles(video_path, audio_path, srt_path, output_path=None, subtitle_mode=None):
     """
     Combine video with translated audio and subtitles.
     
@@ -21,6 +22,8 @@ def combine_video_audio_subtitles(video_path, audio_path, srt_path, output_path=
         audio_path (str): Path to the translated audio file
         srt_path (str): Path to the subtitle file
         output_path (str, optional): Path for the output video
+        subtitle_mode (str, optional): "burn" to render subtitles into the video or
+            "soft" to add a subtitle track and stream-copy the video; defaults to SUBTITLE_MODE
         
     Returns:
         Path: Path to the output video
@@ -36,7 +39,7 @@ def combine_video_audio_subtitles(video_path, audio_path, srt_path, output_path=
         # Generate output path if not provided
         if output_path is None:
             lang_code = srt_path.stem.split('_')[-1]
-            output_path = OUTPUT_DIR / f"{video_path.stem}_translated_{lang_code}.mp4"
+            output_path = unique_output_path(f"{video_path.stem}_translated_{lang_code}_", ".mp4")
         else:
             output_path = Path(output_path)
             
@@ -55,11 +58,17 @@ def combine_video_audio_subtitles(video_path, audio_path, srt_path, output_path=
                    f"Subtitles: {srt_path.stat().st_size} bytes")
         
         # Try different methods to combine
-        methods = [
-            combine_method_subtitles_filter,
-            combine_method_with_temp,
-            combine_method_no_subtitles
-        ]
+        if (subtitle_mode or SUBTITLE_MODE) == "soft":
+            methods = [
+                combine_method_soft_subtitles,
+                combine_method_no_subtitles
+            ]
+        else:
+            methods = [
+                combine_method_subtitles_filter,
+                combine_method_with_temp,
+                combine_method_no_subtitles
+            ]
         
         success = False
         error_messages = []
@@ -118,12 +127,14 @@ def combine_method_subtitles_filter(video_path, audio_path, srt_path, output_pat
         '-c:a', 'aac',  # Audio codec
         '-strict', 'experimental',
         '-b:a', '192k',  # Audio bitrate
+        '-movflags', MP4_MOVFLAGS,  # Progressive playback
         '-y',  # Overwrite output
         str(output_path)
     ]
     
     logger.debug(f"Running command: {' '.join(cmd)}")
-    process = subprocess.run(cmd, capture_output=True, text=True)
+    process = run_traced("ffmpeg.combine_subtitles_filter", cmd,
+                         inputs=[video_path, audio_path, srt_path], outputs=[output_path])
     
     if process.returncode != 0:
         error_message = f"FFmpeg subtitles filter method failed: {process.stderr}"
@@ -148,7 +159,7 @@ def combine_method_with_temp(video_path, audio_path, srt_path, output_path):
     logger.info(f"Using temporary file method")
     
     # Create temporary directory
-    temp_dir = Path(tempfile.mkdtemp(prefix="video_combine_", dir=OUTPUT_DIR / "temp"))
+    temp_dir = Path(tempfile.mkdtemp(prefix="video_combine_", dir=TEMP_DIR))
     try:
         # Step 1: Combine video with audio
         temp_video_audio = temp_dir / "video_with_audio.mp4"
@@ -166,7 +177,8 @@ def combine_method_with_temp(video_path, audio_path, srt_path, output_path):
         ]
         
         logger.debug(f"Running command (step 1): {' '.join(cmd1)}")
-        process1 = subprocess.run(cmd1, capture_output=True, text=True)
+        process1 = run_traced("ffmpeg.combine_temp_mux", cmd1,
+                              inputs=[video_path, audio_path], outputs=[temp_video_audio])
         
         if process1.returncode != 0:
             error_message = f"Step 1 failed: {process1.stderr}"
@@ -179,12 +191,14 @@ def combine_method_with_temp(video_path, audio_path, srt_path, output_path):
             '-i', str(temp_video_audio),
             '-vf', f"subtitles={str(srt_path)}:force_style='FontSize={SUBTITLE_FONT_SIZE}'",
             '-c:a', 'copy',
+            '-movflags', MP4_MOVFLAGS,
             '-y',
             str(output_path)
         ]
         
         logger.debug(f"Running command (step 2): {' '.join(cmd2)}")
-        process2 = subprocess.run(cmd2, capture_output=True, text=True)
+        process2 = run_traced("ffmpeg.combine_temp_subtitles", cmd2,
+                              inputs=[temp_video_audio, srt_path], outputs=[output_path])
         
         if process2.returncode != 0:
             error_message = f"Step 2 failed: {process2.stderr}"
@@ -200,6 +214,52 @@ def combine_method_with_temp(video_path, audio_path, srt_path, output_path):
         except Exception as e:
             logger.warning(f"Failed to clean up temp directory: {str(e)}")
 
+def combine_method_soft_subtitles(video_path, audio_path, srt_path, output_path):
+    """
+    Combine video, audio, and a soft subtitle track without re-encoding the video.
+    
+    Args:
+        video_path (Path): Path to the video file
+        audio_path (Path): Path to the translated audio file
+        srt_path (Path): Path to the subtitle file
+        output_path (Path): Path for the output video
+        
+    Returns:
+        Path: Path to the output video
+    """
+    logger.info(f"Using soft subtitles method")
+    
+    # MP4 track languages are ISO 639-2 codes; "und" marks an unknown language
+    lang_code = ISO639_2_CODES.get(srt_path.stem.split('_')[-1], "und")
+    cmd = [
+        'ffmpeg',
+        '-i', str(video_path),
+        '-i', str(audio_path),
+        '-i', str(srt_path),
+        '-map', '0:v',
+        '-map', '1:a',
+        '-map', '2:s',
+        '-c:v', 'copy',  # Video is stream-copied
+        '-c:a', 'aac',
+        '-b:a', '192k',
+        '-c:s', 'mov_text',
+        '-metadata:s:s:0', f'language={lang_code}',
+        '-movflags', MP4_MOVFLAGS,
+        '-y',
+        str(output_path)
+    ]
+    
+    logger.debug(f"Running command: {' '.join(cmd)}")
+    process = run_traced("ffmpeg.combine_soft_subtitles", cmd,
+                         inputs=[video_path, audio_path, srt_path], outputs=[output_path])
+    
+    if process.returncode != 0:
+        error_message = f"Soft subtitles method failed: {process.stderr}"
+        logger.error(error_message)
+        raise Exception(error_message)
+    
+    return output_path
+
 def combine_method_no_subtitles(video_path, audio_path, srt_path, output_path):
     """
     Fallback method: Combine only video and audio without subtitles.
@@ -225,12 +285,14 @@ def combine_method_no_subtitles(video_path, audio_path, srt_path, output_path):
         '-strict', 'experimental',
         '-map', '0:v',
         '-map', '1:a',
+        '-movflags', MP4_MOVFLAGS,
         '-y',
         str(output_path)
     ]
     
     logger.debug(f"Running command: {' '.join(cmd)}")
-    process = subprocess.run(cmd, capture_output=True, text=True)
+    process = run_traced("ffmpeg.combine_no_subtitles", cmd,
+                         inputs=[video_path, audio_path], outputs=[output_path])
     
     if process.returncode != 0:
         error_message = f"Fallback method failed: {process.stderr}"
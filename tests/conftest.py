@@ -0,0 +1,15 @@
+"""
+Shared test setup: outputs go to a temporary directory and the repository
+root is importable, so the tests run from a clean checkout.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Set before config is imported anywhere
+os.environ["OUTPUT_DIR"] = tempfile.mkdtemp(prefix="linguastream-tests-")
+os.environ.pop("SCRATCH_DIR", None)
+os.environ.setdefault("ASSEMBLYAI_API_KEY", "test")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
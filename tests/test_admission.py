@@ -0,0 +1,82 @@
+"""
+Tests for job cost estimates and the admission queue.
+"""
+import threading
+
+import pytest
+
+from src import admission
+from src.admission import AdmissionController, AdmissionRejected, DEFAULT_STAGE_RATES, estimate_cost
+
+
+@pytest.fixture(autouse=True)
+def no_measurements(monkeypatch):
+    monkeypatch.setattr(admission, "stage_metrics", lambda: {})
+    monkeypatch.setattr(admission, "SEPARATE_BACKGROUND", False)
+
+
+def test_estimate_cost_scales_with_duration_and_languages():
+    per_job = DEFAULT_STAGE_RATES["stage.extract"] + DEFAULT_STAGE_RATES["stage.transcribe"]
+    per_language = sum(DEFAULT_STAGE_RATES[name] for name in
+                       ("stage.translate", "stage.synthesize", "stage.combine"))
+    assert estimate_cost(60, 1) == pytest.approx(60 * (per_job + per_language))
+    assert estimate_cost(60, 3) == pytest.approx(60 * (per_job + 3 * per_language))
+
+
+def test_estimate_cost_includes_separation(monkeypatch):
+    without = estimate_cost(60, 1)
+    monkeypatch.setattr(admission, "SEPARATE_BACKGROUND", True)
+    assert estimate_cost(60, 1) == pytest.approx(without + 60 * DEFAULT_STAGE_RATES["stage.separate"])
+
+
+def test_estimate_cost_uses_measured_rates(monkeypatch):
+    baseline = estimate_cost(100, 1)
+    measured = {"stage.combine": {"wall_seconds": 30.0, "media_seconds": 10.0},
+                "stage.unknown": {"wall_seconds": 1.0, "media_seconds": 1.0}}
+    monkeypatch.setattr(admission, "stage_metrics", lambda: measured)
+    expected = baseline + 100 * (3.0 - DEFAULT_STAGE_RATES["stage.combine"])
+    assert estimate_cost(100, 1) == pytest.approx(expected)
+
+
+def test_controller_admits_within_capacity():
+    controller = AdmissionController(max_active_cost=100, max_queued=0, max_load=0, timeout=1)
+    first = controller.acquire(60)
+    second = controller.acquire(40)
+    with pytest.raises(AdmissionRejected):
+        controller.acquire(10)
+    controller.release(first)
+    controller.release(second)
+
+
+def test_controller_always_admits_when_idle():
+    controller = AdmissionController(max_active_cost=10, max_queued=0, max_load=0, timeout=1)
+    controller.release(controller.acquire(1000))
+
+
+def test_queued_job_runs_after_release():
+    controller = AdmissionController(max_active_cost=100, max_queued=1, max_load=0, timeout=5)
+    running = controller.acquire(100)
+    waits = []
+    admitted = threading.Event()
+
+    def wait_for_capacity():
+        controller.release(controller.acquire(50, on_wait=waits.append))
+        admitted.set()
+
+    thread = threading.Thread(target=wait_for_capacity)
+    thread.start()
+    while not waits:
+        admitted.wait(0.01)
+    assert not admitted.is_set()
+    controller.release(running)
+    thread.join(5)
+    assert admitted.is_set()
+    assert waits[0] == 0
+
+
+def test_queued_job_times_out():
+    controller = AdmissionController(max_active_cost=100, max_queued=1, max_load=0, timeout=0.1)
+    running = controller.acquire(100)
+    with pytest.raises(AdmissionRejected):
+        controller.acquire(50)
+    controller.release(running)
@@ -0,0 +1,61 @@
+"""
+Tests for the in-memory cue model and its SRT/VTT round trip.
+"""
+import pytest
+
+from src.subtitles.cues import CueTrack, load_cues
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello there.
+
+2
+00:00:03,000 --> 00:01:04,020
+Two
+lines
+"""
+
+
+def test_srt_round_trip(tmp_path):
+    track = CueTrack.from_srt_string(SRT, lang="en")
+    assert track.starts.tolist() == [1000, 3000]
+    assert track.ends.tolist() == [2500, 64020]
+    assert track.texts == ["Hello there.", "Two\nlines"]
+
+    path = tmp_path / "cues.srt"
+    track.to_srt(path)
+    loaded = CueTrack.from_srt(path, lang="en")
+    assert list(loaded) == list(track)
+    assert loaded.lang == "en"
+
+
+def test_vtt_round_trip(tmp_path):
+    track = CueTrack.from_srt_string(SRT)
+    path = tmp_path / "cues.vtt"
+    track.to_vtt(path)
+    assert path.read_text(encoding="utf-8").startswith("WEBVTT")
+    assert list(CueTrack.from_srt(path)) == list(track)
+
+
+def test_parses_bom_crlf_and_short_timestamps():
+    content = "\ufeff1\r\n00:01.5 --> 00:02.25\r\nHi\r\n\r\n"
+    track = CueTrack.from_srt_string(content)
+    assert list(track) == [(1500, 2250, "Hi")]
+
+
+def test_with_texts_shares_timing():
+    track = CueTrack([0, 1000], [500, 1500], ["a", "b"], lang="en")
+    translated = track.with_texts(["x", "y"], lang="es")
+    assert translated.starts is track.starts
+    assert translated.texts == ["x", "y"]
+    assert translated.lang == "es"
+    with pytest.raises(ValueError):
+        track.with_texts(["x"])
+
+
+def test_load_cues_accepts_track_or_path(tmp_path):
+    track = CueTrack.from_srt_string(SRT)
+    assert load_cues(track) is track
+    path = tmp_path / "cues.srt"
+    track.to_srt(path)
+    assert list(load_cues(str(path))) == list(track)
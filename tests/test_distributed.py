@@ -0,0 +1,117 @@
+"""
+Tests for a distributed job run by a coordinator and workers on two nodes,
+using the in-process queue and store with stand-in stages.
+"""
+import threading
+
+import pytest
+
+from src.distributed import taskqueue, worker
+from src.distributed.coordinator import run_distributed
+from src.distributed.store import MemoryStore
+from src.distributed.taskqueue import MemoryQueue
+from src.distributed.worker import Worker
+
+VIDEO_BYTES = 200_000
+
+
+class RecordingQueue(MemoryQueue):
+    """Memory queue that remembers every task and the node that claimed it."""
+
+    def __init__(self):
+        super().__init__()
+        self.tasks = []
+        self.claims = {}
+
+    def submit(self, task):
+        self.tasks.append(task)
+        return super().submit(task)
+
+    def claim(self, node, stages=None):
+        task = super().claim(node, stages)
+        if task is not None:
+            self.claims[task["id"]] = node
+        return task
+
+
+def _write(io, name, size):
+    path = io.scratch(name)
+    path.write_bytes(b"\0" * size)
+    io.put(name, path)
+
+
+def fake_extract(io, args):
+    io.fetch("input_video.mp4")
+    _write(io, "input_audio.wav", 1000)
+    return {}
+
+
+def fake_transcribe(io, args):
+    io.fetch("input_audio.wav")
+    for name in ("units.srt", "cues.srt", "unit_index.json"):
+        _write(io, name, 100)
+    return {}
+
+
+def fake_translate(io, args):
+    io.fetch("units.srt")
+    for lang in args["langs"]:
+        _write(io, f"units_{lang}.srt", 100)
+        _write(io, f"subtitles_{lang}.srt", 100)
+    return {}
+
+
+def fake_synthesize(io, args):
+    io.fetch(f"units_{args['lang']}.srt")
+    _write(io, f"audio_{args['lang']}.wav", 5000)
+    return {}
+
+
+def fake_combine(io, args):
+    for name in ("input_video.mp4", f"audio_{args['lang']}.wav", f"subtitles_{args['lang']}.srt"):
+        io.fetch(name)
+    _write(io, f"output_{args['lang']}.mp4", 1000)
+    return {}
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    for stage, fn in (("extract", fake_extract), ("transcribe", fake_transcribe), ("translate", fake_translate),
+                      ("synthesize", fake_synthesize), ("combine", fake_combine)):
+        monkeypatch.setitem(worker.STAGES, stage, fn)
+    monkeypatch.setattr(taskqueue, "LOCALITY_WAIT", 0.2)
+
+
+def test_job_renders_where_the_video_is(fake_stages, tmp_path):
+    task_queue, store = RecordingQueue(), MemoryStore()
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"\0" * VIDEO_BYTES)
+
+    stop = threading.Event()
+    workers = [
+        Worker(task_queue, store, "node-a", ["extract", "transcribe", "translate", "combine"], poll_interval=0.01),
+        Worker(task_queue, store, "node-b", ["synthesize"], poll_interval=0.01)
+    ]
+    threads = [threading.Thread(target=w.run_forever, args=(stop,), daemon=True) for w in workers]
+    for thread in threads:
+        thread.start()
+    try:
+        outputs = run_distributed(str(video), "English", ["Spanish", "French"], job_id="d1",
+                                  task_queue=task_queue, store=store, probe=(VIDEO_BYTES, 5.0))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(5)
+
+    assert sorted(path.name for path in outputs) == ["d1_translated_es.mp4", "d1_translated_fr.mp4"]
+    combines = [task for task in task_queue.tasks if task["stage"] == "combine"]
+    assert len(combines) == 2
+    for task in combines:
+        # The video cached by the extract node outweighs the audio made on node-b
+        assert task["prefer"] == "node-a"
+        assert task_queue.claims[task["id"]] == "node-a"
+    assert all(task_queue.claims[t["id"]] == "node-b" for t in task_queue.tasks if t["stage"] == "synthesize")
+
+    # Tasks, results and artifacts are removed once the job ends
+    assert all(task_queue.result(t["id"]) is None for t in task_queue.tasks)
+    assert not store.exists("d1/input_video.mp4")
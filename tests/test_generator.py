@@ -0,0 +1,55 @@
+"""
+Tests for the TTS clip cache.
+"""
+from src.audio import generator
+from src.audio.generator import clip_path, find_clip, synthesize_cue
+
+LONG_TEXT = "word " * 40
+
+
+class DirectGuard:
+    def call(self, fn, *args, attempts=None, **kwargs):
+        return fn(*args, **kwargs)
+
+
+def fake_synthesize(text, lang, slow, audio_file):
+    if len(text) > 150:
+        raise ValueError("text too long")
+    audio_file.write_bytes(text.encode("utf-8"))
+
+
+def test_shortened_fallback_is_not_cached_under_full_text(monkeypatch, tmp_path):
+    monkeypatch.setattr(generator, "get_provider", lambda name: DirectGuard())
+    monkeypatch.setattr(generator, "_synthesize", fake_synthesize)
+    full_clip = clip_path(tmp_path, LONG_TEXT, "es")
+
+    saved = synthesize_cue(LONG_TEXT, "es", full_clip)
+
+    assert saved is not None and saved != full_clip
+    assert not full_clip.exists()
+    assert saved.read_text(encoding="utf-8").endswith("...")
+    assert find_clip(tmp_path, LONG_TEXT, "es") == saved
+    assert [path.name for path in tmp_path.iterdir()] == [saved.name]
+
+
+def test_full_text_clip_is_preferred(monkeypatch, tmp_path):
+    monkeypatch.setattr(generator, "get_provider", lambda name: DirectGuard())
+    monkeypatch.setattr(generator, "_synthesize", fake_synthesize)
+    synthesize_cue(LONG_TEXT, "es", clip_path(tmp_path, LONG_TEXT, "es"))
+
+    # A later render that can voice the full text caches it under its own key
+    monkeypatch.setattr(generator, "_synthesize", lambda text, lang, slow, audio_file: audio_file.write_bytes(b"full"))
+    full_clip = clip_path(tmp_path, LONG_TEXT, "es")
+    assert synthesize_cue(LONG_TEXT, "es", full_clip) == full_clip
+    assert find_clip(tmp_path, LONG_TEXT, "es") == full_clip
+
+
+def test_short_text_failure_stays_silent(monkeypatch, tmp_path):
+    def failing(text, lang, slow, audio_file):
+        raise ValueError("unsupported")
+
+    monkeypatch.setattr(generator, "get_provider", lambda name: DirectGuard())
+    monkeypatch.setattr(generator, "_synthesize", failing)
+    assert synthesize_cue("hola", "es", clip_path(tmp_path, "hola", "es")) is None
+    assert find_clip(tmp_path, "hola", "es") is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,72 @@
+"""
+Tests for job directories, manifests and job ID validation.
+"""
+import shutil
+import threading
+import time
+
+import pytest
+
+from src.jobs import (
+    JOBS_DIR, job_dir, job_exists, job_lock, load_manifest, save_manifest, update_manifest, validate_job_id
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_jobs():
+    yield
+    shutil.rmtree(JOBS_DIR, ignore_errors=True)
+
+
+def test_manifest_round_trip():
+    assert not job_exists("a1")
+    save_manifest("a1", {"job_id": "a1", "languages": {}})
+    assert job_exists("a1")
+    assert load_manifest("a1") == {"job_id": "a1", "languages": {}}
+
+
+def test_unknown_job():
+    with pytest.raises(Exception, match="Unknown job"):
+        load_manifest("b2")
+
+
+def test_concurrent_updates_are_merged():
+    save_manifest("a1", {"job_id": "a1", "languages": {}})
+
+    def add(lang):
+        update_manifest("a1", lambda manifest: manifest["languages"].update({lang: {"revision": 0}}))
+
+    threads = [threading.Thread(target=add, args=(f"l{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(load_manifest("a1")["languages"]) == [f"l{i}" for i in range(8)]
+
+
+def test_job_lock_is_exclusive():
+    events = []
+
+    def hold(name):
+        with job_lock("a1", "rerender"):
+            events.append(f"{name} in")
+            time.sleep(0.05)
+            events.append(f"{name} out")
+
+    threads = [threading.Thread(target=hold, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert events[0][0] == events[1][0] and events[2][0] == events[3][0]
+
+
+@pytest.mark.parametrize("job_id", ["../outside", "ABC", "", "a/b", None])
+def test_invalid_job_ids_are_rejected(job_id):
+    with pytest.raises(ValueError):
+        validate_job_id(job_id)
+    with pytest.raises(ValueError):
+        job_dir(job_id)
+    with pytest.raises(ValueError):
+        job_exists(job_id)
+    assert not (JOBS_DIR / "outside").exists()
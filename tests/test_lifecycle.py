@@ -0,0 +1,69 @@
+"""
+Tests for job leases and artifact eviction.
+"""
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from src import lifecycle
+from src.jobs import JOBS_DIR, job_dir, job_exists
+from src.lifecycle import job_lease, scratch_dir, register_artifacts, enforce_limits
+from config import OUTPUT_DIR, TEMP_DIR
+
+
+@pytest.fixture(autouse=True)
+def clean_outputs(monkeypatch):
+    monkeypatch.setattr(lifecycle, "MIN_FREE_DISK_GB", 0)
+    monkeypatch.setattr(lifecycle, "DISK_QUOTA_GB", 0)
+    yield
+    shutil.rmtree(JOBS_DIR, ignore_errors=True)
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+def _make_job(job_id, size=0, age_hours=0):
+    path = job_dir(job_id)
+    (path / "manifest.json").write_text(json.dumps({"job_id": job_id}), encoding="utf-8")
+    output = OUTPUT_DIR / f"{job_id}_translated_es.mp4"
+    output.write_bytes(b"\0" * size)
+    register_artifacts(job_id, output)
+    stamp = time.time() - age_hours * 3600
+    for file in (path / "manifest.json", path):
+        os.utime(file, (stamp, stamp))
+    return output
+
+
+def test_expired_jobs_are_evicted():
+    old = _make_job("a1", age_hours=48)
+    new = _make_job("b2", age_hours=1)
+    enforce_limits()
+    assert not job_exists("a1") and not old.exists()
+    assert job_exists("b2") and new.exists()
+
+
+def test_leased_jobs_are_never_evicted():
+    _make_job("a1", age_hours=48)
+    with job_lease("a1"):
+        enforce_limits()
+        assert job_exists("a1")
+
+
+def test_quota_evicts_least_recently_used(monkeypatch):
+    _make_job("a1", size=600 * 1024, age_hours=3)
+    _make_job("b2", size=600 * 1024, age_hours=2)
+    _make_job("c3", size=600 * 1024, age_hours=1)
+    monkeypatch.setattr(lifecycle, "DISK_QUOTA_GB", 1.5 * 1024 / 1024 ** 2)
+    enforce_limits()
+    assert [job_exists(j) for j in ("a1", "b2", "c3")] == [False, True, True]
+
+
+def test_scratch_is_removed_after_last_lease():
+    with job_lease("a1"):
+        scratch = scratch_dir("a1")
+        (scratch / "audio.wav").write_bytes(b"\0")
+        with job_lease("a1"):
+            pass
+        assert scratch.exists()
+    assert not scratch.exists()
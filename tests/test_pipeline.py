@@ -0,0 +1,15 @@
+"""
+Tests for pipeline argument checks that run before any paid stage.
+"""
+import pytest
+
+from src import pipeline
+
+
+def test_empty_language_list_is_rejected_before_admission(monkeypatch):
+    def admission(*args, **kwargs):
+        raise AssertionError("admission must not run")
+
+    monkeypatch.setattr(pipeline, "admission", admission)
+    with pytest.raises(ValueError, match="target language"):
+        pipeline.run_pipeline("video.mp4", "English", [], probe=(2, 5.0))
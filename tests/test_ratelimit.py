@@ -0,0 +1,192 @@
+"""
+Tests for provider error classification, the circuit breaker and ProviderGuard.
+"""
+import pytest
+
+from src.utils import ratelimit
+from src.utils.ratelimit import (
+    classify_error, AdaptiveTokenBucket, CircuitBreaker, ProviderGuard, ProviderUnavailable
+)
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code)
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RETRY_BACKOFF_BASE", 0)
+
+
+@pytest.mark.parametrize("error, kind", [
+    (_HTTPError(429), "throttled"),
+    (TooManyRequests(), "throttled"),
+    (_HTTPError(503), "server"),
+    (Exception("Request failed with status code 502"), "server"),
+    (ConnectionResetError(), "network"),
+    (TimeoutError(), "network"),
+    (ReadTimeout(), "network"),
+    (_HTTPError(400), "client"),
+    (ValueError("Language not supported: xx"), "client"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_classify_deep_translator_errors():
+    exceptions = pytest.importorskip("deep_translator.exceptions")
+    # Google answers 5xx with a bare RequestError: no response, no status in the message
+    assert classify_error(exceptions.RequestError()) == "server"
+    assert classify_error(exceptions.TooManyRequests()) == "throttled"
+    assert classify_error(exceptions.ServerException(503)) == "server"
+    assert classify_error(exceptions.NotValidPayload(None)) == "client"
+    assert classify_error(exceptions.LanguageNotSupportedException("xx")) == "client"
+
+
+def test_classify_gtts_errors():
+    tts = pytest.importorskip("gtts.tts")
+    assert classify_error(tts.gTTSError("Failed to connect. Probable cause: Unknown")) == "server"
+    assert classify_error(tts.gTTSError("403 (Forbidden) from TTS API", response=_Response(403))) == "client"
+    assert classify_error(tts.gTTSError("500 from TTS API", response=_Response(500))) == "server"
+    assert classify_error(Exception("Generated audio file is empty")) == "server"
+    with pytest.raises(ValueError) as e:
+        tts.gTTS("hola", lang="xx")
+    assert classify_error(e.value) == "client"
+
+
+def test_unclassified_error_retries_and_counts_toward_breaker():
+    exceptions = pytest.importorskip("deep_translator.exceptions")
+    guard = ProviderGuard("test", 1000)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise exceptions.RequestError()
+
+    rate = guard.bucket.rate
+    with pytest.raises(exceptions.RequestError):
+        guard.call(fail, attempts=3)
+    assert len(calls) == 3
+    assert guard.counters["server_errors"] == 3
+    assert guard.bucket.rate < rate
+    assert guard.breaker._failures == 3
+
+
+def test_classify_error_follows_cause():
+    try:
+        try:
+            raise ConnectionRefusedError()
+        except ConnectionRefusedError as e:
+            raise RuntimeError("translation failed") from e
+    except RuntimeError as e:
+        assert classify_error(e) == "network"
+
+
+def test_bucket_aimd():
+    bucket = AdaptiveTokenBucket(4, min_rate=1, increase=0.5, decrease=0.5)
+    bucket.on_throttle()
+    assert bucket.rate == 2
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 1
+    bucket.on_success()
+    assert bucket.rate == 1.5
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 4
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_one_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_release_probe_keeps_half_open():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_client_error_raises_without_retry_or_breaker():
+    guard = ProviderGuard("test", 1000)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("Language not supported: xx")
+
+    for _ in range(guard.breaker.threshold * 2):
+        with pytest.raises(ValueError):
+            guard.call(fail, attempts=3)
+    assert len(calls) == guard.breaker.threshold * 2
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+    assert guard.counters["client_errors"] == len(calls)
+    assert guard.counters["retries"] == 0
+
+
+def test_server_errors_retry_then_open_breaker():
+    guard = ProviderGuard("test", 1000)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise _HTTPError(503)
+
+    with pytest.raises(_HTTPError):
+        guard.call(fail, attempts=guard.breaker.threshold)
+    assert len(calls) == guard.breaker.threshold
+    assert guard.counters["retries"] == guard.breaker.threshold - 1
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ProviderUnavailable):
+        guard.call(fail)
+    assert len(calls) == guard.breaker.threshold
+
+
+def test_network_error_retries_without_slowing_bucket():
+    guard = ProviderGuard("test", 1000)
+    outcomes = [ConnectionResetError(), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    rate = guard.bucket.rate
+    assert guard.call(flaky, attempts=2) == "ok"
+    assert guard.counters["network_errors"] == 1
+    assert guard.bucket.rate >= rate
+    assert guard.breaker.state == CircuitBreaker.CLOSED
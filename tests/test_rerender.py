@@ -0,0 +1,35 @@
+"""
+Tests for detecting which cues changed between subtitle revisions.
+"""
+from src.subtitles.cues import CueTrack
+from src.rerender import diff_cues
+
+OLD = CueTrack([0, 1000, 2000], [900, 1900, 2900], ["a", "b", "c"])
+
+
+def test_unchanged_track_has_no_diff():
+    assert diff_cues(OLD, OLD) == ([], [])
+
+
+def test_whitespace_only_edit_is_not_a_change():
+    new = CueTrack(OLD.starts, OLD.ends, ["a ", "b", " c"])
+    assert diff_cues(OLD, new) == ([], [])
+
+
+def test_text_edit_and_retime():
+    new = CueTrack([0, 1000, 2100], [900, 1900, 2900], ["a", "B", "c"])
+    assert diff_cues(OLD, new) == ([1, 2], [1, 2])
+
+
+def test_insert_and_delete():
+    new = CueTrack([0, 1500, 2000], [900, 1800, 2900], ["a", "new", "c"])
+    assert diff_cues(OLD, new) == ([1], [1])
+    shorter = CueTrack([0, 2000], [900, 2900], ["a", "c"])
+    assert diff_cues(OLD, shorter) == ([1], [])
+
+
+def test_duplicate_cues_are_counted():
+    old = CueTrack([0, 0], [500, 500], ["x", "x"])
+    new = CueTrack([0], [500], ["x"])
+    removed, added = diff_cues(old, new)
+    assert len(removed) == 1 and added == []
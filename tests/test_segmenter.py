@@ -0,0 +1,75 @@
+"""
+Tests for sentence segmentation and regrouping units after subtitle edits.
+"""
+from collections import namedtuple
+
+from src.subtitles.cues import CueTrack
+from src.subtitles.segmenter import Segmentation, segment_words, regroup
+from config import SEGMENT_PAUSE_MS
+
+Word = namedtuple("Word", "text start end")
+
+
+def _words(text, start=0, step=300):
+    return [Word(w, start + i * step, start + i * step + step - 50) for i, w in enumerate(text.split())]
+
+
+def test_units_end_at_sentences_and_pauses():
+    words = _words("Hello there. How are you")
+    # A long pause before the last sentence starts a new unit
+    words += _words("Fine thanks", start=words[-1].end + SEGMENT_PAUSE_MS + 100)
+    seg = segment_words(words, lang="en")
+    assert seg.units.texts == ["Hello there.", "How are you", "Fine thanks"]
+    assert seg.units.starts[0] == words[0].start
+    assert seg.units.ends[-1] == words[-1].end
+    assert seg.unit_index.tolist() == [0, 1, 2]
+
+
+def test_display_cues_split_translated_units():
+    units = CueTrack([0], [4000], ["one two three four"], "en")
+    cues = CueTrack([0, 2000], [2000, 4000], ["aaaa", "bbbb"], "en")
+    seg = Segmentation(units, cues, [0, 0])
+    shown = seg.display_cues(units.with_texts(["uno dos tres cuatro"], "es"))
+    assert shown.texts == ["uno dos", "tres cuatro"]
+    assert shown.starts.tolist() == [0, 2000]
+    assert shown.lang == "es"
+
+
+def _edit(cues, i, start=None, end=None, text=None):
+    starts, ends, texts = cues.starts.tolist(), cues.ends.tolist(), list(cues.texts)
+    starts[i] = starts[i] if start is None else start
+    ends[i] = ends[i] if end is None else end
+    texts[i] = texts[i] if text is None else text
+    return CueTrack(starts, ends, texts, cues.lang)
+
+
+UNITS = CueTrack([0, 5000], [4000, 9000], ["Hola amigo.", "Que tal estas."], "es")
+CUES = CueTrack([0, 2000, 5000], [2000, 4000, 9000], ["Hola", "amigo.", "Que tal estas."], "es")
+
+
+def test_regroup_unchanged_keeps_units():
+    regrouped = regroup(UNITS, CUES, CUES)
+    assert list(regrouped) == list(UNITS)
+
+
+def test_regroup_text_edit_changes_only_that_unit():
+    regrouped = regroup(UNITS, CUES, _edit(CUES, 1, text="amiga."))
+    assert regrouped.texts == ["Hola amiga.", "Que tal estas."]
+    assert regrouped.starts.tolist() == [0, 5000]
+
+
+def test_regroup_retimed_cue_moves_unit():
+    regrouped = regroup(UNITS, CUES, _edit(CUES, 0, start=500))
+    assert regrouped.starts.tolist() == [500, 5000]
+    assert regrouped.ends.tolist() == [4000, 9000]
+
+    regrouped = regroup(UNITS, CUES, _edit(CUES, 1, end=3000))
+    assert regrouped.ends.tolist() == [3000, 9000]
+
+
+def test_regroup_orphan_cue_becomes_unit():
+    new = CueTrack(CUES.starts.tolist() + [10000], CUES.ends.tolist() + [11000],
+                   CUES.texts + ["Adios."], "es")
+    regrouped = regroup(UNITS, CUES, new)
+    assert regrouped.texts == ["Hola amigo.", "Que tal estas.", "Adios."]
+    assert regrouped.starts.tolist()[-1] == 10000
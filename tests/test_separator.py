@@ -0,0 +1,94 @@
+"""
+Tests for voice/background separation.
+"""
+import numpy as np
+import pytest
+
+from src.audio import separator
+from src.audio.separator import remove_voice, separate_background
+from src.audio.wavio import WavWriter, open_wav
+
+RATE = 16000
+
+
+def tone(freq, seconds=1.0, level=0.5):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (level * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def rms(samples):
+    return float(np.sqrt(np.mean(np.square(samples))))
+
+
+def write_track(path, samples):
+    with WavWriter(path, RATE, samples.shape[1]) as writer:
+        writer.write(samples)
+    return path
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Several chunks per second of audio, aligned to the STFT hop
+    monkeypatch.setattr(separator, "SEPARATION_CHUNK_SECONDS", 0.256)
+
+
+def test_unity_voice_gain_is_identity():
+    voice = tone(1000)
+    stereo = np.stack([voice + tone(300, level=0.2), voice - tone(300, level=0.2)], axis=1)
+    np.testing.assert_allclose(remove_voice(stereo, RATE, voice_gain=1.0), stereo, atol=1e-6)
+    np.testing.assert_allclose(remove_voice(voice[:, None], RATE, voice_gain=1.0), voice[:, None], atol=1e-6)
+
+
+def test_centre_voice_is_removed_and_side_kept():
+    voice = tone(1000)
+    music = tone(2000, level=0.2)
+    stereo = np.stack([voice + music, voice - music], axis=1)
+    background = remove_voice(stereo, RATE, voice_gain=0.0)
+    mid = background.mean(axis=1)
+    side = (background[:, 0] - background[:, 1]) / 2
+    assert rms(mid) < 0.1 * rms(voice)
+    np.testing.assert_allclose(rms(side), rms(music), rtol=0.05)
+
+
+def test_out_of_band_centre_content_is_kept():
+    bass = tone(50)
+    stereo = np.stack([bass, bass], axis=1)
+    background = remove_voice(stereo, RATE, voice_gain=0.0)
+    np.testing.assert_allclose(rms(background), rms(stereo), rtol=0.05)
+
+
+def test_mono_voice_band_is_attenuated():
+    background = remove_voice(tone(1000)[:, None], RATE, voice_gain=0.0)
+    assert rms(background) < 0.1 * rms(tone(1000))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_chunked_unity_gain_matches_input(tmp_path, small_chunks, workers):
+    samples = np.stack([tone(1000) + tone(300, level=0.2), tone(1000) - tone(300, level=0.2)], axis=1) * 0.8
+    source = write_track(tmp_path / "in.wav", samples)
+    output = separate_background(source, tmp_path / "bg.wav", voice_gain=1.0, workers=workers)
+    with open_wav(source) as original, open_wav(output) as background:
+        assert background.frames == original.frames
+        assert np.abs(background.data.astype(int) - original.data).max() <= 2
+
+
+def test_chunked_output_matches_whole_track(tmp_path, small_chunks):
+    music = tone(2000, level=0.2)
+    samples = np.stack([tone(1000) + music, tone(1000) - music], axis=1)
+    source = write_track(tmp_path / "in.wav", samples)
+    output = separate_background(source, tmp_path / "bg.wav", voice_gain=0.0, workers=1)
+    with open_wav(source) as original:
+        expected = remove_voice(original.read(0, original.frames), RATE, voice_gain=0.0)
+    with open_wav(output) as background:
+        chunked = background.read(0, background.frames)
+    assert np.abs(chunked - expected).max() < 1e-3
+    assert rms(chunked.mean(axis=1)) < 0.1 * rms(tone(1000))
+
+
+def test_default_output_paths_are_unique(tmp_path, small_chunks):
+    source = write_track(tmp_path / "in.wav", tone(1000, seconds=0.1)[:, None])
+    first = separate_background(source, workers=1)
+    second = separate_background(source, workers=1)
+    assert first != second
+    assert first.name.startswith("in_background_") and first.suffix == ".wav"
+    assert first.stat().st_size > 0
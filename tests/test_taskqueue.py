@@ -0,0 +1,82 @@
+"""
+Tests for the shared-directory task queue: claims, stale requeues and cleanup.
+"""
+import os
+import time
+
+import pytest
+
+from src.distributed import taskqueue
+from src.distributed.taskqueue import DirectoryQueue, MemoryQueue, new_task
+
+
+@pytest.fixture(params=["directory", "memory"])
+def task_queue(request, tmp_path):
+    if request.param == "directory":
+        return DirectoryQueue(tmp_path / "queue")
+    return MemoryQueue()
+
+
+def test_claim_is_exclusive(task_queue):
+    task = new_task("abc", "extract")
+    task_queue.submit(task)
+    assert task_queue.claim("node-a")["id"] == task["id"]
+    assert task_queue.claim("node-b") is None
+    assert not task_queue.is_pending(task["id"])
+
+
+def test_claim_filters_stages(task_queue):
+    task_queue.submit(new_task("abc", "combine"))
+    assert task_queue.claim("node-a", stages={"extract"}) is None
+    assert task_queue.claim("node-a", stages={"combine"})["stage"] == "combine"
+
+
+def test_locality_wait(task_queue, monkeypatch):
+    monkeypatch.setattr(taskqueue, "LOCALITY_WAIT", 60)
+    task = new_task("abc", "combine", prefer="node-a")
+    task_queue.submit(task)
+    assert task_queue.claim("node-b") is None
+    assert task_queue.claim("node-a")["id"] == task["id"]
+
+
+def test_complete_and_result(task_queue):
+    task = new_task("abc", "extract")
+    task_queue.submit(task)
+    task_queue.claim("node-a")
+    task_queue.complete(task["id"], {"node": "node-a"})
+    assert task_queue.result(task["id"]) == {"node": "node-a", "status": "done"}
+
+
+def test_discarded_task_reports_nothing(task_queue):
+    task = new_task("abc", "extract")
+    task_queue.submit(task)
+    task_queue.claim("node-a")
+    task_queue.discard([task["id"]])
+    task_queue.complete(task["id"], {"node": "node-a"})
+    assert task_queue.result(task["id"]) is None
+
+
+def test_fresh_claim_of_old_task_is_not_stale(tmp_path):
+    queue = DirectoryQueue(tmp_path / "queue")
+    task = new_task("abc", "extract")
+    queue.submit(task)
+    # The task waited in pending longer than the timeout before it was claimed
+    old = time.time() - 600
+    os.utime(queue.root / "pending" / f"{task['id']}.json", (old, old))
+    queue.claim("node-a")
+    assert queue.requeue_stale(timeout=120) == 0
+
+
+def test_stale_task_is_requeued(tmp_path):
+    queue = DirectoryQueue(tmp_path / "queue")
+    task = new_task("abc", "extract")
+    queue.submit(task)
+    queue.claim("node-a")
+    old = time.time() - 600
+    os.utime(queue.root / "running" / f"{task['id']}.json", (old, old))
+    assert queue.requeue_stale(timeout=120) == 1
+    assert queue.is_pending(task["id"])
+    # The worker that lost the task cannot report a result for it
+    queue.complete(task["id"], {"node": "node-a"})
+    assert queue.result(task["id"]) is None
+    assert queue.claim("node-b")["id"] == task["id"]
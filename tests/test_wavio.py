@@ -0,0 +1,119 @@
+"""
+Round-trip tests for the memory-mapped WAV reader and the incremental writer.
+"""
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from src.audio.wavio import WavWriter, create_wav, open_wav, to_int16
+
+
+def pcm(frames, channels, seed=0):
+    return np.random.default_rng(seed).integers(-32768, 32767, size=(frames, channels), dtype=np.int16)
+
+
+def chunk(chunk_id, payload):
+    return struct.pack("<4sI", chunk_id, len(payload)) + payload + b"\0" * (len(payload) % 2)
+
+
+def write_riff(path, samples, sample_rate, extra=(), data_size=None):
+    """Write a WAV by hand, with extra chunks between fmt and data."""
+    channels = samples.shape[1]
+    fmt = struct.pack("<HHIIHH", 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16)
+    data = samples.astype("<i2").tobytes()
+    body = b"WAVE" + chunk(b"fmt ", fmt) + b"".join(chunk(chunk_id, payload) for chunk_id, payload in extra)
+    size = len(data) if data_size is None else data_size
+    body += struct.pack("<4sI", b"data", size) + data
+    path.write_bytes(struct.pack("<4sI", b"RIFF", len(body)) + body)
+    return path
+
+
+def test_writer_round_trip_patches_header(tmp_path):
+    samples = pcm(1000, 2)
+    path = tmp_path / "out.wav"
+    with WavWriter(path, 16000, 2) as writer:
+        writer.write(samples[:300])
+        writer.write(samples[300:700].tobytes())
+        writer.write(samples[700:] / 32768.0)
+
+    riff_size, = struct.unpack("<I", path.read_bytes()[4:8])
+    data_size, = struct.unpack("<I", path.read_bytes()[40:44])
+    assert data_size == 1000 * 2 * 2
+    assert riff_size == path.stat().st_size - 8
+
+    with wave.open(str(path)) as reference:
+        assert (reference.getframerate(), reference.getnchannels(), reference.getnframes()) == (16000, 2, 1000)
+    with open_wav(path) as wav:
+        assert (wav.sample_rate, wav.channels, wav.frames) == (16000, 2, 1000)
+        np.testing.assert_array_equal(wav.data[:700], samples[:700])
+        # Float input is scaled by 32767, so it may differ by one step
+        assert np.abs(wav.data[700:].astype(int) - samples[700:]).max() <= 1
+
+
+def test_list_and_odd_chunks_before_data(tmp_path):
+    samples = pcm(257, 1)
+    extra = [(b"LIST", b"INFOISFT\x05\0\0\0Lavf\0"), (b"junk", b"abc")]
+    path = write_riff(tmp_path / "tagged.wav", samples, 22050, extra)
+    with open_wav(path) as wav:
+        assert (wav.sample_rate, wav.channels, wav.frames) == (22050, 1, 257)
+        np.testing.assert_array_equal(wav.data, samples)
+
+
+@pytest.mark.parametrize("data_size", [0, 0xFFFFFFFF])
+def test_unset_data_size_reads_to_end_of_file(tmp_path, data_size):
+    samples = pcm(500, 2)
+    path = write_riff(tmp_path / "piped.wav", samples, 44100, [(b"LIST", b"INFO")], data_size=data_size)
+    with open_wav(path) as wav:
+        assert wav.frames == 500
+        np.testing.assert_array_equal(wav.data, samples)
+
+
+def test_data_size_is_clipped_to_truncated_file(tmp_path):
+    samples = pcm(100, 1)
+    path = write_riff(tmp_path / "cut.wav", samples, 8000, data_size=400)
+    with open_wav(path) as wav:
+        assert wav.frames == 100
+
+
+def test_read_zero_pads_outside_the_file(tmp_path):
+    samples = pcm(10, 1)
+    path = write_riff(tmp_path / "short.wav", samples, 8000)
+    with open_wav(path) as wav:
+        block = wav.read(-2, 14)
+    assert block.shape == (14, 1) and block.dtype == np.float32
+    assert not block[:2].any() and not block[12:].any()
+    np.testing.assert_array_equal(block[2:12], samples / 32768.0)
+
+
+def test_create_wav_is_silent_and_writable(tmp_path):
+    path = create_wav(tmp_path / "silence.wav", 48000, 24000, 2)
+    with wave.open(str(path)) as reference:
+        assert (reference.getframerate(), reference.getnchannels(), reference.getnframes()) == (24000, 2, 48000)
+    samples = pcm(100, 2)
+    with open_wav(path, "r+") as wav:
+        assert wav.frames == 48000 and not wav.data.any()
+        wav.data[1000:1100] = samples
+    with open_wav(path) as wav:
+        np.testing.assert_array_equal(wav.view(1000, 100), samples)
+        assert not wav.view(0, 1000).any()
+
+
+def test_empty_wav(tmp_path):
+    path = create_wav(tmp_path / "empty.wav", 0, 16000, 1)
+    with open_wav(path) as wav:
+        assert wav.frames == 0 and wav.data.shape == (0, 1)
+        assert list(wav.chunks(1024)) == []
+
+
+def test_not_a_wav_is_rejected(tmp_path):
+    path = tmp_path / "bad.wav"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        open_wav(path)
+
+
+def test_to_int16_clips():
+    np.testing.assert_array_equal(to_int16(np.array([-2.0, -1.0, 0.0, 0.5, 1.0, 3.0])),
+                                  [-32767, -32767, 0, 16383, 32767, 32767])